@@ -0,0 +1,233 @@
+"""
+AI BATCH - ContractorMitra
+Headless AI quotations for a file of (customer, description) rows
+Usage: python ai_batch.py flats.csv [--pdf DIR] [--workers N] [--pool-min N] [--create-customers]
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import database
+from quotation_repository import Quotation, QuotationItem, insert_quotation
+
+WORKERS = max(1, min(8, (os.cpu_count() or 2) - 1))
+CHUNK = 25                 # descriptions per worker task
+POOL_MIN = 100             # fewer descriptions are generated in-process
+SAVE_CHUNK = 200           # quotations per write transaction
+LOOKUP_CHUNK = 500         # customer keys per IN (...) query
+
+
+@dataclass
+class BatchRow:
+    line: int               # line number in the input file
+    customer: str
+    description: str
+
+
+@dataclass
+class AIBatchResult:
+    saved: list = field(default_factory=list)       # (line, quotation id, quote_no)
+    failed: list = field(default_factory=list)      # (line, error text)
+    pdfs: list = field(default_factory=list)        # paths
+    timings: dict = field(default_factory=dict)     # stage -> seconds
+
+    @property
+    def seconds(self):
+        return sum(self.timings.values())
+
+    @property
+    def quotes_per_second(self):
+        return len(self.saved) / self.seconds if self.seconds else 0.0
+
+
+# ---------- INPUT ----------
+def read_rows(path):
+    """BatchRows from a CSV (customer, description header) or JSONL file"""
+    rows = []
+    if path.lower().endswith(('.jsonl', '.ndjson')):
+        with open(path, encoding='utf-8') as f:
+            for n, text in enumerate(f, 1):
+                if text.strip():
+                    obj = json.loads(text)
+                    rows.append(BatchRow(n, str(obj.get('customer', '')).strip(),
+                                         str(obj.get('description', '')).strip()))
+        return rows
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = [h.strip().lower() for h in next(reader, [])]
+        if 'customer' not in header or 'description' not in header:
+            raise ValueError("CSV needs 'customer' and 'description' columns")
+        c, d = header.index('customer'), header.index('description')
+        for n, row in enumerate(reader, 2):
+            if any(cell.strip() for cell in row):
+                row += [''] * (max(c, d) + 1 - len(row))
+                rows.append(BatchRow(n, row[c].strip(), row[d].strip()))
+    return rows
+
+
+def resolve_customers(conn, keys, create=False):
+    """{key: customer id} for keys given as an id, a phone number or an exact name.
+
+    Three IN (...) lookups per LOOKUP_CHUNK keys; with create, unknown keys are
+    inserted as new customers named after the key.
+    """
+    keys = list(dict.fromkeys(k for k in keys if k))
+    found = {}
+    for start in range(0, len(keys), LOOKUP_CHUNK):
+        chunk = keys[start:start + LOOKUP_CHUNK]
+        ids = [int(k) for k in chunk if k.isdigit()]
+        if ids:
+            marks = ','.join('?' * len(ids))
+            for (cid,) in conn.execute(f"SELECT id FROM customers WHERE id IN ({marks})", ids):
+                found[str(cid)] = cid
+        marks = ','.join('?' * len(chunk))
+        for cid, phone in conn.execute(f"SELECT id, phone FROM customers WHERE phone IN ({marks})", chunk):
+            found.setdefault(phone, cid)
+        for cid, name in conn.execute(f"SELECT id, name FROM customers WHERE name IN ({marks}) ORDER BY id",
+                                      chunk):
+            found.setdefault(name, cid)
+    if create:
+        for key in keys:
+            if key not in found:
+                found[key] = conn.execute("INSERT INTO customers (name) VALUES (?)", (key,)).lastrowid
+    return found
+
+
+# ---------- WORKER PROCESS ----------
+def _start_worker(db_path):
+    database.configure(db_path)
+
+
+def _generate(descriptions):
+    from ai_rules import generate_lines
+    return [generate_lines(d) for d in descriptions]
+
+
+def generate_all(descriptions, workers=WORKERS, db_path=None, pool_min=POOL_MIN):
+    """Priced quote lines per description, in order; workers=0, or fewer than
+    pool_min descriptions, runs in this process"""
+    if workers <= 0 or len(descriptions) < max(pool_min, CHUNK + 1):
+        return _generate(descriptions)
+    chunks = [descriptions[i:i + CHUNK] for i in range(0, len(descriptions), CHUNK)]
+    # spawn, as for PDFs: never fork a process holding SQLite handles
+    with ProcessPoolExecutor(workers, multiprocessing.get_context('spawn'), _start_worker,
+                             (db_path or database.DB_PATH,)) as pool:
+        return [lines for chunk in pool.map(_generate, chunks) for lines in chunk]
+
+
+def quotation(customer_id, lines, date=None, description=""):
+    """Quotation of generated lines, as the AI window saves it"""
+    return Quotation(
+        customer_id=customer_id,
+        description=description,
+        items=[QuotationItem(name=l.name, quantity=l.quantity, rate=l.rate, unit=l.unit,
+                             description=l.description, gst_percent=l.gst) for l in lines],
+        date=date,
+        period=(date or datetime.now()).strftime('%Y%m%d'))
+
+
+# ---------- BATCH ----------
+def run_batch(rows, workers=WORKERS, create_customers=False, pdf_dir=None, progress=None, pool_min=POOL_MIN):
+    """Generate and save a quotation per row; returns an AIBatchResult.
+
+    Stages: customers (bulk lookup), generate (worker pool from pool_min rows), save (SAVE_CHUNK
+    quotations per transaction) and, with pdf_dir, pdf (batch_pdf's pool).
+    progress(stage, done, total) is called as each stage advances.
+    """
+    result = AIBatchResult()
+
+    def stage(name, started):
+        result.timings[name] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with database.transaction() as conn:
+        customers = resolve_customers(conn, [r.customer for r in rows], create_customers)
+    todo = []
+    for row in rows:
+        if not row.description:
+            result.failed.append((row.line, "empty description"))
+        elif row.customer not in customers:
+            result.failed.append((row.line, f"unknown customer {row.customer!r}"))
+        else:
+            todo.append(row)
+    stage('customers', started)
+
+    started = time.perf_counter()
+    generated = generate_all([r.description for r in todo], workers, pool_min=pool_min)
+    stage('generate', started)
+    if progress:
+        progress('generate', len(todo), len(todo))
+
+    started = time.perf_counter()
+    now = datetime.now()
+    quotes = []
+    for row, lines in zip(todo, generated):
+        if lines:
+            quotes.append((row, quotation(customers[row.customer], lines, now, row.description)))
+        else:
+            result.failed.append((row.line, "no items matched"))
+    for start in range(0, len(quotes), SAVE_CHUNK):
+        chunk = quotes[start:start + SAVE_CHUNK]
+        with database.transaction() as conn:
+            for row, quote in chunk:
+                quotation_id, quote_no = insert_quotation(conn, quote)
+                result.saved.append((row.line, quotation_id, quote_no))
+        if progress:
+            progress('save', len(result.saved), len(quotes))
+    stage('save', started)
+
+    if pdf_dir and result.saved:
+        from batch_pdf import render_batch
+        started = time.perf_counter()
+        rendered = render_batch([qid for _, qid, _ in result.saved], pdf_dir, max(1, workers),
+                                progress=(lambda done, total: progress('pdf', done, total)) if progress else None)
+        result.pdfs = [path for _, path in rendered.rendered]
+        line_of = {qid: line for line, qid, _ in result.saved}
+        result.failed += [(line_of[qid], f"PDF: {error}") for qid, error in rendered.failed]
+        stage('pdf', started)
+    result.failed.sort()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate AI quotations for a file of project descriptions")
+    parser.add_argument('input', help="CSV with customer,description columns, or JSONL objects")
+    parser.add_argument('--pdf', dest='pdf_dir', help="also render the PDFs into this directory")
+    parser.add_argument('--workers', type=int, default=WORKERS, help="0 generates in this process")
+    parser.add_argument('--pool-min', type=int, default=POOL_MIN,
+                        help="fewer rows than this are generated in this process")
+    parser.add_argument('--create-customers', action='store_true',
+                        help="add customers that are not found by id, phone or name")
+    parser.add_argument('--db', default=database.DB_PATH)
+    args = parser.parse_args(argv)
+
+    database.configure(args.db)
+    try:
+        rows = read_rows(args.input)
+        result = run_batch(rows, args.workers, args.create_customers, args.pdf_dir,
+                           progress=lambda stage, done, total: print(f"\r{stage}: {done}/{total}   ",
+                                                                     end='', flush=True),
+                           pool_min=args.pool_min)
+    finally:
+        database.close()
+    print(f"\nSaved {len(result.saved)} of {len(rows)} quotations in {result.seconds:.2f} s "
+          f"({result.quotes_per_second:.1f} quotes/s)")
+    for name, seconds in result.timings.items():
+        print(f"  {name:<10} {seconds * 1000:9.1f} ms")
+    if result.pdfs:
+        print(f"  {len(result.pdfs)} PDFs in {args.pdf_dir}")
+    for line, error in result.failed:
+        print(f"  line {line}: {error}")
+    return 1 if result.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,10 +7,14 @@ Date: 2026-02-14
 import tkinter as tk
 from tkinter import ttk, messagebox
 from tkinter import simpledialog
-import sqlite3
-import re
 from datetime import datetime
 import os
+import database
+from ai_rules import DEFAULT_GST, QuoteLine, generate_lines
+from background import BackgroundTask
+from line_items import QuoteLines
+from materials_cache import catalogue
+from quotation_repository import Quotation, QuotationItem, save_quotation
 
 class ModernStyle:
     BG_COLOR = "#f5f5f7"
@@ -38,12 +42,15 @@ class AIQuoteGenerator:
         self.window.configure(bg=ModernStyle.BG_COLOR)
         self.window.resizable(True, True)
 
-        self.items = []
+        self.items = QuoteLines()
         self.selected_customer_id = None
         self.customer_name = None
         self.customer_phone = None
         self.customer_address = None
         self.customer_gstin = None
+        # Draft number shown on the PDF; kept until a new quote is generated so
+        # an unchanged quote hashes the same and comes from the PDF cache
+        self.pdf_quote_no = None
 
         self.center_window()
         self.setup_ui()
@@ -169,7 +176,7 @@ class AIQuoteGenerator:
         tk.Label(total_frame, textvariable=self.subtotal_var, font=ModernStyle.FONT_TITLE,
                  fg=ModernStyle.ACCENT_GREEN, bg=ModernStyle.BG_COLOR).pack(side=tk.LEFT, padx=(0, 20))
 
-        tk.Label(total_frame, text="GST (18%):", font=ModernStyle.FONT_NORMAL,
+        tk.Label(total_frame, text="GST:", font=ModernStyle.FONT_NORMAL,
                  fg=ModernStyle.TEXT_PRIMARY, bg=ModernStyle.BG_COLOR).pack(side=tk.LEFT, padx=(0, 5))
         tk.Label(total_frame, textvariable=self.gst_var, font=ModernStyle.FONT_TITLE,
                  fg=ModernStyle.ACCENT_ORANGE, bg=ModernStyle.BG_COLOR).pack(side=tk.LEFT, padx=(0, 20))
@@ -185,6 +192,8 @@ class AIQuoteGenerator:
 
         self.create_modern_button(action_frame, "💾 Save Quotation", self.save_quotation,
                                   ModernStyle.ACCENT_BLUE).pack(side=tk.LEFT, padx=5)
+        self.create_modern_button(action_frame, "💡 Suggest Items", self.suggest_items,
+                                  ModernStyle.ACCENT_PURPLE).pack(side=tk.LEFT, padx=5)
         self.create_modern_button(action_frame, "📄 Generate PDF", self.generate_pdf,
                                   ModernStyle.ACCENT_ORANGE).pack(side=tk.LEFT, padx=5)
         self.create_modern_button(action_frame, "🔄 Reset All", self.clear_all,
@@ -201,21 +210,13 @@ class AIQuoteGenerator:
     # ---------- LOAD DATA ----------
     def load_materials(self):
         try:
-            conn = sqlite3.connect('contractormitra.db')
-            cur = conn.cursor()
-            cur.execute("SELECT name, default_rate, default_unit FROM materials")
-            self.materials = cur.fetchall()
-            conn.close()
+            self.materials = [(m.name, m.rate, m.unit) for m in catalogue().all()]
         except:
             self.materials = []
 
     def load_customers(self):
         try:
-            conn = sqlite3.connect('contractormitra.db')
-            cur = conn.cursor()
-            cur.execute("SELECT id, name, phone, address, gstin FROM customers ORDER BY name")
-            cust = cur.fetchall()
-            conn.close()
+            cust = database.fetch_all("SELECT id, name, phone, address, gstin FROM customers ORDER BY name")
             self.customer_details = {}
             cust_list = []
             for c in cust:
@@ -262,44 +263,37 @@ class AIQuoteGenerator:
         self.window.focus_force()
         self.window.grab_set()
 
-    def extract_qty(self, text, keys):
-        q = 0
-        for k in keys:
-            m = re.findall(r'(\d+)\s*' + re.escape(k), text)
-            for x in m:
-                q += int(x)
-        return q
+    @staticmethod
+    def row_values(it):
+        return (it['name'][:20], it['description'][:30], f"{it['quantity']:g}", it['unit'],
+                f"Rs. {it['rate']:,.2f}", f"Rs. {it['amount']:,.2f}", f"{it['gst']:g}%")
 
-    def add_item(self, name, desc, qty, unit, rate):
+    def add_item(self, name, desc, qty, unit, rate, gst=DEFAULT_GST):
         if qty <= 0:
             return
-        for item in self.items:
-            if item['name'] == name and item['rate'] == rate:
-                item['quantity'] += qty
-                item['amount'] = item['quantity'] * rate
-                self.refresh_tree()
-                self.status_var.set(f"Updated {name} +{qty}")
-                return
-        amt = qty * rate
-        self.items.append({'name': name, 'description': desc, 'quantity': qty,
-                           'unit': unit, 'rate': rate, 'amount': amt})
-        self.tree.insert("", "end", values=(name[:20], desc[:30], qty, unit,
-                                            f"Rs. {rate:,.2f}", f"Rs. {amt:,.2f}", "18%"))
-        self.status_var.set(f"Added {name} x{qty}")
-
-    def refresh_tree(self):
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-        for it in self.items:
-            self.tree.insert("", "end", values=(it['name'][:20], it['description'][:30],
-                                                it['quantity'], it['unit'],
-                                                f"Rs. {it['rate']:,.2f}",
-                                                f"Rs. {it['amount']:,.2f}", "18%"))
+        slot, created = self.items.merge(name, unit, qty, rate, gst, desc)
+        line = self.items.row(slot)
+        if created:
+            # Tree rows are keyed by the line's slot: iid = str(slot)
+            self.tree.insert("", "end", iid=str(slot), values=self.row_values(line))
+            self.status_var.set(f"Added {name} x{qty}")
+        else:
+            self.tree.item(str(slot), values=self.row_values(line))
+            self.status_var.set(f"Updated {name} +{qty}")
+
+    def rows(self):
+        """Line dicts in display order"""
+        return [self.items.row(int(iid)) for iid in self.tree.get_children()]
+
+    def clear_items(self):
+        self.tree.delete(*self.tree.get_children())
+        self.items.clear()
 
     def calc_totals(self):
-        sub = sum(i['amount'] for i in self.items)
-        gst = sub * 0.18
-        tot = sub + gst
+        # Running totals kept by the line model; GST is at each line's own rate
+        sub = self.items.subtotal
+        gst = self.items.gst_amount
+        tot = self.items.grand_total
         self.subtotal_var.set(f"Rs. {sub:,.2f}")
         self.gst_var.set(f"Rs. {gst:,.2f}")
         self.total_var.set(f"Rs. {tot:,.2f}")
@@ -318,78 +312,16 @@ class AIQuoteGenerator:
         self.status_var.set("AI processing...")
         self.window.update()
 
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-        self.items = []
+        self.clear_items()
+        self.pdf_quote_no = None
 
-        d = desc.lower()
+        # Keywords and quantities come from the ai_rules tables, rates and GST
+        # from the materials catalogue as it is right now
         added = 0
-
-        # Wires
-        if 'wire' in d or 'cable' in d:
-            qty = self.extract_qty(d, ['wire', 'cable'])
-            if qty > 0:
-                self.add_item("1.5 sq.mm Copper Wire", "PVC insulated", qty, "meter", 48.0)
-                added += 1
-                if 'power' in d or '3 phase' in d:
-                    self.add_item("2.5 sq.mm Copper Wire", "Heavy duty", qty // 2, "meter", 65.0)
-                    added += 1
-
-        # Lights
-        if 'light' in d or 'led' in d:
-            qty = self.extract_qty(d, ['light', 'led'])
-            if qty > 0:
-                self.add_item("LED Panel Light 18W", "LED panel", qty, "piece", 450.0)
-                added += 1
-
-        # Fans
-        if 'fan' in d:
-            qty = self.extract_qty(d, ['fan'])
-            if qty > 0:
-                self.add_item("Ceiling Fan", "1200mm with regulator", qty, "piece", 1500.0)
-                added += 1
-
-        # Sockets
-        if 'socket' in d:
-            qty = self.extract_qty(d, ['socket'])
-            if qty > 0:
-                self.add_item("15A Socket", "power socket", qty, "piece", 150.0)
-                self.add_item("5A Socket", "switch socket", qty, "piece", 120.0)
-                added += 2
-
-        # Switches
-        if 'switch' in d or 'modular' in d:
-            qty = self.extract_qty(d, ['switch', 'modular'])
-            if qty == 0:
-                qty = self.extract_qty(d, ['socket']) + 5
-            self.add_item("Modular Switch 1-Gang", "modular switch", qty, "piece", 180.0)
+        for line in generate_lines(desc):
+            self.add_item(line.name, line.description, line.quantity, line.unit, line.rate, line.gst)
             added += 1
 
-        # MCB / DB
-        if 'mcb' in d or 'distribution' in d:
-            self.add_item("6A MCB", "SP MCB", 4, "piece", 200.0)
-            self.add_item("Distribution Box 8-way", "DB", 1, "piece", 800.0)
-            added += 2
-            if '3 phase' in d or 'industrial' in d:
-                self.add_item("Industrial MCB 63A", "3 phase MCB", 1, "piece", 850.0)
-                added += 1
-
-        # Conduit
-        if 'conduit' in d or 'pipe' in d:
-            qty = self.extract_qty(d, ['conduit', 'pipe'])
-            if qty > 0:
-                self.add_item("20mm PVC Conduit", "conduit pipe", qty, "meter", 30.0)
-                added += 1
-
-        # Labour
-        area = self.extract_qty(d, ['sqft', 'square'])
-        if area > 0:
-            pts = max(5, area // 150)
-        else:
-            pts = max(5, len(self.items) + 2)
-        self.add_item("Electrical Labour", "installation labour", pts, "point", 300.0)
-        added += 1
-
         self.calc_totals()
 
         self.bring_to_front()
@@ -410,29 +342,15 @@ class AIQuoteGenerator:
             messagebox.showwarning("Warning", "Generate items first")
             return
         try:
-            conn = sqlite3.connect('contractormitra.db')
-            cur = conn.cursor()
-            sub = sum(i['amount'] for i in self.items)
-            gst = sub * 0.18
-            total = sub + gst
-            dstr = datetime.now().strftime('%Y%m%d')
-            cur.execute("SELECT COUNT(*) FROM quotations WHERE quote_no LIKE ?", (f"QT-{dstr}-%",))
-            cnt = cur.fetchone()[0] + 1
-            qno = f"QT-{dstr}-{cnt:03d}"
-            cur.execute('''
-                INSERT INTO quotations (quote_no, date, customer_id, subtotal, gst_amount, grand_total, status)
-                VALUES (?,?,?,?,?,?,?)
-            ''', (qno, datetime.now().strftime('%Y-%m-%d'), self.selected_customer_id,
-                  sub, gst, total, 'Draft'))
-            qid = cur.lastrowid
-            for it in self.items:
-                cur.execute('''
-                    INSERT INTO quotation_items (quotation_id, item_name, description, quantity, unit, rate, amount)
-                    VALUES (?,?,?,?,?,?,?)
-                ''', (qid, it['name'], it['description'], it['quantity'],
-                      it['unit'], it['rate'], it['amount']))
-            conn.commit()
-            conn.close()
+            quotation = Quotation(
+                customer_id=self.selected_customer_id,
+                items=[QuotationItem(name=it['name'], quantity=it['quantity'], rate=it['rate'],
+                                     unit=it['unit'], description=it['description'], gst_percent=it['gst'])
+                       for it in self.rows()],
+                period=datetime.now().strftime('%Y%m%d'),
+                description=self.project_desc.get("1.0", tk.END).strip()
+            )
+            qid, qno = save_quotation(quotation)
             self.status_var.set(f"Quotation {qno} saved")
             self.bring_to_front()
             messagebox.showinfo("Success", f"Quotation {qno} saved")
@@ -446,12 +364,12 @@ class AIQuoteGenerator:
             messagebox.showwarning("Warning", "Generate items first")
             return
         try:
-            from pdf_generator import PDFGenerator
-            sub = sum(i['amount'] for i in self.items)
-            gst = sub * 0.18
-            total = sub + gst
+            from pdf_jobs import jobs
+            sub, gst, total = self.items.subtotal, self.items.gst_amount, self.items.grand_total
+            if self.pdf_quote_no is None:
+                self.pdf_quote_no = f"AI-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
             data = {
-                'quote_no': f"AI-{datetime.now().strftime('%Y%m%d-%H%M%S')}",
+                'quote_no': self.pdf_quote_no,
                 'date': datetime.now().strftime('%d-%b-%Y'),
                 'customer_name': self.customer_name or "Customer",
                 'customer_phone': self.customer_phone or "",
@@ -460,30 +378,83 @@ class AIQuoteGenerator:
                 'subtotal': sub,
                 'gst_amount': gst,
                 'grand_total': total,
-                'items': self.items
+                'items': self.rows()
             }
-            pdf = PDFGenerator()
             fname = f"quotation_ai_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-            self.status_var.set("Generating PDF...")
-            self.window.update()
-            ok = pdf.generate_quotation_pdf_from_dict(data, fname)
-            if ok:
-                self.status_var.set(f"PDF saved: {fname}")
-                self.bring_to_front()
-                if messagebox.askyesno("Open PDF", "Open PDF now?"):
-                    os.startfile(fname)
-            else:
-                self.bring_to_front()
-                messagebox.showerror("Error", "PDF generation failed")
+            # Rendered in a worker process; status updates arrive through after()
+            jobs().ai_quote(self.window, data, os.path.abspath(fname),
+                            on_done=self.pdf_ready, on_error=self.pdf_failed,
+                            on_progress=lambda state: self.status_var.set(
+                                "PDF queued..." if state == 'queued' else "Generating PDF..."))
         except Exception as e:
             self.bring_to_front()
             messagebox.showerror("Error", str(e))
 
+    def pdf_ready(self, fname):
+        self.status_var.set(f"PDF saved: {os.path.basename(fname)}")
+        self.bring_to_front()
+        if messagebox.askyesno("Open PDF", "Open PDF now?"):
+            os.startfile(fname)
+
+    def pdf_failed(self, error):
+        self.status_var.set("PDF generation failed")
+        self.bring_to_front()
+        messagebox.showerror("Error", f"PDF generation failed: {error}")
+
+    def suggest_items(self):
+        """Lines that past quotations usually add to these, looked up off the Tk thread"""
+        desc = self.project_desc.get("1.0", tk.END).strip()
+        if not desc and not self.items:
+            self.bring_to_front()
+            messagebox.showwarning("Warning", "Enter project description")
+            return
+        from ai_suggest import suggest
+        lines = [QuoteLine(it['name'], it['description'], it['quantity'], it['unit'], it['rate'], it['gst'])
+                 for it in self.rows()]
+        self.status_var.set("Looking at past quotations...")
+        # The first call builds the history index, which takes a few seconds on a large database
+        BackgroundTask(self.window, lambda task: suggest(desc, lines),
+                       on_done=self.show_suggestions,
+                       on_error=lambda e: self.status_var.set(f"Suggestions failed: {e}")).start()
+
+    def show_suggestions(self, result):
+        neighbours, suggestions = result
+        if not suggestions:
+            self.status_var.set("No suggestions from past quotations")
+            return
+        self.status_var.set(f"{len(suggestions)} suggestions from {len(neighbours)} similar quotations")
+        dialog = tk.Toplevel(self.window)
+        dialog.title("Suggested Items")
+        dialog.configure(bg="white")
+        dialog.transient(self.window)
+        tk.Label(dialog, text="💡 Often quoted together with these items", font=("SF Pro Display", 14, "bold"),
+                 bg="white", fg="#1d1d1f").pack(padx=20, pady=(10, 5))
+        listbox = tk.Listbox(dialog, selectmode=tk.MULTIPLE, width=80, height=min(12, len(suggestions)),
+                             font=("SF Pro Text", 11))
+        for s in suggestions:
+            line = s.line
+            listbox.insert(tk.END, f"{line.name}  x{line.quantity} {line.unit}  @ Rs. {line.rate:,.2f}  – {s.reason}")
+        listbox.select_set(0, tk.END)
+        listbox.pack(padx=20, pady=5)
+
+        def add_selected():
+            for i in listbox.curselection():
+                line = suggestions[i].line
+                self.add_item(line.name, line.description, line.quantity, line.unit, line.rate, line.gst)
+            self.calc_totals()
+            dialog.destroy()
+
+        tk.Button(dialog, text="➕ Add Selected", command=add_selected,
+                  bg=ModernStyle.ACCENT_GREEN, fg="white", font=("SF Pro Text", 11),
+                  padx=20, pady=5, relief=tk.FLAT).pack(side=tk.LEFT, padx=20, pady=10)
+        tk.Button(dialog, text="❌ Close", command=dialog.destroy,
+                  bg=ModernStyle.TEXT_SECONDARY, fg="white", font=("SF Pro Text", 11),
+                  padx=20, pady=5, relief=tk.FLAT).pack(side=tk.RIGHT, padx=20, pady=10)
+
     def clear_all(self):
         self.project_desc.delete("1.0", tk.END)
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-        self.items = []
+        self.clear_items()
+        self.pdf_quote_no = None
         self.selected_customer_id = None
         self.customer_name = None
         self.customer_phone = None
@@ -503,16 +474,8 @@ class AIQuoteGenerator:
         if not selected:
             return
 
-        item_id = selected[0]
-        values = self.tree.item(item_id, 'values')
-        if not values:
-            return
-
-        item_name = values[0].strip()
-        matching_items = [it for it in self.items if it['name'].startswith(item_name)]
-        if not matching_items:
-            return
-        item = matching_items[0]
+        slot = int(selected[0])
+        item = self.items.row(slot)
 
         edit_dialog = tk.Toplevel(self.window)
         edit_dialog.title("Edit Item")
@@ -570,12 +533,11 @@ class AIQuoteGenerator:
                     messagebox.showwarning("Warning", "Rate must be greater than 0")
                     return
 
-                item['quantity'] = new_qty
-                item['rate'] = new_rate
-                item['description'] = new_desc
-                item['amount'] = new_qty * new_rate
-
-                self.refresh_tree()
+                kept = self.items.update(slot, quantity=new_qty, rate=new_rate, description=new_desc, merge=True)
+                if kept != slot:
+                    # Same material at a rate already on the quote: merged into that line
+                    self.tree.delete(str(slot))
+                self.tree.item(str(kept), values=self.row_values(self.items.row(kept)))
                 self.calc_totals()
 
                 edit_dialog.destroy()
@@ -0,0 +1,317 @@
+"""
+AI RULES - ContractorMitra
+Data-driven quote rules compiled into a single-pass keyword matcher
+"""
+
+import re
+import threading
+from collections import OrderedDict, deque, namedtuple
+
+import database
+from materials_cache import catalogue
+
+DEFAULT_GST = 18.0         # for generated lines whose material is not in the catalogue
+LINES_TERM = '#lines'      # in a fallback: the number of distinct lines generated so far
+NUMBER = re.compile(r'(\d+)\s*')
+WHITESPACE = re.compile(r'\s+')
+GENERATION_CACHE_SIZE = 256  # distinct descriptions remembered
+
+QuoteLine = namedtuple('QuoteLine', 'name description quantity unit rate gst')
+Rule = namedtuple('Rule', 'name triggers qty_keywords qty_divisor fallback needs_qty lines')
+RuleLine = namedtuple('RuleLine', 'material description unit rate divisor fixed_qty minimum requires')
+
+
+def split_keywords(text):
+    return [k.strip().lower() for k in (text or '').split(',') if k.strip()]
+
+
+def _number(value):
+    """Whole quantities stay ints, as the hand-written rules produced"""
+    return int(value) if float(value).is_integer() else value
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton: every occurrence of every keyword in one pass over the text"""
+
+    def __init__(self, words):
+        goto, out = [{}], [[]]
+        for word_id, word in enumerate(words):
+            state = 0
+            for ch in word:
+                if ch not in goto[state]:
+                    goto.append({})
+                    out.append([])
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            out[state].append((word_id, len(word)))
+        # Fold the failure links into a full transition table (a DFA), so the
+        # scan is one dict lookup per character
+        fail = [0] * len(goto)
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta[state] = {**delta[fail[state]], **goto[state]}
+            out[state] = out[state] + out[fail[state]]
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0)
+                queue.append(nxt)
+        self.delta = delta
+        self.out = [tuple(o) for o in out]
+
+    def matches(self, text):
+        """(start, word_id) for every occurrence, overlapping ones included"""
+        delta, out = self.delta, self.out
+        state = 0
+        found = []
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                found.extend((i - length + 1, word_id) for word_id, length in out[state])
+        return found
+
+
+class RuleEngine:
+    """Rules compiled once; evaluate() is linear in the description length"""
+
+    def __init__(self, rules, synonyms=()):
+        self.keywords = []
+        self._ids = {}
+        compiled = []
+        for rule in rules:
+            fallback_keywords, fallback_add, fallback_lines = [], 0, 0
+            for term in split_keywords(rule.fallback.replace('+', ',')):
+                if term == LINES_TERM:
+                    fallback_lines += 1
+                elif term.isdigit():
+                    fallback_add += int(term)
+                else:
+                    fallback_keywords.append(self._keyword(term))
+            compiled.append(rule._replace(
+                triggers=[self._keyword(k) for k in rule.triggers],
+                qty_keywords=[self._keyword(k) for k in rule.qty_keywords],
+                fallback=(fallback_keywords, fallback_add, fallback_lines) if rule.fallback else None,
+                lines=[line._replace(requires=[self._keyword(k) for k in line.requires]) for line in rule.lines]))
+        self.rules = compiled
+        # Synonyms are extra spellings of a keyword the rules already use
+        words = list(self.keywords)
+        targets = list(range(len(words)))
+        for word, keyword in synonyms:
+            if keyword in self._ids and word not in self._ids:
+                words.append(word)
+                targets.append(self._ids[keyword])
+        self._targets = targets
+        self.matcher = KeywordMatcher(words)
+
+    def _keyword(self, word):
+        if word not in self._ids:
+            self._ids[word] = len(self.keywords)
+            self.keywords.append(word)
+        return self._ids[word]
+
+    def scan(self, text):
+        """(present, quantity) per keyword id: seen at all, and the sum of the
+        numbers written right before it ('12 lights', '3fans')"""
+        text = text.lower()
+        # Tokenizer pass: where each number (plus trailing spaces) ends
+        numbers = {m.end(): int(m.group(1)) for m in NUMBER.finditer(text)}
+        present = [False] * len(self.keywords)
+        quantity = [0] * len(self.keywords)
+        targets = self._targets
+        for start, word_id in self.matcher.matches(text):
+            keyword = targets[word_id]
+            present[keyword] = True
+            quantity[keyword] += numbers.get(start, 0)
+        return present, quantity
+
+    def evaluate(self, description):
+        """Quote lines for a project description, in rule order"""
+        present, quantity = self.scan(description)
+        lines, seen = [], set()
+        for rule in self.rules:
+            if rule.triggers and not any(present[k] for k in rule.triggers):
+                continue
+            raw = sum(quantity[k] for k in rule.qty_keywords)
+            if raw:
+                qty = raw // rule.qty_divisor
+            elif rule.fallback:
+                keywords, add, per_line = rule.fallback
+                qty = sum(quantity[k] for k in keywords) + add + per_line * len(seen)
+            else:
+                qty = 0
+            if rule.needs_qty and qty <= 0:
+                continue
+            for line in rule.lines:
+                if line.requires and not any(present[k] for k in line.requires):
+                    continue
+                line_qty = _number(line.fixed_qty) if line.fixed_qty is not None else qty // line.divisor
+                line_qty = max(line_qty, _number(line.minimum))
+                if line_qty <= 0:
+                    continue
+                lines.append(QuoteLine(line.material, line.description, line_qty, line.unit, line.rate,
+                                       DEFAULT_GST))
+                seen.add((line.material, line.rate))
+        return lines
+
+
+# ---------- PRICING ----------
+def price(lines):
+    """Lines at the catalogue's current rate, unit and GST; rule values where the
+    material is not in the catalogue (or has no rate)"""
+    materials = catalogue().get_many({line.name for line in lines})
+    priced = []
+    for line in lines:
+        m = materials.get(line.name)
+        if m is None:
+            priced.append(line)
+        else:
+            priced.append(line._replace(rate=m.rate or line.rate, unit=m.unit or line.unit, gst=m.gst))
+    return priced
+
+
+def normalize(description):
+    """The description as generation sees it: case and runs of whitespace never matter"""
+    return WHITESPACE.sub(' ', description.lower()).strip()
+
+
+class GenerationCache:
+    """LRU of priced line sets per normalized description. Entries belong to one
+    version of the materials and rule tables; a change to either empties it."""
+
+    def __init__(self, size=GENERATION_CACHE_SIZE):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self, description):
+        key = normalize(description)
+        version = database.table_version('materials', *RULE_TABLES)
+        with self._lock:
+            if version != self._version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._version = version
+            lines = self._entries.get(key)
+            if lines is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(lines)
+            self.misses += 1
+        lines = tuple(price(engine().evaluate(key)))
+        with self._lock:
+            # Not stored if the tables changed while generating
+            if version == self._version:
+                self._entries[key] = lines
+                while len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+        return list(lines)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'invalidations': self.invalidations,
+                'entries': len(self._entries), 'size': self.size,
+                'hit_ratio': self.hits / total if total else 0.0}
+
+
+_generated = GenerationCache()
+
+
+def generation_cache():
+    return _generated
+
+
+def generate_lines(description):
+    """Priced quote lines for a project description, from the cache when the same
+    description was generated under the current materials and rules"""
+    return _generated.get(description)
+
+
+# ---------- LOADING ----------
+def load_rules(conn):
+    """(rules, synonyms) as stored: the active rules in order, keywords as lists"""
+    lines = {}
+    for row in conn.execute('''
+        SELECT rule_id, material, description, unit, rate, divisor, fixed_qty, minimum, requires
+        FROM ai_rule_lines ORDER BY rule_id, position, id
+    '''):
+        lines.setdefault(row[0], []).append(RuleLine(
+            row[1], row[2] or "", row[3] or "", row[4] or 0.0, max(1, row[5] or 1), row[6], row[7] or 0,
+            split_keywords(row[8])))
+    rules = [Rule(name, split_keywords(triggers), split_keywords(qty_keywords), max(1, divisor or 1),
+                  fallback or '', bool(needs_qty), lines.get(rule_id, []))
+             for rule_id, name, triggers, qty_keywords, divisor, fallback, needs_qty in conn.execute('''
+                 SELECT id, name, triggers, qty_keywords, qty_divisor, fallback, needs_qty
+                 FROM ai_rules WHERE active = 1 ORDER BY position, id
+             ''')]
+    synonyms = [(word.lower(), keyword.lower())
+                for word, keyword in conn.execute("SELECT word, keyword FROM ai_synonyms")]
+    return rules, synonyms
+
+
+def load_engine(conn):
+    """RuleEngine over the active rules in the database"""
+    return RuleEngine(*load_rules(conn))
+
+
+def seed(conn, rules, synonyms=()):
+    """Insert rule rows; positions continue after the existing rules.
+
+    rules are (trade, name, triggers, qty_keywords, qty_divisor, fallback, needs_qty,
+    [(material, description, unit, rate, divisor, fixed_qty, minimum, requires)]);
+    keyword lists are comma-separated and a rule with no triggers always fires.
+    The seeded electrical rules live in migration 11.
+    """
+    position = conn.execute("SELECT COALESCE(MAX(position), 0) FROM ai_rules").fetchone()[0]
+    for trade, name, triggers, qty_keywords, divisor, fallback, needs_qty, rule_lines in rules:
+        position += 10
+        rule_id = conn.execute('''
+            INSERT INTO ai_rules (trade, name, triggers, qty_keywords, qty_divisor, fallback, needs_qty, position)
+            VALUES (?,?,?,?,?,?,?,?)
+        ''', (trade, name, triggers, qty_keywords, divisor, fallback, needs_qty, position)).lastrowid
+        conn.executemany('''
+            INSERT INTO ai_rule_lines (rule_id, material, description, unit, rate, divisor,
+                                       fixed_qty, minimum, requires, position)
+            VALUES (?,?,?,?,?,?,?,?,?,?)
+        ''', [(rule_id,) + tuple(line) + (n,) for n, line in enumerate(rule_lines)])
+    conn.executemany("INSERT OR IGNORE INTO ai_synonyms (word, keyword) VALUES (?,?)", synonyms)
+
+
+RULE_TABLES = ('ai_rules', 'ai_rule_lines', 'ai_synonyms')
+
+
+class RuleCache:
+    """The compiled engine, rebuilt only when a rule table changes"""
+
+    def __init__(self):
+        self._engine = None
+        self._version = None
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get(self):
+        version = database.table_version(*RULE_TABLES)
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    with database.connection() as conn:
+                        self._engine = load_engine(conn)
+                    self._version = version
+                    self.loads += 1
+        return self._engine
+
+
+_rules = RuleCache()
+
+
+def engine():
+    return _rules.get()
@@ -0,0 +1,329 @@
+"""
+AI SUGGEST - ContractorMitra
+Item suggestions learned from past quotations: TF-IDF nearest quotes plus item co-occurrence
+"""
+
+import math
+import re
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+import database
+from ai_rules import DEFAULT_GST, QuoteLine, price
+
+NEIGHBOURS = 20            # past quotations consulted per suggestion
+SUGGESTIONS = 10
+MIN_SUPPORT = 3            # quotations a pair of items must share to count
+MIN_SCORE = 0.3            # co-occurrence confidence plus share of similar quotes holding the item
+MAX_PAIR_ITEMS = 60        # bigger BOQs are left out of pair counting (pairs grow quadratically)
+PAIR_CHUNK = 20000         # quotations per vectorized pair-counting pass
+DELTA_REBUILD = 0.1        # full rebuild once new quotations pass this share of the base
+TOKEN = re.compile(r'[a-z]{2,}')
+INDEX_TABLES = ('quotations', 'quotation_items')
+
+Neighbour = namedtuple('Neighbour', 'quotation_id score')
+Suggestion = namedtuple('Suggestion', 'line score reason')
+
+
+class Segment:
+    """Term-major postings and per-quotation items for a run of quotations.
+
+    docs[ptr[t]:ptr[t + 1]] are the quotations holding term t, weights the
+    matching 1 + log(tf); items[item_ptr[d]:item_ptr[d + 1]] are quotation d's.
+    """
+
+    def __init__(self, ids, doc, term, vocab, item_doc, item, qty, prior_df=(), prior_n=0):
+        n = len(ids)
+        self.ids = np.asarray(ids, dtype=np.int64)
+        key, tf = np.unique(doc * vocab + term, return_counts=True)
+        docs, terms = key // vocab, key % vocab
+        # np.unique sorted by (doc, term); a stable sort on term keeps docs ascending
+        order = np.argsort(terms, kind='stable')
+        self.docs = docs[order].astype(np.int32)
+        self.weights = (1 + np.log(tf[order])).astype(np.float32)
+        counts = np.bincount(terms, minlength=vocab)
+        self.ptr = np.concatenate(([0], np.cumsum(counts)))
+        self.df = counts
+        # Document norms use the idf of this segment together with the older ones
+        df = counts.astype(np.float64)
+        df[:len(prior_df)] += prior_df
+        idf = np.log((prior_n + n + 1) / (df + 1)) + 1
+        norms = np.sqrt(np.bincount(docs, weights=((1 + np.log(tf)) * idf[terms]) ** 2, minlength=n))
+        self.inv_norm = (1 / np.maximum(norms, 1e-9)).astype(np.float32)
+
+        # Items per quotation, repeats of an item merged
+        nitems = int(item.max()) + 1 if len(item) else 1
+        key, inverse = np.unique(item_doc * nitems + item, return_inverse=True)
+        self.item = (key % nitems).astype(np.int32)
+        self.qty = np.bincount(inverse, weights=qty).astype(np.float32)
+        self.item_ptr = np.concatenate(([0], np.cumsum(np.bincount(key // nitems, minlength=n))))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def scores(self, query):
+        """Cosine similarity of every quotation to `query` ({term: weight})"""
+        terms = len(self.ptr) - 1
+        spans = [(self.ptr[t], self.ptr[t + 1], w) for t, w in query.items() if t < terms]
+        if not spans:
+            return np.zeros(len(self.ids), dtype=np.float32)
+        # One bincount over the gathered postings beats a scatter-add per term
+        docs = np.concatenate([self.docs[lo:hi] for lo, hi, _ in spans])
+        weights = np.concatenate([self.weights[lo:hi] * w for lo, hi, w in spans])
+        return np.bincount(docs, weights=weights, minlength=len(self.ids)) * self.inv_norm
+
+    def items_of(self, d):
+        lo, hi = self.item_ptr[d], self.item_ptr[d + 1]
+        return self.item[lo:hi], self.qty[lo:hi]
+
+
+class SuggestionIndex:
+    """Base segment plus a delta of newer quotations, and item co-occurrence
+    counted over the base"""
+
+    def __init__(self):
+        self.terms = {}
+        self.item_ids = {}
+        self.item_names = []
+        self.item_units = []
+        self.item_rates = []       # last rate quoted
+        self.base = None
+        self.delta = None
+        self.base_last_id = 0
+        self.last_id = 0
+        self.count = 0
+        self.builds = 0
+        self.pairs = (np.zeros(1, dtype=np.int64),) + (np.zeros(0, dtype=np.float32),) * 3
+
+    # ---------- BUILDING ----------
+    def _load(self, conn, after_id, upto_id):
+        ids, texts = [], []
+        for qid, description in conn.execute(
+                "SELECT id, description FROM quotations WHERE id > ? AND id <= ? ORDER BY id",
+                (after_id, upto_id)):
+            ids.append(qid)
+            texts.append([description or ''])
+        pos = {qid: n for n, qid in enumerate(ids)}
+        item_doc, item, qty = [], [], []
+        item_ids = self.item_ids
+        for qid, name, quantity, unit, rate in conn.execute('''
+            SELECT quotation_id, item_name, quantity, unit, rate FROM quotation_items
+            WHERE quotation_id > ? AND quotation_id <= ? ORDER BY quotation_id, id
+        ''', (after_id, upto_id)):
+            d = pos.get(qid)
+            if d is None or not name:
+                continue
+            i = item_ids.get(name)
+            if i is None:
+                i = item_ids[name] = len(self.item_names)
+                self.item_names.append(name)
+                self.item_units.append(unit or "")
+                self.item_rates.append(rate or 0.0)
+            else:
+                self.item_units[i] = unit or self.item_units[i]
+                self.item_rates[i] = rate or self.item_rates[i]
+            item_doc.append(d)
+            item.append(i)
+            qty.append(quantity if quantity and quantity > 0 else 0.0)
+            # Item names are part of the text, so old quotations without a description still match
+            texts[d].append(name)
+        term, lengths = [], []
+        terms = self.terms
+        for parts in texts:
+            words = [terms.setdefault(w, len(terms)) for w in TOKEN.findall(' '.join(parts).lower())]
+            term += words
+            lengths.append(len(words))
+        doc = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+        return ids, doc, np.array(term, dtype=np.int64), \
+            np.array(item_doc, dtype=np.int64), np.array(item, dtype=np.int64), np.array(qty, dtype=np.float64)
+
+    def _segment(self, conn, after_id, upto_id, prior=None):
+        ids, doc, term, item_doc, item, qty = self._load(conn, after_id, upto_id)
+        if prior is None:
+            return Segment(ids, doc, term, max(1, len(self.terms)), item_doc, item, qty)
+        return Segment(ids, doc, term, max(1, len(self.terms)), item_doc, item, qty, prior.df, len(prior))
+
+    @classmethod
+    def build(cls, conn, builds=0):
+        """Index every quotation from scratch"""
+        index = cls()
+        upto = conn.execute("SELECT COALESCE(MAX(id), 0) FROM quotations").fetchone()[0]
+        index.base = index._segment(conn, 0, upto)
+        index.base_last_id = index.last_id = upto
+        index.count = len(index.base)
+        index.pairs = index._count_pairs(index.base)
+        index.builds = builds + 1
+        return index
+
+    def refresh(self, conn):
+        """The index caught up with the database: new quotations go to the
+        delta; deletes or a large delta mean a new build. Edits to quotations
+        already indexed wait for the next build."""
+        if self.base is None:
+            return self.build(conn, self.builds)
+        upto, total = conn.execute("SELECT COALESCE(MAX(id), 0), COUNT(*) FROM quotations").fetchone()
+        kept = conn.execute("SELECT COUNT(*) FROM quotations WHERE id <= ?", (self.last_id,)).fetchone()[0]
+        if kept != self.count or total - len(self.base) > DELTA_REBUILD * max(len(self.base), 1000):
+            return self.build(conn, self.builds)
+        if upto > self.last_id:
+            self.delta = self._segment(conn, self.base_last_id, upto, self.base)
+            self.last_id = upto
+            self.count = len(self.base) + len(self.delta)
+        return self
+
+    def _count_pairs(self, seg):
+        """(ptr, partner, confidence, quantity ratio) per item, best partners first"""
+        nitems = max(1, len(self.item_names))
+        sizes = np.diff(seg.item_ptr)
+        freq = np.bincount(seg.item, minlength=nitems)
+        doc_of_row = np.repeat(np.arange(len(sizes)), sizes)
+        log_qty = np.log(np.maximum(seg.qty, 1e-9))
+        found_keys, found_counts, found_sums = [], [], []
+        for d0 in range(0, len(sizes), PAIR_CHUNK):
+            d1 = min(d0 + PAIR_CHUNK, len(sizes))
+            rows = np.arange(seg.item_ptr[d0], seg.item_ptr[d1])
+            rows = rows[(sizes[doc_of_row[rows]] <= MAX_PAIR_ITEMS) & (seg.qty[rows] > 0)]
+            # Every row paired with every row of its quotation, itself excluded
+            k = sizes[doc_of_row[rows]]
+            left = np.repeat(rows, k)
+            right = np.repeat(seg.item_ptr[doc_of_row[rows]], k) + \
+                (np.arange(len(left)) - np.repeat(np.cumsum(k) - k, k))
+            keep = (left != right) & (seg.qty[right] > 0)
+            left, right = left[keep], right[keep]
+            keys, inverse = np.unique(seg.item[left].astype(np.int64) * nitems + seg.item[right],
+                                      return_inverse=True)
+            found_keys.append(keys)
+            found_counts.append(np.bincount(inverse))
+            found_sums.append(np.bincount(inverse, weights=log_qty[right] - log_qty[left]))
+        if not found_keys:
+            return self.pairs
+        keys, inverse = np.unique(np.concatenate(found_keys), return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate(found_counts))
+        sums = np.bincount(inverse, weights=np.concatenate(found_sums))
+        keep = counts >= MIN_SUPPORT
+        keys, counts, sums = keys[keep], counts[keep], sums[keep]
+        a, b = keys // nitems, keys % nitems
+        confidence = counts / freq[a]
+        order = np.lexsort((-confidence, a))
+        ptr = np.concatenate(([0], np.cumsum(np.bincount(a, minlength=nitems))))
+        return (ptr, b[order].astype(np.int32), confidence[order].astype(np.float32),
+                np.exp(sums[order] / counts[order]).astype(np.float32))
+
+    # ---------- QUERYING ----------
+    def idf(self):
+        df = np.zeros(len(self.terms))
+        n = 0
+        for seg in (self.base, self.delta):
+            if seg is not None:
+                df[:len(seg.df)] += seg.df
+                n += len(seg)
+        return np.log((n + 1) / (df + 1)) + 1
+
+    def _query(self, description):
+        counts = {}
+        for word in TOKEN.findall(description.lower()):
+            t = self.terms.get(word)
+            if t is not None:
+                counts[t] = counts.get(t, 0) + 1
+        idf = self.idf()
+        query = {t: (1 + math.log(c)) * idf[t] for t, c in counts.items()}
+        norm = math.sqrt(sum(w * w for w in query.values())) or 1.0
+        # Postings carry tf only, so idf is applied once more for the document side
+        return {t: w / norm * idf[t] for t, w in query.items()}
+
+    def _nearest(self, description, k):
+        query = self._query(description)
+        found = []
+        if not query:
+            return found
+        for seg in (self.base, self.delta):
+            if seg is None or not len(seg):
+                continue
+            scores = seg.scores(query)
+            top = np.argpartition(-scores, min(k, len(scores) - 1))[:k]
+            found += [(float(scores[d]), seg, int(d)) for d in top if scores[d] > 0]
+        found.sort(key=lambda f: -f[0])
+        return found[:k]
+
+    def nearest(self, description, k=NEIGHBOURS):
+        """The k past quotations most similar to a description"""
+        return [Neighbour(int(seg.ids[d]), score) for score, seg, d in self._nearest(description, k)]
+
+    def suggest(self, description, lines=(), k=NEIGHBOURS, limit=SUGGESTIONS):
+        """(neighbours, suggestions): lines the generated `lines` usually come
+        with, sized by the usual quantity ratio, and lines common on similar
+        past quotations"""
+        nearest = self._nearest(description, k)
+        have = {line.name for line in lines}
+        found = {}       # item -> [score, quantity, reason]
+        ptr, partner, confidence, ratio = self.pairs
+        for line in lines:
+            a = self.item_ids.get(line.name)
+            if a is None or a + 1 >= len(ptr):
+                continue
+            for j in range(ptr[a], ptr[a + 1]):
+                if confidence[j] < MIN_SCORE:
+                    break
+                entry = found.setdefault(int(partner[j]), [0.0, 0.0, None])
+                if confidence[j] > entry[0]:
+                    entry[:] = [float(confidence[j]), line.quantity * float(ratio[j]), f"goes with {line.name}"]
+        total = sum(score for score, _, _ in nearest)
+        shares = {}
+        for score, seg, d in nearest:
+            for item, qty in zip(*seg.items_of(d)):
+                share = shares.setdefault(int(item), [0.0, 0.0])
+                share[0] += score / total
+                share[1] += score * float(qty)
+        for item, (share, weighted) in shares.items():
+            entry = found.setdefault(item, [0.0, 0.0, None])
+            if entry[2] is None:
+                # Only seen on similar quotations: their similarity-weighted quantity
+                entry[1] = weighted / (share * total)
+                entry[2] = f"on {share:.0%} of similar quotes"
+            entry[0] += share
+        ranked = sorted(((s, item, q, why) for item, (s, q, why) in found.items()
+                         if s >= MIN_SCORE and self.item_names[item] not in have), reverse=True)[:limit]
+        suggested = price([QuoteLine(self.item_names[item], "suggested", max(1, round(q)), self.item_units[item],
+                                     self.item_rates[item], DEFAULT_GST) for _, item, q, _ in ranked])
+        neighbours = [Neighbour(int(seg.ids[d]), score) for score, seg, d in nearest]
+        return neighbours, [Suggestion(line, s, why) for line, (s, _, _, why) in zip(suggested, ranked)]
+
+
+class SuggestionCache:
+    """The index, caught up with the database whenever the quotation tables change"""
+
+    def __init__(self):
+        self._index = SuggestionIndex()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        version = database.table_version(*INDEX_TABLES)
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    conn = database.open_reader()
+                    try:
+                        # One snapshot for the quotation and item queries
+                        conn.execute("BEGIN")
+                        # Builds replace the index; readers keep the one they hold
+                        self._index = self._index.refresh(conn)
+                        conn.execute("COMMIT")
+                    finally:
+                        conn.close()
+                    self._version = version
+        return self._index
+
+
+_suggestions = SuggestionCache()
+
+
+def index():
+    return _suggestions.get()
+
+
+def suggest(description, lines=()):
+    """(neighbours, suggestions) for a description and the lines generated for it"""
+    return index().suggest(description, lines)
@@ -0,0 +1,135 @@
+"""
+BACKGROUND - ContractorMitra
+Run slow work on a worker thread and hand progress/results back to Tk
+"""
+
+import queue
+import threading
+import tkinter as tk
+
+import database
+
+POLL_MS = 50
+PROGRESS_OPS = 10000       # SQLite VM steps between cancellation checks
+
+
+class BackgroundTask:
+    """work(task) runs on a thread; callbacks always run on the Tk thread via after()"""
+
+    def __init__(self, widget, work, on_progress=None, on_done=None, on_error=None):
+        self.widget = widget
+        self.work = work
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.cancelled = threading.Event()
+        self.finished = False
+        self._queue = queue.Queue()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        self.widget.after(POLL_MS, self._poll)
+        return self
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def progress(self, *args):
+        """Called from the worker thread"""
+        self._queue.put(('progress', args))
+
+    def _run(self):
+        try:
+            self._queue.put(('done', self.work(self)))
+        except BaseException as e:
+            self._queue.put(('error', e))
+
+    def _poll(self):
+        try:
+            while True:
+                kind, payload = self._queue.get_nowait()
+                if kind == 'progress':
+                    if self.on_progress:
+                        self.on_progress(*payload)
+                    continue
+                self.finished = True
+                callback = self.on_done if kind == 'done' else self.on_error
+                if callback:
+                    callback(payload)
+                return
+        except queue.Empty:
+            pass
+        except tk.TclError:
+            # Window closed while the worker was still running
+            self.cancel()
+            return
+        try:
+            self.widget.after(POLL_MS, self._poll)
+        except tk.TclError:
+            self.cancel()
+
+
+class QueryRunner:
+    """Runs queries one at a time on worker threads over a private read connection.
+
+    cancel() stops the statement in flight through SQLite's progress handler;
+    results of cancelled queries are dropped.
+    """
+
+    def __init__(self, widget, on_busy=None):
+        self.widget = widget
+        self.on_busy = on_busy
+        self.tasks = set()
+        self._conn = None
+        self._lock = threading.Lock()
+        self._was_busy = False
+
+    def submit(self, query, on_done, on_error=None):
+        """query(conn) runs on a worker; on_done(result) runs on the Tk thread"""
+        def work(task):
+            with self._lock:
+                if task.cancelled.is_set():
+                    return None
+                if self._conn is None:
+                    self._conn = database.open_reader()
+                self._conn.set_progress_handler(task.cancelled.is_set, PROGRESS_OPS)
+                try:
+                    return query(self._conn)
+                finally:
+                    self._conn.set_progress_handler(None, 0)
+
+        def finish(callback, payload):
+            self.tasks.discard(task)
+            self._notify()
+            if callback and not task.cancelled.is_set():
+                callback(payload)
+
+        task = BackgroundTask(self.widget, work,
+                              on_done=lambda result: finish(on_done, result),
+                              on_error=lambda e: finish(on_error, e))
+        self.tasks.add(task)
+        self._notify()
+        return task.start()
+
+    @property
+    def busy(self):
+        return bool(self.tasks)
+
+    def cancel(self):
+        """Interrupt the running query and drop every queued one"""
+        for task in self.tasks:
+            task.cancel()
+        self.tasks.clear()
+        self._notify()
+
+    def close(self):
+        self.cancel()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _notify(self):
+        if self.on_busy and self.busy != self._was_busy:
+            self._was_busy = self.busy
+            self.on_busy(self.busy)
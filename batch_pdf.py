@@ -0,0 +1,160 @@
+"""
+BATCH PDF - ContractorMitra
+Re-issue many quotation PDFs at once: bulk prefetch, render on a process pool through the PDF cache
+"""
+
+import argparse
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+import database
+from date_keys import key_range
+from pdf_generator import ITEM_COLUMNS, QUOTE_SELECT, quotation_data
+
+PREFETCH_IDS = 500         # quotations per bulk header/items query pair
+WORKERS = max(1, min(8, (os.cpu_count() or 2) - 1))
+
+
+@dataclass
+class BatchResult:
+    rendered: list = field(default_factory=list)     # (quotation id, path)
+    failed: list = field(default_factory=list)       # (quotation id, error text)
+    cached: int = 0                                  # rendered documents copied from the PDF cache
+    seconds: float = 0.0
+    cancelled: bool = False
+
+    @property
+    def docs_per_second(self):
+        return len(self.rendered) / self.seconds if self.seconds else 0.0
+
+
+def quotation_ids(conn, date_from, date_to, statuses=None):
+    """Ids of the quotations dated within an inclusive range, oldest first"""
+    sql = "SELECT id FROM quotations WHERE date_key BETWEEN ? AND ?"
+    params = list(key_range(date_from, date_to))
+    if statuses:
+        sql += f" AND status IN ({','.join('?' * len(statuses))})"
+        params += list(statuses)
+    return [row[0] for row in conn.execute(sql + " ORDER BY date_key, id", params)]
+
+
+def prefetch(conn, ids):
+    """quote_data dicts for `ids` (missing ids are skipped), two queries per PREFETCH_IDS"""
+    found = {}
+    for start in range(0, len(ids), PREFETCH_IDS):
+        chunk = ids[start:start + PREFETCH_IDS]
+        marks = ','.join('?' * len(chunk))
+        items = {}
+        for row in conn.execute(f"SELECT quotation_id, {ITEM_COLUMNS} FROM quotation_items "
+                                f"WHERE quotation_id IN ({marks}) ORDER BY quotation_id, id", chunk):
+            items.setdefault(row[0], []).append(row[1:])
+        for quote in conn.execute(f"{QUOTE_SELECT} WHERE q.id IN ({marks})", chunk):
+            found[quote[0]] = quotation_data(quote, items.get(quote[0], ()))
+    return [found[i] for i in ids if i in found]
+
+
+def pdf_name(quote_no):
+    """File name for a quotation number, safe on Windows too"""
+    return re.sub(r'[^\w.-]+', '_', quote_no or 'quotation') + '.pdf'
+
+
+# ---------- WORKER PROCESS ----------
+_generator = None
+
+
+def _start_worker(cache_dir):
+    global _generator
+    import pdf_cache
+    from pdf_generator import PDFGenerator
+    pdf_cache.configure(cache_dir)
+    _generator = PDFGenerator()
+
+
+def _render(quote_data, path):
+    """(path, served from the PDF cache)"""
+    from pdf_cache import cache
+    hits = cache().hits
+    # Unchanged quotations are copied from the content-hash cache, as in the windows
+    _generator.generate_quotation_pdf_from_data(quote_data, path)
+    return path, cache().hits > hits
+
+
+def render_batch(ids, out_dir, workers=WORKERS, conn=None, progress=None, cancelled=None):
+    """Render quotations `ids` into out_dir as <quote_no>.pdf; returns a BatchResult.
+
+    Data is read up front on `conn` (the pool by default); the processes only
+    draw. progress(done, total) is called after every document and when
+    cancelled() turns true the queued documents are dropped.
+    """
+    start = time.perf_counter()
+    if conn is None:
+        with database.connection() as pooled:
+            quotes = prefetch(pooled, list(ids))
+    else:
+        quotes = prefetch(conn, list(ids))
+    os.makedirs(out_dir, exist_ok=True)
+    result = BatchResult()
+    if not quotes:
+        return result
+    from pdf_cache import cache
+    # spawn: the Tk process has threads and open SQLite handles that must not be forked.
+    # Workers share this process's PDF cache directory
+    with ProcessPoolExecutor(workers, multiprocessing.get_context('spawn'), _start_worker,
+                             (cache().root,)) as pool:
+        futures = {pool.submit(_render, q, os.path.join(out_dir, pdf_name(q['quote_no']))): q['id']
+                   for q in quotes}
+        for future in as_completed(futures):
+            try:
+                path, hit = future.result()
+                result.rendered.append((futures[future], path))
+                result.cached += hit
+            except Exception as e:
+                result.failed.append((futures[future], str(e)))
+            if progress:
+                progress(len(result.rendered) + len(result.failed), len(quotes))
+            if cancelled and cancelled():
+                result.cancelled = True
+                pool.shutdown(cancel_futures=True)
+                break
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render many quotation PDFs at once")
+    parser.add_argument('--ids', help="comma-separated quotation ids")
+    parser.add_argument('--from', dest='date_from', help="first quotation date (with --to)")
+    parser.add_argument('--to', dest='date_to', help="last quotation date")
+    parser.add_argument('--status', action='append', help="only quotations with this status (repeatable)")
+    parser.add_argument('--out', default='quotation_pdfs')
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    parser.add_argument('--db', default=database.DB_PATH)
+    args = parser.parse_args(argv)
+    if not args.ids and not (args.date_from and args.date_to):
+        parser.error("give --ids or both --from and --to")
+
+    database.configure(args.db)
+    try:
+        if args.ids:
+            ids = [int(i) for i in args.ids.split(',') if i.strip()]
+        else:
+            with database.connection() as conn:
+                ids = quotation_ids(conn, args.date_from, args.date_to, args.status)
+        result = render_batch(ids, args.out, args.workers,
+                              progress=lambda done, total: print(f"\r{done}/{total}", end='', flush=True))
+    finally:
+        database.close()
+    print(f"\nRendered {len(result.rendered)} quotations into {args.out} in {result.seconds:.1f} s "
+          f"({result.docs_per_second:.1f} docs/s, {result.cached} unchanged from the PDF cache)")
+    for quotation_id, error in result.failed:
+        print(f"  quotation {quotation_id} failed: {error}")
+    return 1 if result.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
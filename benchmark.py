@@ -0,0 +1,1134 @@
+"""
+BENCHMARKS - ContractorMitra
+Synthetic workloads for the data layer, run against a throw-away database
+Usage: python benchmark.py <name> [--rows N]
+"""
+
+import argparse
+import heapq
+import os
+import random
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import multiprocessing
+
+import database
+import migrations
+from quote_numbers import next_quote_number
+from quotation_repository import Quotation, QuotationItem, insert_quotation, save_quotation
+from tests.ai_reference import legacy_ai_lines, project_description
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+@contextmanager
+def temp_db(**seed_sizes):
+    """Seeded throw-away database that the shared pool points at"""
+    fd, path = tempfile.mkstemp(prefix='cm_bench_', suffix='.db')
+    os.close(fd)
+    try:
+        seed(path, **seed_sizes)
+        database.configure(path)
+        yield path
+    finally:
+        database.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+def seed(path, customers=2000, materials=500, quotations=5000):
+    """Fill a fresh database with random but realistic-looking rows"""
+    rnd = random.Random(42)
+    conn = sqlite3.connect(path, isolation_level=None)
+    migrations.migrate(conn)
+    conn.execute("BEGIN")
+    # One INSERT ... SELECT: row-by-row statements make the FTS5 sync trigger
+    # flush a new index segment per customer
+    conn.execute("CREATE TEMP TABLE seed_customers (name TEXT, phone TEXT, email TEXT)")
+    conn.executemany("INSERT INTO temp.seed_customers VALUES (?,?,?)",
+                     ((f"Customer {i}", f"9{i:09d}", f"c{i}@example.com") for i in range(customers)))
+    conn.execute("INSERT INTO customers (name, phone, email) SELECT name, phone, email FROM temp.seed_customers")
+    conn.executemany('''INSERT INTO materials (name, category, default_unit, default_rate, default_gst)
+                        VALUES (?,?,?,?,?)''',
+                     ((f"Material {i}", f"Cat {i % 20}", "piece", rnd.uniform(10, 5000), 18.0)
+                      for i in range(materials)))
+    conn.executemany('''INSERT INTO quotations (quote_no, date, customer_id, subtotal, gst_amount, grand_total, status)
+                        VALUES (?,?,?,?,?,?,?)''',
+                     ((f"QT-B-{i:07d}", f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}",
+                       1 + i % customers, 1000.0, 180.0, 1180.0, 'Draft') for i in range(quotations)))
+    conn.execute("COMMIT")
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def report(label, before, after):
+    print(f"{label:<28} before {before * 1e6:10.1f} us   after {after * 1e6:10.1f} us   x{before / after:6.1f}")
+
+
+@benchmark('pool')
+def bench_pool(args):
+    """Per-call sqlite3.connect versus the shared pool"""
+    with temp_db() as path:
+        def direct(sql, params=()):
+            conn = sqlite3.connect(path)
+            cur = conn.cursor()
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+            conn.close()
+            return rows
+
+        ops = [
+            ("material by name", "SELECT default_unit, default_rate, default_gst FROM materials WHERE name = ?",
+             ("Material 250",)),
+            ("customer by id", "SELECT name, phone, email, gstin, address FROM customers WHERE id = ?", (17,)),
+            ("count quotations", "SELECT COUNT(*) FROM quotations", ()),
+            ("load materials", "SELECT name, default_unit, default_rate, default_gst FROM materials ORDER BY name", ()),
+        ]
+        for label, sql, params in ops:
+            before = timed(lambda: direct(sql, params), args.repeat)
+            after = timed(lambda: database.fetch_all(sql, params), args.repeat)
+            report(label, before, after)
+
+
+@benchmark('quote_numbers')
+def bench_quote_numbers(args):
+    """COUNT(*)-based numbering versus the quote_sequences allocator"""
+    target = args.rows or 1_000_000
+    with temp_db(quotations=0) as path:
+        loaded = 0
+        for size in (10_000, 100_000, target):
+            if size > target or size <= loaded:
+                continue
+            with database.transaction() as conn:
+                conn.executemany('''INSERT INTO quotations (quote_no, date, customer_id, grand_total, status)
+                                    VALUES (?,?,?,?,?)''',
+                                 ((f"QT-20251017-{i:07d}", '2025-10-17', 1, 1180.0, 'Draft')
+                                  for i in range(loaded, size)))
+            loaded = size
+
+            # All three run inside the save's write transaction, where numbering happens
+            def count_all():
+                with database.transaction() as conn:
+                    conn.execute("SELECT COUNT(*) FROM quotations").fetchone()
+
+            def count_like():
+                with database.transaction() as conn:
+                    conn.execute("SELECT COUNT(*) FROM quotations WHERE quote_no LIKE ?", ("QT-20251017-%",)).fetchone()
+
+            def allocate():
+                with database.transaction() as conn:
+                    next_quote_number(conn, 'QT', '20251019')
+
+            repeat = max(5, args.repeat // 20)
+            print(f"-- {size:,} quotations")
+            report("COUNT(*) vs allocator", timed(count_all, repeat), timed(allocate, repeat))
+            report("LIKE count vs allocator", timed(count_like, repeat), timed(allocate, repeat))
+
+
+@benchmark('save_items')
+def bench_save_items(args):
+    """Row-by-row item inserts versus the repository's executemany save"""
+    with temp_db() as path:
+        for lines in (100, 1_000, 5_000):
+            items = [QuotationItem(name=f"Material {i % 500}", quantity=1 + i % 40, rate=10.0 + i,
+                                   unit="piece", description="BOQ line") for i in range(lines)]
+
+            def row_by_row():
+                with database.transaction() as conn:
+                    cur = conn.cursor()
+                    qno = next_quote_number(conn, 'QT', '20251018')
+                    cur.execute('''INSERT INTO quotations (quote_no, date, customer_id, subtotal, gst_amount,
+                                                          grand_total, status)
+                                   VALUES (?,?,?,?,?,?,?)''', (qno, '2025-10-18', 1, 0, 0, 0, 'Draft'))
+                    qid = cur.lastrowid
+                    for it in items:
+                        cur.execute('''INSERT INTO quotation_items (quotation_id, item_name, description,
+                                                                   quantity, unit, rate, amount)
+                                       VALUES (?,?,?,?,?,?,?)''', (qid, it.name, it.description, it.quantity,
+                                                                it.unit, it.rate, it.amount))
+
+            def repository():
+                save_quotation(Quotation(customer_id=1, items=items, period='20251018'))
+
+            repeat = max(3, args.repeat // max(1, lines // 10))
+            report(f"{lines:,}-line quote", timed(row_by_row, repeat), timed(repository, repeat))
+
+
+@benchmark('import')
+def bench_import(args):
+    """iterrows() row inserts versus the chunked upsert import (CSV price list)"""
+    import pandas as pd
+    from material_import import import_materials
+    rows = args.rows or 50_000
+    with temp_db(materials=0) as path:
+        csv_path = path + '.csv'
+        with open(csv_path, 'w') as f:
+            f.write("Name,Category,Unit,Rate,GST\n")
+            for i in range(rows):
+                f.write(f"SKU {i},Cat {i % 40},piece,{10 + i % 900}.5,18\n")
+        try:
+            def iterrows_import():
+                df = pd.read_csv(csv_path)
+                with database.transaction() as conn:
+                    for _, row in df.iterrows():
+                        conn.execute('''INSERT OR IGNORE INTO materials
+                                        (name, category, default_unit, default_rate, default_gst)
+                                        VALUES (?,?,?,?,?)''',
+                                     (row.iloc[0], row.iloc[1], row.iloc[2], float(row.iloc[3]), float(row.iloc[4])))
+                database.execute("DELETE FROM materials")
+
+            before = timed(iterrows_import, 1)
+            first = timed(lambda: import_materials(csv_path), 1)
+            again = timed(lambda: import_materials(csv_path), 1)
+            print(f"{rows:,} SKUs: iterrows {before:.2f}s   chunked first import {first:.2f}s   "
+                  f"re-import (no changes) {again:.2f}s")
+            print(f"materials after two imports: {database.fetch_one('SELECT COUNT(*) FROM materials')[0]:,}")
+        finally:
+            os.remove(csv_path)
+
+
+@benchmark('materials_cache')
+def bench_materials_cache(args):
+    """Per-pick material query versus the catalogue cache"""
+    from materials_cache import MaterialsCatalogue
+    with temp_db() as path:
+        cache = MaterialsCatalogue()
+        names = [f"Material {i}" for i in range(500)]
+        picks = iter(range(10 ** 9))
+
+        def query():
+            database.fetch_one("SELECT default_unit, default_rate, default_gst FROM materials WHERE name = ?",
+                               (names[next(picks) % 500],))
+
+        def cached():
+            cache.get(names[next(picks) % 500])
+
+        report("item pick", timed(query, args.repeat), timed(cached, args.repeat))
+        report("combobox list", timed(lambda: database.fetch_all("SELECT name FROM materials ORDER BY name"),
+                                      args.repeat), timed(lambda: cache.all(), args.repeat))
+        print(f"cache stats: {cache.stats()}")
+
+
+@benchmark('customer_search')
+def bench_customer_search(args):
+    """Load-everything-then-filter search versus the trigram index (per keystroke)"""
+    from customer_search import search_customers
+    customers = args.rows or 200_000
+    with temp_db(customers=customers, quotations=0):
+        def filter_all(term):
+            rows = database.fetch_all("SELECT id, name, phone, email, gstin, created_date FROM customers ORDER BY name")
+            term = term.lower()
+            return [r for r in rows if any(term in str(v).lower() for v in r[1:4])]
+
+        repeat = max(3, args.repeat // 50)
+        for term in ("C", "Cu", "Custo", "omer 1234", "98765", "c17@exa", "zzz-no-match", "zq"):
+            before = timed(lambda: filter_all(term), max(1, repeat // 10))
+            after = timed(lambda: search_customers(term), repeat)
+            report(f"{customers:,} / {term!r}", before, after)
+            if after > 0.05:
+                raise SystemExit(f"search for {term!r} took {after * 1000:.1f} ms (budget 50 ms)")
+
+
+@benchmark('grid')
+def bench_grid(args):
+    """fetchall() of a whole report versus keyset pages of the virtual grid"""
+    from virtual_grid import GridSource
+    quotations = args.rows or 1_000_000
+    with temp_db(customers=20_000, quotations=quotations):
+        sql = '''
+            SELECT q.id, q.quote_no, q.date_key, c.name, q.subtotal, q.gst_amount, q.grand_total, q.status
+            FROM quotations q
+            LEFT JOIN customers c ON q.customer_id = c.id
+            WHERE q.date_key BETWEEN ? AND ?
+        '''
+        source = GridSource(("Invoice #", "Date", "Customer", "Subtotal", "GST", "Total", "Status"),
+                            sql, (20250101, 20251231), sort=1, descending=True)
+        deep = source.position(source.page(None, True, 100_000)[-1])
+        repeat = max(3, args.repeat // 100)
+        full = timed(lambda: database.fetch_all(sql + " ORDER BY q.date_key DESC", (20250101, 20251231)),
+                     max(1, repeat // 5))
+        report(f"{quotations:,}-row sales: first page", full, timed(lambda: source.page(), repeat))
+        report("page after 100k rows", full, timed(lambda: source.page(deep), repeat))
+        report("summary (SUM, COUNT)", full, timed(lambda: source.summary("SUM(c5)", "COUNT(*)"), repeat))
+        source.sort, source.descending = 2, False
+        report("first page by customer", full, timed(lambda: source.page(), repeat))
+
+
+@benchmark('report_cache')
+def bench_report_cache(args):
+    """Re-running report queries versus the versioned report cache (quick-period flips)"""
+    from report_cache import REPORT_TABLES, report_cache
+    from virtual_grid import GridSource
+    quotations = args.rows or 300_000
+    with temp_db(quotations=quotations):
+        periods = [(20250101, 20250131), (20250101, 20250630), (20250101, 20251231)]
+
+        def monthly(period, cached):
+            source = GridSource(("Month", "Invoices", "Sales", "GST", "Net"), '''
+                SELECT strftime('%Y-%m', date), strftime('%Y-%m', date), COUNT(*),
+                       SUM(grand_total), SUM(gst_amount), SUM(grand_total) - SUM(gst_amount)
+                FROM quotations WHERE date_key BETWEEN ? AND ? GROUP BY 1
+            ''', period, sort=0, descending=True,
+                **({'cache_key': ('monthly',) + period, 'tables': REPORT_TABLES} if cached else {}))
+            return source.page(), source.summary("SUM(c2)", "SUM(c1)")
+
+        def flip(cached):
+            for period in periods:
+                monthly(period, cached)
+
+        report_cache().clear()
+        flip(True)
+        repeat = max(3, args.repeat // 100)
+        report("3 periods, monthly report", timed(lambda: flip(False), repeat), timed(lambda: flip(True), repeat))
+
+        before = monthly(periods[2], True)[1]
+        database.execute("INSERT INTO quotations (quote_no, date, customer_id, grand_total, gst_amount, status) "
+                         "VALUES ('QT-X-1', '2025-03-03', 1, 1000, 180, 'Draft')")
+        after = monthly(periods[2], True)[1]
+        print(f"invalidated on insert: {before[1]} -> {after[1]} invoices; cache stats: {report_cache().stats()}")
+
+
+@benchmark('rollups')
+def bench_rollups(args):
+    """GROUP BY over quotations versus the trigger-maintained rollups"""
+    import rollups
+    from virtual_grid import GridSource
+    quotations = args.rows or 1_000_000
+    with temp_db(customers=20_000, quotations=quotations):
+        raw_monthly = '''
+            SELECT strftime('%Y-%m', date), COUNT(*), COALESCE(SUM(grand_total),0), COALESCE(SUM(gst_amount),0)
+            FROM quotations WHERE date_key BETWEEN ? AND ? GROUP BY 1 ORDER BY 1 DESC
+        '''
+        repeat = max(20, args.repeat // 10)
+        sql, params = rollups.monthly_report_sql('2025-01-01', '2025-12-31')
+        report(f"{quotations:,}: monthly, full year", timed(lambda: database.fetch_all(raw_monthly, (20250101, 20251231)), 2),
+               timed(lambda: database.fetch_all(sql, params), repeat))
+        sql, params = rollups.monthly_report_sql('2025-01-15', '2025-11-10')
+        report("monthly, partial edges", timed(lambda: database.fetch_all(raw_monthly, (20250115, 20251110)), 2),
+               timed(lambda: database.fetch_all(sql, params), repeat))
+
+        cols = ("Customer", "Phone", "Email", "Invoices", "Total Spent")
+        raw = GridSource(cols, '''
+            SELECT c.id, c.name, c.phone, c.email, COUNT(q.id), COALESCE(SUM(q.grand_total),0)
+            FROM customers c LEFT JOIN quotations q ON c.id = q.customer_id GROUP BY c.id
+        ''', sort=4, descending=True)
+        fast = GridSource(cols, rollups.CUSTOMER_REPORT_SQL, sort=4, descending=True)
+        report("customers, first page", timed(lambda: raw.page(), 2), timed(lambda: fast.page(), repeat))
+
+
+@benchmark('date_keys')
+def bench_date_keys(args):
+    """Text BETWEEN over mixed date formats versus the indexed integer date_key"""
+    from date_keys import normalize_column
+    from virtual_grid import GridSource
+    quotations = args.rows or 1_000_000
+    with temp_db(customers=20_000, quotations=quotations):
+        # What older writers left behind: timestamps and day-first dates
+        with database.transaction() as conn:
+            conn.execute("UPDATE quotations SET date = date || ' 10:30:00' WHERE id % 5 = 0")
+            conn.execute("UPDATE quotations SET date = substr(date, 9, 2) || '-' || substr(date, 6, 2) "
+                         "|| '-' || substr(date, 1, 4) WHERE id % 5 = 1")
+            conn.execute("UPDATE quotations SET status = 'Sent' WHERE id % 3 = 0")
+            conn.execute("CREATE INDEX idx_quotations_date ON quotations (date)")
+            conn.execute("ANALYZE")
+        # Seeded dates are 2025-{1 + i % 12}-{1 + i % 28} for quote i (id i + 1)
+        january = sum(1 for i in range(quotations) if i % 12 == 0)
+        sales = '''
+            SELECT q.id, q.quote_no, {col}, c.name, q.subtotal, q.gst_amount, q.grand_total, q.status
+            FROM quotations q
+            LEFT JOIN customers c ON q.customer_id = c.id
+            WHERE {col} BETWEEN ? AND ?
+        '''
+        pending = '''
+            SELECT q.id, q.quote_no, {col}, c.name, q.grand_total, q.status
+            FROM quotations q
+            LEFT JOIN customers c ON q.customer_id = c.id
+            WHERE q.status IN ('Draft','Sent') AND {col} BETWEEN ? AND ?
+        '''
+        cols = ("Invoice #", "Date", "Customer", "Subtotal", "GST", "Total", "Status")
+
+        def sources(col, params, **options):
+            return (GridSource(cols, sales.format(col=col), params, sort=1, descending=True, **options),
+                    GridSource(cols[:3] + ("Amount", "Status"), pending.format(col=col), params, sort=1, **options))
+
+        text_sales, text_pending = sources('q.date', ('2025-01-01', '2025-01-31'))
+        missed = january - text_sales.summary("COUNT(*)")[0]
+        repeat = max(3, args.repeat // 50)
+        # Wrapping the column in date() catches the timestamps but can't use an index
+        day_sales = sources('date(q.date)', ('2025-01-01', '2025-01-31'))[0]
+        before = [timed(lambda: text_sales.page(), repeat),
+                  timed(lambda: text_sales.summary("SUM(c5)", "COUNT(*)"), repeat),
+                  timed(lambda: text_pending.page(), repeat),
+                  timed(lambda: day_sales.summary("SUM(c5)", "COUNT(*)"), max(1, repeat // 5))]
+
+        with database.transaction() as conn:
+            start = time.perf_counter()
+            fixed, bad = normalize_column(conn, 'quotations', 'date')
+            backfill = time.perf_counter() - start
+            conn.execute("DROP INDEX idx_quotations_date")
+            conn.execute("ANALYZE")
+        print(f"backfill rewrote {fixed:,} dates ({bad} unreadable) in {backfill:.2f} s")
+
+        key_range = (20250101, 20250131)
+        key_sales, key_pending = sources('q.date_key', key_range, not_null=(1,))
+        found = key_sales.summary("COUNT(*)")[0]
+        print(f"January: text BETWEEN missed {missed:,} of {january:,} quotations; date_key finds {found:,}")
+
+        report(f"{quotations:,}: sales first page", before[0], timed(lambda: key_sales.page(), repeat))
+        report("sales summary (SUM, COUNT)", before[1],
+               timed(lambda: key_sales.summary("SUM(c5)", "COUNT(*)"), repeat))
+        report("pending first page", before[2], timed(lambda: key_pending.page(), repeat))
+        report("summary vs date(date) filter", before[3],
+               timed(lambda: key_sales.summary("SUM(c5)", "COUNT(*)"), repeat))
+
+
+EXPORT_SQL = '''
+    SELECT q.id, q.quote_no, q.date_key, c.name, q.subtotal, q.gst_amount, q.grand_total, q.status
+    FROM quotations q
+    LEFT JOIN customers c ON q.customer_id = c.id
+    WHERE q.date_key BETWEEN ? AND ?
+'''
+
+
+def _export_child(path, mode, target, limit, results):
+    """One export in a fresh process so its peak RSS is its own: (seconds, MB grown, rows)"""
+    from itertools import islice
+    import exporter
+    import pandas as pd
+    from date_keys import key_date
+    from virtual_grid import GridSource
+    database.configure(path)
+    source = GridSource(("Invoice #", "Date", "Customer", "Subtotal", "GST", "Total", "Status"), EXPORT_SQL,
+                        (20250101, 20251231), sort=1, descending=True,
+                        export_row=lambda r: (r[0], key_date(r[1])) + tuple(r[2:]),
+                        types=("TEXT", "TEXT", "TEXT", "REAL", "REAL", "REAL", "TEXT"))
+    try:
+        import resource
+        rss = lambda: resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        rss = lambda: float('nan')
+    try:
+        with database.connection() as conn:
+            # Keep SQLite's page cache and mmap out of the measurement: both are bounded anyway
+            conn.execute("PRAGMA mmap_size=0")
+            conn.execute("PRAGMA cache_size=-2000")
+            before = rss()
+            start = time.perf_counter()
+            batches = source.batches(conn=conn)
+            if limit:
+                batches = islice(batches, limit // exporter.BATCH_ROWS)
+            if mode == 'frame':
+                data = [row for batch in batches for row in batch]
+                pd.DataFrame(data, columns=source.headings).to_excel(target, index=False)
+                rows = len(data)
+            elif mode == 'platypus':
+                # The old report PDF: every row in one platypus Table
+                from reportlab.lib.pagesizes import A4, landscape
+                from reportlab.platypus import SimpleDocTemplate, Table
+                data = [list(source.headings)] + [list(map(str, r)) for batch in batches for r in batch]
+                SimpleDocTemplate(target, pagesize=landscape(A4)).build([Table(data, repeatRows=1)])
+                rows = len(data) - 1
+            else:
+                rows = exporter.export(target, source.headings, batches, types=source.types)
+        results.put((time.perf_counter() - start, rss() - before, rows))
+    except Exception as e:
+        results.put(e)
+    finally:
+        database.close()
+
+
+def _run_export(path, mode, target, limit=None):
+    spawn = multiprocessing.get_context('spawn')
+    results = spawn.Queue()
+    proc = spawn.Process(target=_export_child, args=(path, mode, target, limit, results))
+    proc.start()
+    result = results.get()
+    proc.join()
+    return result
+
+
+@benchmark('export')
+def bench_export(args):
+    """DataFrame.to_excel of a whole report versus streaming batches to XLSX, CSV and Parquet"""
+    import exporter
+    quotations = args.rows or 100_000
+    with temp_db(customers=20_000, quotations=quotations) as path:
+        out = tempfile.mkdtemp(prefix='cm_export_')
+        try:
+            print(f"{quotations:,} rows{'':<16} {'seconds':>9} {'peak +MB':>9}")
+            runs = [("DataFrame + to_excel", 'frame', 'frame.xlsx')]
+            runs += [(f"stream {ext}", 'stream', 'stream' + ext) for ext in exporter.WRITERS]
+            for label, mode, name in runs:
+                result = _run_export(path, mode, os.path.join(out, name))
+                if isinstance(result, Exception):
+                    print(f"{label:<28} skipped: {result}")
+                    continue
+                elapsed, grown, _ = result
+                print(f"{label:<28} {elapsed:9.2f} {grown:9.1f}")
+        finally:
+            shutil.rmtree(out)
+
+
+def _pdf_pages(path):
+    with open(path, 'rb') as f:
+        return len(re.findall(rb"/Type\s*/Page\b(?!s)", f.read()))
+
+
+@benchmark('report_pdf')
+def bench_report_pdf(args):
+    """One platypus Table holding the whole report versus the paged canvas renderer"""
+    quotations = args.rows or 100_000
+    with temp_db(customers=20_000, quotations=quotations) as path:
+        out = tempfile.mkdtemp(prefix='cm_pdf_')
+        try:
+            print(f"{'':<28} {'rows':>8} {'seconds':>9} {'peak +MB':>9} {'pages/s':>8}")
+            runs = [("platypus Table", 'platypus', 2000), ("platypus Table", 'platypus', 10_000),
+                    ("paged canvas", 'stream', 10_000), ("paged canvas", 'stream', None)]
+            for label, mode, limit in runs:
+                target = os.path.join(out, f"{mode}-{limit}.pdf")
+                result = _run_export(path, mode, target, limit)
+                if isinstance(result, Exception):
+                    raise SystemExit(f"{label} failed: {result!r}")
+                elapsed, grown, rows = result
+                pages = _pdf_pages(target)
+                print(f"{label:<28} {rows:8,} {elapsed:9.2f} {grown:9.1f} {pages / elapsed:8.1f}")
+        finally:
+            shutil.rmtree(out)
+
+
+@benchmark('batch_pdf')
+def bench_batch_pdf(args):
+    """One generate_quotation_pdf call per quotation versus bulk prefetch and a process pool"""
+    import batch_pdf
+    import pdf_cache
+    from pdf_generator import PDFGenerator
+    quotations = args.rows or 300
+    with temp_db(customers=500, quotations=quotations):
+        rnd = random.Random(7)
+        with database.transaction() as conn:
+            conn.executemany('''INSERT INTO quotation_items (quotation_id, item_name, quantity, unit, rate, amount)
+                                VALUES (?,?,?,?,?,?)''',
+                             ((q, f"Material {rnd.randrange(500)}", n, "piece", 100.0, n * 100.0)
+                              for q in range(1, quotations + 1) for n in range(1, 1 + rnd.randrange(5, 25))))
+        ids = list(range(1, quotations + 1))
+        out = tempfile.mkdtemp(prefix='cm_batch_')
+        try:
+            # Every run below starts from an empty PDF cache, so every document is rendered
+            pdf_cache.configure(os.path.join(out, 'cache-one'))
+            # What re-issuing from the Quotation window costs: a generator and two queries per document
+            start = time.perf_counter()
+            for i in ids:
+                PDFGenerator().generate_quotation_pdf(i, os.path.join(out, f"one-{i}.pdf"))
+            one_by_one = time.perf_counter() - start
+            print(f"{'one by one':<28} {quotations / one_by_one:8.1f} docs/s")
+            start = time.perf_counter()
+            with database.connection() as conn:
+                batch_pdf.prefetch(conn, ids)
+            print(f"{'bulk prefetch':<28} {(time.perf_counter() - start) * 1e3:8.1f} ms for {quotations} quotations")
+            for workers in sorted({1, batch_pdf.WORKERS}):
+                pdf_cache.configure(os.path.join(out, f'cache-{workers}'))
+                result = batch_pdf.render_batch(ids, os.path.join(out, f"pool-{workers}"), workers)
+                if len(result.rendered) != quotations or result.failed:
+                    raise SystemExit(f"{workers} workers rendered {len(result.rendered)}, failed {result.failed[:1]}")
+                print(f"{f'process pool, {workers} workers':<28} {result.docs_per_second:8.1f} docs/s "
+                      f"(x{result.docs_per_second * one_by_one / quotations:.1f})")
+            # Month-end re-issue of unchanged quotations: copies out of the warm cache
+            result = batch_pdf.render_batch(ids, os.path.join(out, "reissue"), batch_pdf.WORKERS)
+            print(f"{'re-issue, unchanged':<28} {result.docs_per_second:8.1f} docs/s "
+                  f"(x{result.docs_per_second * one_by_one / quotations:.1f}), "
+                  f"{result.cached} of {quotations} from the PDF cache")
+        finally:
+            pdf_cache.configure(pdf_cache.CACHE_DIR)
+            shutil.rmtree(out)
+
+
+@benchmark('pdf_templates')
+def bench_pdf_templates(args):
+    """Quotation PDF render time with styles and static blocks rebuilt (cold) versus cached (warm)"""
+    import io
+    import pdf_templates
+    from pdf_generator import PDFGenerator
+    items = [{'item_name': f"Material {i}", 'name': f"Material {i}", 'quantity': 1.0 + i % 7, 'unit': "piece",
+              'rate': 125.0, 'amount': 125.0 * (1 + i % 7)} for i in range(12)]
+    quote = {'id': 1, 'quote_no': "QT-20251018-0001", 'date': "2025-10-18", 'subtotal': 5000.0,
+             'gst_amount': 900.0, 'grand_total': 5900.0, 'customer_name': "Customer 1",
+             'customer_phone': "9000000001", 'customer_address': "12, MG Road, Pune", 'customer_gstin': "",
+             'items': items}
+    repeat = max(20, args.repeat // 5)
+
+    def cold(render):
+        # What every document paid before: a new stylesheet and fresh static blocks
+        pdf_templates.styles.cache_clear()
+        pdf_templates._block.cache_clear()
+        render(PDFGenerator())
+
+    generator = PDFGenerator()
+    for label, render in (("generate_quotation_pdf", lambda g: g.render_quotation_pdf(quote, io.BytesIO())),
+                          ("..._from_dict (AI quote)",
+                           lambda g: g.render_ai_quotation_pdf(quote, io.BytesIO()))):
+        render(generator)
+        report(label, timed(lambda: cold(render), repeat), timed(lambda: render(generator), repeat))
+
+
+@benchmark('pdf_cache')
+def bench_pdf_cache(args):
+    """Re-rendering unchanged quotation PDFs versus serving them from the content-hash cache"""
+    import pdf_cache
+    from pdf_generator import PDFGenerator
+    quotations = args.rows or 100
+    with temp_db(customers=100, quotations=quotations):
+        with database.transaction() as conn:
+            conn.executemany('''INSERT INTO quotation_items (quotation_id, item_name, quantity, unit, rate, amount)
+                                VALUES (?,?,?,?,?,?)''',
+                             ((q, f"Material {n}", n, "piece", 100.0, n * 100.0)
+                              for q in range(1, quotations + 1) for n in range(1, 13)))
+        out = tempfile.mkdtemp(prefix='cm_pdfcache_')
+        try:
+            store = pdf_cache.configure(os.path.join(out, 'cache'))
+            target = os.path.join(out, 'quotation.pdf')
+            generator = PDFGenerator()
+
+            def issue_all():
+                for i in range(1, quotations + 1):
+                    if not generator.generate_quotation_pdf(i, target):
+                        raise SystemExit(f"quotation {i} failed")
+
+            report(f"{quotations} quotations, per PDF", timed(issue_all, 1) / quotations,
+                   timed(issue_all, 3) / quotations)
+            limit = store.stats()['bytes'] // 4
+            small = pdf_cache.configure(os.path.join(out, 'small'), limit)
+            issue_all()
+            print(f"limit {limit / 1024:.0f} KB keeps {small.stats()['files']} of {quotations} PDFs")
+
+            # Every put re-lists the directory before evicting (other processes write there too)
+            full = pdf_cache.PDFCache(os.path.join(out, 'full'))
+            os.makedirs(full.root)
+            for i in range(5000):
+                with open(full._path(f"{i:064x}"), 'wb') as f:
+                    f.write(b'%PDF')
+            full._load()
+            print(f"directory re-sync at 5,000 PDFs: {timed(full._sync, 20) * 1e3:.1f} ms per put")
+        finally:
+            pdf_cache.configure(pdf_cache.CACHE_DIR)
+            shutil.rmtree(out)
+
+
+class _EventLoop:
+    """Just enough of Tk's after() to drive PDFJob polling and measure stalls"""
+
+    def __init__(self):
+        self.timers = []
+        self.longest = 0.0
+
+    def after(self, ms, fn):
+        heapq.heappush(self.timers, (time.perf_counter() + ms / 1000, id(fn), fn))
+
+    def run(self, until, tick_ms=10):
+        """Run timers plus a tick every tick_ms until until() is true; longest gap between ticks"""
+        self.longest, last = 0.0, time.perf_counter()
+        while not until():
+            now = time.perf_counter()
+            self.longest = max(self.longest, now - last)
+            last = now
+            while self.timers and self.timers[0][0] <= now:
+                heapq.heappop(self.timers)[2]()
+            time.sleep(tick_ms / 1000)
+        return self.longest
+
+
+@benchmark('pdf_jobs')
+def bench_pdf_jobs(args):
+    """AI-quote PDFs rendered on the Tk thread versus the worker-process job queue"""
+    import pdf_cache
+    import pdf_jobs
+    from pdf_generator import PDFGenerator
+    count = args.rows or 20
+    items = [{'name': f"Material {i}", 'quantity': 1.0 + i % 7, 'unit': "piece", 'rate': 125.0,
+              'amount': 125.0 * (1 + i % 7)} for i in range(40)]
+    quotes = [{'quote_no': f"AI-20251018-{n:04d}", 'date': "18-Oct-2025", 'customer_name': f"Customer {n}",
+               'customer_phone': "", 'customer_address': "", 'customer_gstin': "", 'subtotal': 20000.0,
+               'gst_amount': 3600.0, 'grand_total': 23600.0, 'items': items} for n in range(count)]
+    out = tempfile.mkdtemp(prefix='cm_jobs_')
+    try:
+        pdf_cache.configure(os.path.join(out, 'cache'))
+        loop = _EventLoop()
+        # Before: each click rendered inside the event loop callback
+        pending = list(quotes)
+
+        def render_next():
+            q = pending.pop()
+            PDFGenerator().generate_quotation_pdf_from_dict(q, os.path.join(out, q['quote_no'] + '.pdf'))
+            if pending:
+                loop.after(0, render_next)
+        loop.after(0, render_next)
+        start = time.perf_counter()
+        blocked = loop.run(lambda: not pending)
+        inline = time.perf_counter() - start
+
+        pdf_cache.configure(os.path.join(out, 'jobs-cache'))
+        queue = pdf_jobs.PDFJobQueue()
+        try:
+            # Start the workers first; spawning them is a one-off cost per session
+            warm = queue.submit(loop, 'ai_quote', quotes[0], os.path.join(out, 'warm.pdf'))
+            loop.run(lambda: warm.finished)
+            done, failed = [], []
+            start = time.perf_counter()
+            for q in quotes:
+                queue.submit(loop, 'ai_quote', dict(q, quote_no=q['quote_no'] + 'J'),
+                             os.path.join(out, q['quote_no'] + '-job.pdf'), done.append, failed.append)
+            # The burst of submits runs on the Tk thread too, so it counts as a stall
+            burst = time.perf_counter() - start
+            stalled = max(burst, loop.run(lambda: len(done) + len(failed) == count))
+            queued = time.perf_counter() - start
+        finally:
+            queue.shutdown()
+        if failed:
+            raise SystemExit(f"{len(failed)} jobs failed: {failed[0]!r}")
+        print(f"{'':<28} {'seconds':>9} {'docs/s':>8} {'longest UI stall ms':>20}")
+        print(f"{'on the event loop':<28} {inline:9.2f} {count / inline:8.1f} {blocked * 1e3:20.1f}")
+        print(f"{f'job queue, {queue.workers} workers':<28} {queued:9.2f} {count / queued:8.1f} "
+              f"{stalled * 1e3:20.1f}")
+        print(f"({queue.in_flight} jobs in the pool at once, {os.cpu_count()} CPUs; submitting {count} "
+              f"took {burst * 1e3:.1f} ms)")
+    finally:
+        pdf_cache.configure(pdf_cache.CACHE_DIR)
+        shutil.rmtree(out)
+
+
+# Other trades as rows: what adding plumbing and civil work looks like now
+TRADE_RULES = [
+    (trade, f"{trade} {thing}", f"{thing},{thing}s", f"{thing},{thing}s", 1, '', 1,
+     [(f"{thing.title()} ({trade})", thing, "piece", 100.0 + i, 1, None, 0, '')])
+    for trade, things in (('plumbing', ["tap", "basin", "wc", "flush tank", "cpvc pipe", "upvc pipe", "valve",
+                                        "geyser", "shower", "sink", "floor trap", "water tank", "pump",
+                                        "elbow", "tee", "bib cock", "angle cock", "health faucet"]),
+                          ('civil', ["brick", "cement bag", "sand", "tile", "putty", "paint", "plaster",
+                                     "door", "window", "grill", "granite", "marble", "false ceiling",
+                                     "waterproofing", "skirting", "chajja", "lintel", "parapet"]))
+    for i, thing in enumerate(things)
+]
+
+
+def _keyword_scans(rules, d):
+    """The old technique (a substring test and a regex pass per keyword) over rule data"""
+    total = 0
+    for rule in rules:
+        if rule.triggers and not any(k in d for k in rule.triggers):
+            continue
+        total += sum(int(x) for k in rule.qty_keywords for x in re.findall(r'(\d+)\s*' + re.escape(k), d))
+    return total
+
+
+@benchmark('ai_rules')
+def bench_ai_rules(args):
+    """Hard-coded keyword if-chain versus the compiled, data-driven rule engine"""
+    import ai_rules
+    rnd = random.Random(11)
+    with temp_db(customers=10, quotations=0):
+        with database.connection() as conn:
+            rules, synonyms = ai_rules.load_rules(conn)
+        seeded = ai_rules.RuleEngine(rules, synonyms)
+        repeat = max(5, args.repeat // 20)
+        for rooms in (5, 50, 500):
+            d = project_description(rnd, rooms)
+            report(f"{rooms} rooms ({len(d) // 1000 or 1}k chars)", timed(lambda: legacy_ai_lines(d.lower()), repeat),
+                   timed(lambda: seeded.evaluate(d), repeat))
+
+        with database.transaction() as conn:
+            ai_rules.seed(conn, TRADE_RULES, [])
+        trades = ai_rules.engine()
+        with database.connection() as conn:
+            raw_rules = ai_rules.load_rules(conn)[0]
+        d = project_description(rnd, 500).lower()
+        print(f"{len(trades.rules)} rules, {len(trades.keywords)} keywords after adding plumbing and civil rows")
+        report("500 rooms, all trades", timed(lambda: _keyword_scans(raw_rules, d), repeat),
+               timed(lambda: trades.evaluate(d), repeat))
+
+
+@benchmark('ai_pricing')
+def bench_ai_pricing(args):
+    """A materials query per generated line versus pricing from the shared catalogue"""
+    import ai_rules
+    rnd = random.Random(12)
+    with temp_db(customers=10, quotations=0):
+        with database.transaction() as conn:
+            conn.execute('''INSERT INTO materials (name, category, default_unit, default_rate, default_gst)
+                            SELECT material, 'Electrical', unit, MAX(rate) * 1.1,
+                                   CASE WHEN material LIKE '%Labour%' THEN 0.0 ELSE 18.0 END
+                            FROM ai_rule_lines GROUP BY material''')
+
+        def per_line_queries(lines):
+            priced = []
+            for line in lines:
+                row = database.fetch_one("SELECT default_unit, default_rate, default_gst FROM materials WHERE name = ?",
+                                         (line.name,))
+                priced.append(line if row is None else line._replace(unit=row[0] or line.unit,
+                                                                     rate=row[1] or line.rate, gst=row[2]))
+            return priced
+
+        engine = ai_rules.engine()
+        for rooms in (1, 20, 200):
+            lines = engine.evaluate(project_description(rnd, rooms))
+            report(f"{len(lines)} lines ({rooms} rooms)", timed(lambda: per_line_queries(lines), args.repeat),
+                   timed(lambda: ai_rules.price(lines), args.repeat))
+
+        # A rate edited in the materials screen applies to the next quote, no restart
+        d = "12 lights and 4 fans"
+        fan = next(line for line in ai_rules.generate_lines(d) if line.name == "Ceiling Fan")
+        with database.transaction() as conn:
+            conn.execute("UPDATE materials SET default_rate = ? WHERE name = ?", (fan.rate + 250, "Ceiling Fan"))
+        updated = next(line for line in ai_rules.generate_lines(d) if line.name == "Ceiling Fan")
+        labour = next(line for line in ai_rules.generate_lines(d) if line.name == "Electrical Labour")
+        print(f"Ceiling Fan Rs. {fan.rate:,.2f} -> Rs. {updated.rate:,.2f} on the next generation; "
+              f"labour GST {labour.gst:g}%")
+
+
+class _Tree:
+    """Just enough of ttk.Treeview to count the row work an editor does"""
+
+    def __init__(self):
+        self.rows = {}
+        self.writes = 0
+        self._auto = 0
+
+    def insert(self, parent, index, iid=None, values=()):
+        if iid is None:
+            self._auto += 1
+            iid = f"I{self._auto:03X}"
+        self.rows[iid] = tuple(str(v) for v in values)
+        self.writes += 1
+        return iid
+
+    def item(self, iid, values=None):
+        if values is None:
+            return {'values': self.rows[iid]}
+        self.rows[iid] = tuple(str(v) for v in values)
+        self.writes += 1
+
+    def delete(self, *iids):
+        for iid in iids:
+            del self.rows[iid]
+        self.writes += len(iids)
+
+    def get_children(self):
+        return tuple(self.rows)
+
+
+def _boq(rnd, n):
+    """n distinct (material, rate) lines plus 10% repeats of earlier ones"""
+    lines = [(f"Material {i // 3}", "", rnd.randint(1, 50), "piece", 10.0 * (1 + i % 3), 0.0 if i % 7 else 18.0)
+             for i in range(n)]
+    return lines + rnd.sample(lines, n // 10)
+
+
+@benchmark('line_items')
+def bench_line_items(args):
+    """List scan and full tree rebuild per change versus the indexed line model"""
+    from ai_quote_generator import AIQuoteGenerator
+    from line_items import QuoteLines
+    row_values = AIQuoteGenerator.row_values
+    rnd = random.Random(13)
+
+    # The editor as it was: merge by scanning, rebuild every row, re-sum the list
+    def old_add(items, tree, name, desc, qty, unit, rate, gst):
+        for item in items:
+            if item['name'] == name and item['rate'] == rate:
+                item['quantity'] += qty
+                item['amount'] = item['quantity'] * rate
+                old_refresh(items, tree)
+                return
+        items.append({'name': name, 'description': desc, 'quantity': qty, 'unit': unit,
+                      'rate': rate, 'amount': qty * rate, 'gst': gst})
+        tree.insert("", "end", values=row_values(items[-1]))
+
+    def old_refresh(items, tree):
+        tree.delete(*tree.get_children())
+        for it in items:
+            tree.insert("", "end", values=row_values(it))
+
+    def old_edit(items, tree, iid, qty):
+        name = tree.item(iid)['values'][0].strip()
+        item = [it for it in items if it['name'].startswith(name)][0]
+        item['quantity'] = qty
+        item['amount'] = qty * item['rate']
+        old_refresh(items, tree)
+        return sum(i['amount'] for i in items), sum(i['amount'] * i['gst'] / 100 for i in items)
+
+    def new_add(model, tree, name, desc, qty, unit, rate, gst):
+        slot, created = model.merge(name, unit, qty, rate, gst, desc)
+        if created:
+            tree.insert("", "end", iid=str(slot), values=row_values(model.row(slot)))
+        else:
+            tree.item(str(slot), values=row_values(model.row(slot)))
+
+    def new_edit(model, tree, iid, qty):
+        slot = model.update(int(iid), quantity=qty)
+        tree.item(str(slot), values=row_values(model.row(slot)))
+        return model.subtotal, model.gst_amount
+
+    for n in (200, 2000):
+        boq = _boq(rnd, n)
+        old_items, old_tree = [], _Tree()
+        before = timed(lambda: [old_add(old_items, old_tree, *line) for line in boq] and None, 1)
+        model, new_tree = QuoteLines(), _Tree()
+        after = timed(lambda: [new_add(model, new_tree, *line) for line in boq] and None, 1)
+        report(f"build {n}-line BOQ", before, after)
+        print(f"{'':<28} row writes {old_tree.writes:>10,}          {new_tree.writes:>10,}")
+
+        # Edits of random rows, with the totals the window shows after each
+        iids_new = list(new_tree.rows)
+        picks = [(rnd.randrange(len(iids_new)), rnd.randint(100, 999)) for _ in range(50)]
+        before = timed(lambda: [old_edit(old_items, old_tree, old_tree.get_children()[i], q) for i, q in picks],
+                       1) / len(picks)
+        after = timed(lambda: [new_edit(model, new_tree, iids_new[i], q) for i, q in picks], 1) / len(picks)
+        report(f"edit one of {len(iids_new)} lines", before, after)
+        # The same material at three rates: matching on the row's name edited the first of them
+        wrong = sum(1 for old, iid in zip(old_items, new_tree.rows) if old['quantity'] != model.quantity[int(iid)])
+        print(f"{'':<28} name matching left {wrong} lines wrong")
+
+
+@benchmark('quote_lines')
+def bench_quote_lines(args):
+    """Totals parsed back out of every Treeview row versus per-GST-slab running sums"""
+    import math
+    from line_items import QuoteLines
+    rnd = random.Random(14)
+
+    def parsed_totals(tree):
+        subtotal = gst_total = 0.0
+        for child in tree.get_children():
+            values = tree.item(child)['values']
+            amount = float(values[6])
+            subtotal += amount
+            gst_total += amount * float(values[5].replace('%', '')) / 100
+        return subtotal, gst_total
+
+    for n in (100, 2000):
+        lines, tree = QuoteLines(), _Tree()
+        for i in range(n):
+            slot = lines.add(f"Material {i}", "piece", rnd.randint(1, 40) / 4, rnd.uniform(10, 5000),
+                             rnd.choice((0.0, 5.0, 12.0, 18.0, 28.0)))
+            tree.insert("", "end", iid=str(slot), values=(i + 1, lines.names[slot], "piece",
+                                                          f"{lines.quantity[slot]:.2f}", f"{lines.rate[slot]:.2f}",
+                                                          f"{lines.gst[slot]:g}%", f"{lines.amount(slot):.2f}"))
+        # Churn: edits, removals and re-adds, totals read after each as the window does
+        for _ in range(500):
+            slot = int(rnd.choice(tree.get_children()))
+            if rnd.random() < 0.2:
+                lines.remove(slot)
+                tree.delete(str(slot))
+                slot = lines.add("Custom Item", "piece", 1.0, 100.0, 18.0)
+                tree.insert("", "end", iid=str(slot), values=(0, "", "", "", "", "18%", "100.00"))
+            else:
+                lines.update(slot, quantity=rnd.randint(1, 40) / 4, gst=rnd.choice((5.0, 18.0)))
+            tree.item(str(slot), values=tree.item(str(slot))['values'][:3] + (
+                f"{lines.quantity[slot]:.2f}", f"{lines.rate[slot]:.2f}", f"{lines.gst[slot]:g}%",
+                f"{lines.amount(slot):.2f}"))
+        live = [int(iid) for iid in tree.get_children()]
+        exact = math.fsum(lines.amount(s) for s in live)
+        parsed = parsed_totals(tree)
+        report(f"totals over {n} lines", timed(lambda: parsed_totals(tree), args.repeat // 10),
+               timed(lambda: (lines.subtotal, lines.gst_amount), args.repeat))
+        print(f"{'':<28} parsed from 2-decimal text: off by Rs. {abs(parsed[0] - exact):.4f} on the subtotal; "
+              f"{len(lines.slabs())} GST slabs")
+
+
+@benchmark('ai_batch')
+def bench_ai_batch(args):
+    """One AI quotation at a time, as the window does, versus ai_batch's bulk stages"""
+    import ai_batch
+    import ai_rules
+    rnd = random.Random(15)
+    flats = args.rows or 200
+    with temp_db(customers=flats, quotations=0):
+        rows = [ai_batch.BatchRow(i + 2, f"Customer {i}", project_description(rnd, rnd.randint(2, 5)))
+                for i in range(flats)]
+
+        def one_by_one():
+            for row in rows:
+                customer_id = database.fetch_one("SELECT id FROM customers WHERE name = ?", (row.customer,))[0]
+                save_quotation(ai_batch.quotation(customer_id, ai_rules.generate_lines(row.description)))
+
+        # Every run starts cold: the generation cache would otherwise replay the previous one
+        ai_rules.generation_cache().clear()
+        before = timed(one_by_one, 1)
+        print(f"{flats} flats one at a time      {before:6.2f} s   ({flats / before:6.1f} quotes/s)")
+        for label, workers in (("in-process", 0), (f"{ai_batch.WORKERS}-worker pool", ai_batch.WORKERS)):
+            ai_rules.generation_cache().clear()
+            result = ai_batch.run_batch(rows, workers, pool_min=0)
+            if len(result.saved) != flats or result.failed:
+                raise SystemExit(f"batch saved {len(result.saved)} of {flats}: {result.failed[:3]}")
+            stages = ", ".join(f"{k} {v * 1000:.0f} ms" for k, v in result.timings.items())
+            print(f"ai_batch, {label:<18} {result.seconds:6.2f} s   "
+                  f"({result.quotes_per_second:6.1f} quotes/s)   {stages}")
+        print(f"({os.cpu_count()} CPU(s); ai_batch uses the pool from --pool-min={ai_batch.POOL_MIN} rows)")
+
+
+# Items contractors habitually add next to a generated line: (with, item, unit, rate, qty per unit, chance)
+HABITS = [
+    ("Ceiling Fan", "Fan Hook Box", "piece", 60.0, 1.0, 0.8),
+    ("LED Panel Light 18W", "Concealed Light Box", "piece", 40.0, 1.0, 0.7),
+    ("1.5 sq.mm Copper Wire", "PVC Casing 25mm", "meter", 22.0, 0.5, 0.7),
+    ("15A Socket", "Socket Cover Plate", "piece", 35.0, 1.0, 0.6),
+    ("6A MCB", "Earthing Kit", "set", 1800.0, 0.25, 0.5),
+]
+
+
+def _history(rnd, quotations, templates=2000):
+    """(description, [(item, qty, unit, rate)]) per past quotation: rule lines plus habitual extras"""
+    import ai_rules
+    engine = ai_rules.engine()
+    shapes = []
+    for _ in range(templates):
+        d = project_description(rnd, rnd.randint(1, 3))
+        items = [(l.name, l.quantity, l.unit, l.rate) for l in engine.evaluate(d)]
+        quantities = {name: qty for name, qty, _, _ in items}
+        for with_item, item, unit, rate, per, chance in HABITS:
+            if with_item in quantities and rnd.random() < chance:
+                items.append((item, max(1, round(quantities[with_item] * per)), unit, rate))
+        shapes.append((d, items))
+    return [shapes[rnd.randrange(templates)] for _ in range(quotations)]
+
+
+@benchmark('ai_suggest')
+def bench_ai_suggest(args):
+    """Suggestions from past quotations: a pure-Python TF-IDF scan versus the NumPy index"""
+    import math
+    import ai_suggest
+    rnd = random.Random(16)
+    quotations = args.rows or 100000
+    with temp_db(customers=100, quotations=0) as path:
+        history = _history(rnd, quotations)
+        conn = sqlite3.connect(path, isolation_level=None)
+        conn.execute("BEGIN")
+        conn.executemany("INSERT INTO quotations (id, quote_no, date, customer_id, description) VALUES (?,?,?,?,?)",
+                         ((i + 1, f"QT-H-{i:07d}", "2024-06-01", 1 + i % 100, d)
+                          for i, (d, _) in enumerate(history)))
+        conn.executemany('''INSERT INTO quotation_items (quotation_id, item_name, quantity, unit, rate, amount)
+                            VALUES (?,?,?,?,?,?)''',
+                         ((i + 1, name, qty, unit, rate, qty * rate)
+                          for i, (_, items) in enumerate(history) for name, qty, unit, rate in items))
+        conn.execute("COMMIT")
+        conn.close()
+
+        start = time.perf_counter()
+        index = ai_suggest.index()
+        built = time.perf_counter() - start
+        pairs = len(index.pairs[1])
+        print(f"{quotations:,} past quotations indexed in {built:.2f} s "
+              f"({len(index.terms)} terms, {len(index.item_names)} items, {pairs} item pairs)")
+
+        # What this would be without the index: tokenize and score every description per query
+        docs = []
+        for d, items in history[:5000]:
+            words = re.findall(r'[a-z]{2,}', (d + ' ' + ' '.join(i[0] for i in items)).lower())
+            docs.append({w: words.count(w) for w in set(words)})
+        df = {}
+        for doc in docs:
+            for w in doc:
+                df[w] = df.get(w, 0) + 1
+
+        def scan(query):
+            q = {w: 1 + math.log(c) for w, c in
+                 ((w, query.count(w)) for w in set(re.findall(r'[a-z]{2,}', query.lower())))}
+            scored = []
+            for n, doc in enumerate(docs):
+                dot = sum(q[w] * (1 + math.log(doc[w])) * math.log(len(docs) / df[w]) ** 2 for w in q if w in doc)
+                scored.append((dot, n))
+            return sorted(scored, reverse=True)[:ai_suggest.NEIGHBOURS]
+
+        query = "3 bhk flat: 12 led lights, 5 fans, 10 sockets, wiring 150 meter wire, new mcb, area 1200 sqft"
+        lines = __import__('ai_rules').generate_lines(query)
+        per_doc = timed(lambda: scan(query), 3) / len(docs)
+        report(f"nearest of {quotations // 1000}k quotes", per_doc * quotations,
+               timed(lambda: index.nearest(query), 50))
+        after = timed(lambda: index.suggest(query, lines), 50)
+        print(f"{'suggest (nearest + pairs)':<28} {after * 1000:8.2f} ms   (scan timed on 5,000 quotes, scaled)")
+
+        neighbours, suggestions = index.suggest(query, lines)
+        for s in suggestions[:6]:
+            print(f"  {s.line.name:<22} x{s.line.quantity:<5} Rs. {s.line.rate:>8,.2f}   {s.score:.2f}  {s.reason}")
+
+        # New quotations land in the delta without a full rebuild
+        with database.transaction() as conn:
+            for _ in range(100):
+                insert_quotation(conn, Quotation(customer_id=1, description="10 geysers and 10 solar heaters",
+                                         items=[QuotationItem("Solar Water Heater", 10, 25000.0)]))
+        start = time.perf_counter()
+        index = ai_suggest.index()
+        print(f"100 new quotations picked up in {(time.perf_counter() - start) * 1000:.1f} ms "
+              f"(builds: {index.builds}); top match for 'solar heaters': quotation "
+              f"{index.nearest('solar heaters', 1)[0].quotation_id}")
+
+
+@benchmark('ai_memo')
+def bench_ai_memo(args):
+    """Re-parsing and re-pricing every generation versus the normalized-description LRU"""
+    import ai_rules
+    from diagnostics_window import cache_rows
+    rnd = random.Random(17)
+    with temp_db(customers=10, quotations=0):
+        with database.transaction() as conn:
+            conn.execute('''INSERT INTO materials (name, category, default_unit, default_rate, default_gst)
+                            SELECT material, 'Electrical', unit, MAX(rate), 18.0
+                            FROM ai_rule_lines GROUP BY material''')
+        # A few dozen templates, retyped with different case and spacing, reused unevenly
+        templates = [project_description(rnd, rnd.randint(1, 4)) for _ in range(40)]
+        typed = [re.sub(' ', '  ' if rnd.random() < 0.3 else ' ', t.upper() if rnd.random() < 0.2 else t)
+                 for t in templates]
+        requests = [typed[min(int(rnd.paretovariate(1.2)) - 1, len(typed) - 1)] for _ in range(2000)]
+
+        def uncached():
+            for d in requests:
+                ai_rules.price(ai_rules.engine().evaluate(d))
+
+        def cached():
+            for d in requests:
+                ai_rules.generate_lines(d)
+
+        memo = ai_rules.generation_cache()
+        memo.clear()
+        memo.hits = memo.misses = 0
+        report(f"{len(requests)} generations", timed(uncached, 3) / len(requests),
+               timed(cached, 3) / len(requests))
+
+        for row in cache_rows()[:1]:
+            print(f"{row[0]}: {row[1]:,} hits, {row[2]:,} misses, {row[3]:.1%} hit ratio, {row[4]} entries; {row[5]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ContractorMitra benchmarks")
+    parser.add_argument('name', choices=sorted(BENCHMARKS) + ['all'])
+    parser.add_argument('--repeat', type=int, default=500)
+    parser.add_argument('--rows', type=int, default=None)
+    args = parser.parse_args(argv)
+    names = sorted(BENCHMARKS) if args.name == 'all' else [args.name]
+    for name in names:
+        print(f"== {name}: {BENCHMARKS[name].__doc__}")
+        BENCHMARKS[name](args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
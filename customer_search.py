@@ -0,0 +1,55 @@
+"""
+CUSTOMER SEARCH - ContractorMitra
+Substring search over name, phone, email and GSTIN backed by the customers_fts trigram index;
+shorter input falls back to an indexed name / phone prefix match
+"""
+
+import database
+
+PAGE_SIZE = 200
+MIN_TRIGRAM = 3        # trigram index needs at least three characters per term
+
+COLUMNS = "c.id, c.name, c.phone, c.email, c.gstin, c.created_date"
+
+
+def fts_query(term):
+    """Each whitespace-separated word becomes a quoted substring; all must match"""
+    words = term.split()
+    return " AND ".join('"' + w.replace('"', '""') + '"' for w in words)
+
+
+def search_query(term, limit=PAGE_SIZE):
+    """(sql, params, ordered) behind search_customers; unordered pages are sorted by name afterwards"""
+    term = term.strip()
+    if not term:
+        return f"SELECT {COLUMNS} FROM customers c ORDER BY c.name LIMIT ?", (limit,), True
+
+    words = [w for w in term.split() if len(w) >= MIN_TRIGRAM]
+    if words:
+        # Take the first page in index order, then sort just that page
+        return f'''
+            SELECT {COLUMNS}
+            FROM customers_fts f
+            JOIN customers c ON c.id = f.rowid
+            WHERE customers_fts MATCH ?
+            LIMIT ?
+        ''', (fts_query(" ".join(words)), limit), False
+
+    # One- and two-letter input: name (or phone) prefix through an index
+    if term.isdigit():
+        return (f"SELECT {COLUMNS} FROM customers c WHERE c.phone GLOB ? ORDER BY c.phone LIMIT ?",
+                (term + "*", limit), True)
+    like = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return f'''
+        SELECT {COLUMNS} FROM customers c
+        WHERE c.name LIKE ? ESCAPE '\\'
+        ORDER BY c.name COLLATE NOCASE
+        LIMIT ?
+    ''', (like, limit), True
+
+
+def search_customers(term, limit=PAGE_SIZE):
+    """Top `limit` customers matching `term`, ordered by name"""
+    sql, params, ordered = search_query(term, limit)
+    rows = database.fetch_all(sql, params)
+    return rows if ordered else sorted(rows, key=lambda r: (r[1] or "", r[0]))
@@ -6,8 +6,40 @@ Version: 3.0.0 (Clean UI Edition)
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
 from datetime import datetime
+import database
+from customer_search import search_customers
+from virtual_grid import GridSource, VirtualGrid
+
+SEARCH_DELAY_MS = 150      # debounce between the last keystroke and the query
+CUSTOMER_COLUMNS = ("ID", "Name", "Phone", "Email", "GSTIN", "Added Date")
+
+
+def format_customer(customer):
+    """Treeview values for an (id, name, phone, email, gstin, created_date) row"""
+    # Format date if exists
+    date = customer[5] if customer[5] else "-"
+    if date != "-":
+        try:
+            date_obj = datetime.strptime(date, '%Y-%m-%d %H:%M:%S')
+            date = date_obj.strftime('%d-%b-%Y')
+        except:
+            pass
+    return (
+        customer[0],
+        customer[1],
+        customer[2] or "-",
+        customer[3] or "-",
+        customer[4] or "-",
+        date
+    )
+
+
+def customers_source():
+    """Every customer, by name unless re-sorted"""
+    return GridSource(CUSTOMER_COLUMNS, "SELECT id, id, name, phone, email, gstin, created_date FROM customers",
+                      sort=1, format_row=format_customer)
+
 
 class ModernStyle:
     """Modern Apple-like style constants"""
@@ -36,6 +68,7 @@ class CustomerWindow:
     def __init__(self, parent, mode='view'):
         self.parent = parent
         self.mode = mode
+        self.search_job = None
         self.window = tk.Toplevel(parent)
         self.window.title("Customer Management - ContractorMitra")
         self.window.geometry("1000x650")
@@ -198,7 +231,7 @@ class CustomerWindow:
         style.map("Treeview", background=[("selected", ModernStyle.ACCENT_BLUE)])
         
         # Treeview
-        columns = ("ID", "Name", "Phone", "Email", "GSTIN", "Added Date")
+        columns = CUSTOMER_COLUMNS
         self.tree = ttk.Treeview(parent, columns=columns, show="headings", 
                                  height=15, style="Treeview")
         
@@ -210,7 +243,7 @@ class CustomerWindow:
         
         # Scrollbar
         scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.grid = VirtualGrid(self.tree, scrollbar)
         
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -302,54 +335,29 @@ class CustomerWindow:
         close_btn.pack(side=tk.LEFT, padx=5)
     
     def load_customers(self):
-        """Load customers into treeview"""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
+        """Load customers into treeview, one page at a time as the list scrolls"""
         try:
-            conn = sqlite3.connect('contractormitra.db')
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, name, phone, email, gstin, created_date FROM customers ORDER BY name")
-            customers = cursor.fetchall()
-            conn.close()
-            
-            for customer in customers:
-                # Format date if exists
-                date = customer[5] if customer[5] else "-"
-                if date != "-":
-                    try:
-                        date_obj = datetime.strptime(date, '%Y-%m-%d %H:%M:%S')
-                        date = date_obj.strftime('%d-%b-%Y')
-                    except:
-                        pass
-                
-                self.tree.insert("", "end", values=(
-                    customer[0],
-                    customer[1],
-                    customer[2] or "-",
-                    customer[3] or "-",
-                    customer[4] or "-",
-                    date
-                ))
+            self.grid.load(customers_source())
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load customers: {str(e)}")
     
     def on_search(self, event=None):
-        """Search customers"""
-        search_term = self.search_var.get().lower()
-        
-        # Reload all
-        self.load_customers()
-        
+        """Search customers once typing pauses"""
+        if self.search_job is not None:
+            self.window.after_cancel(self.search_job)
+        self.search_job = self.window.after(SEARCH_DELAY_MS, self.run_search)
+    
+    def run_search(self):
+        """Show the first page of customers matching the search box"""
+        self.search_job = None
+        search_term = self.search_var.get().strip()
         if not search_term:
+            self.load_customers()
             return
-        
-        # Filter in treeview
-        for item in self.tree.get_children():
-            values = self.tree.item(item)['values']
-            if not any(search_term in str(v).lower() for v in values[1:4]):  # Search in name, phone, email
-                self.tree.delete(item)
+        try:
+            self.grid.set_rows(search_customers(search_term), format_customer)
+        except Exception as e:
+            messagebox.showerror("Error", f"Search failed: {str(e)}")
     
     def save_customer(self):
         """Save new customer"""
@@ -361,10 +369,7 @@ class CustomerWindow:
             return
         
         try:
-            conn = sqlite3.connect('contractormitra.db')
-            cursor = conn.cursor()
-            
-            cursor.execute('''
+            database.execute('''
                 INSERT INTO customers (name, phone, email, gstin, address)
                 VALUES (?, ?, ?, ?, ?)
             ''', (
@@ -375,9 +380,6 @@ class CustomerWindow:
                 self.entries['address'].get("1.0", tk.END).strip() if 'address' in self.entries else ''
             ))
             
-            conn.commit()
-            conn.close()
-            
             messagebox.showinfo("Success", f"Customer '{name}' added successfully!")
             self.clear_form()
             
@@ -416,11 +418,8 @@ class CustomerWindow:
         """Open window to edit customer"""
         # Fetch customer data
         try:
-            conn = sqlite3.connect('contractormitra.db')
-            cursor = conn.cursor()
-            cursor.execute("SELECT name, phone, email, gstin, address FROM customers WHERE id = ?", (customer_id,))
-            customer = cursor.fetchone()
-            conn.close()
+            customer = database.fetch_one(
+                "SELECT name, phone, email, gstin, address FROM customers WHERE id = ?", (customer_id,))
             
             if not customer:
                 messagebox.showerror("Error", "Customer not found")
@@ -509,10 +508,7 @@ class CustomerWindow:
                 return
             
             try:
-                conn = sqlite3.connect('contractormitra.db')
-                cursor = conn.cursor()
-                
-                cursor.execute('''
+                database.execute('''
                     UPDATE customers 
                     SET name = ?, phone = ?, email = ?, gstin = ?, address = ?
                     WHERE id = ?
@@ -525,9 +521,6 @@ class CustomerWindow:
                     customer_id
                 ))
                 
-                conn.commit()
-                conn.close()
-                
                 messagebox.showinfo("Success", "Customer updated successfully!")
                 edit_window.destroy()
                 self.load_customers()
@@ -562,22 +555,16 @@ class CustomerWindow:
         if messagebox.askyesno("Confirm Delete", 
                               f"Are you sure you want to delete customer:\n{customer_name}?\n\nThis action cannot be undone."):
             try:
-                conn = sqlite3.connect('contractormitra.db')
-                cursor = conn.cursor()
-                
                 # Check if customer has quotations
-                cursor.execute("SELECT COUNT(*) FROM quotations WHERE customer_id = ?", (customer_id,))
-                quote_count = cursor.fetchone()[0]
+                quote_count = database.fetch_one(
+                    "SELECT COUNT(*) FROM quotations WHERE customer_id = ?", (customer_id,))[0]
                 
                 if quote_count > 0:
                     if not messagebox.askyesno("Warning", 
                                               f"This customer has {quote_count} quotation(s).\nDelete anyway?"):
-                        conn.close()
                         return
                 
-                cursor.execute("DELETE FROM customers WHERE id = ?", (customer_id,))
-                conn.commit()
-                conn.close()
+                database.execute("DELETE FROM customers WHERE id = ?", (customer_id,))
                 
                 messagebox.showinfo("Success", "Customer deleted successfully!")
                 self.load_customers()
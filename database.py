@@ -0,0 +1,235 @@
+"""
+DATABASE - ContractorMitra
+Shared SQLite connection pool, PRAGMA profile and transaction helpers
+Version: 3.0.0
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import migrations
+
+DB_PATH = 'contractormitra.db'
+POOL_SIZE = 4
+STATEMENT_CACHE_SIZE = 256
+ACQUIRE_TIMEOUT = 30
+CHANGE_RECHECK_SECONDS = 1.0   # how stale another process's writes may appear
+
+# Applied once to every pooled connection when it is opened
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",        # 64 MB page cache per connection
+    "PRAGMA mmap_size=268435456",      # 256 MB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+
+class ConnectionPool:
+    """Small pool of long-lived connections shared by all windows"""
+
+    def __init__(self, path=DB_PATH, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._all = []
+        self._lock = threading.Lock()
+        self._changes = {}        # connection -> its total_changes when last released
+        self.commits = 0          # releases after which a pooled connection had written
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, isolation_level=None,
+                               check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self):
+        """Take an idle connection, opening a new one while under the limit"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._all) < self.size:
+                conn = self._connect()
+                self._all.append(conn)
+                return conn
+        try:
+            return self._idle.get(timeout=ACQUIRE_TIMEOUT)
+        except queue.Empty:
+            raise sqlite3.OperationalError("Timed out waiting for a database connection")
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        # total_changes covers transactions and autocommit writes alike
+        changes = conn.total_changes
+        if changes != self._changes.get(conn, 0):
+            with self._lock:
+                self._changes[conn] = changes
+                self.commits += 1
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection in autocommit mode"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    @contextmanager
+    def transaction(self, immediate=True):
+        """Borrow a connection inside BEGIN ... COMMIT, rolled back on error"""
+        conn = self.acquire()
+        try:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            self.release(conn)
+
+    def close(self):
+        with self._lock:
+            conns, self._all = self._all, []
+            self._changes = {}
+        self._idle = queue.LifoQueue()
+        for conn in conns:
+            conn.close()
+
+
+class ChangeTracker:
+    """Per-table change counters, re-read only when PRAGMA data_version moves"""
+
+    def __init__(self, pool, generation):
+        self.pool = pool
+        self.generation = generation
+        # Private read-only connection: data_version only reports commits
+        # made by *other* connections, i.e. every write in the pool
+        self._conn = sqlite3.connect(pool.path, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._data_version = None
+        self._versions = {}
+        self._commits = None
+        self._checked = 0.0
+
+    def version(self, *tables):
+        with self._lock:
+            # Writes through the pool are counted on release; other processes
+            # are picked up by data_version at most CHANGE_RECHECK_SECONDS late
+            now = time.monotonic()
+            if self.pool.commits == self._commits and now - self._checked < CHANGE_RECHECK_SECONDS:
+                return (self.generation,) + tuple(self._versions.get(t, 0) for t in tables)
+            self._commits = self.pool.commits
+            self._checked = now
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self._data_version:
+                self._versions = dict(self._conn.execute("SELECT name, version FROM table_versions"))
+                self._data_version = data_version
+            return (self.generation,) + tuple(self._versions.get(t, 0) for t in tables)
+
+    def close(self):
+        self._conn.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_tracker = None
+_generation = 0
+
+
+def _open_pool(path, size):
+    pool = ConnectionPool(path, size)
+    with pool.connection() as conn:
+        migrations.migrate(conn)
+    return pool
+
+
+def get_pool():
+    """Return the process-wide pool, creating and migrating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _open_pool(DB_PATH, POOL_SIZE)
+    return _pool
+
+
+def _reset():
+    global _pool, _tracker, _generation
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+    if _tracker is not None:
+        _tracker.close()
+        _tracker = None
+    _generation += 1
+
+
+def configure(path, size=POOL_SIZE):
+    """Point the shared pool at another database file (benchmarks, tools)"""
+    global _pool, DB_PATH
+    with _pool_lock:
+        _reset()
+        DB_PATH = path
+        _pool = _open_pool(path, size)
+    return _pool
+
+
+def close():
+    """Close every pooled connection; the next call reopens the pool"""
+    with _pool_lock:
+        _reset()
+
+
+def table_version(*tables):
+    """Opaque token that changes whenever any of `tables` is written"""
+    global _tracker
+    if _tracker is None:
+        pool = get_pool()
+        with _pool_lock:
+            if _tracker is None:
+                _tracker = ChangeTracker(pool, _generation)
+    return _tracker.version(*tables)
+
+
+def open_reader():
+    """Private read-only connection for long queries on a worker thread; caller closes it"""
+    conn = get_pool()._connect()
+    conn.execute("PRAGMA query_only=ON")
+    return conn
+
+
+def connection():
+    return get_pool().connection()
+
+
+def transaction(immediate=True):
+    return get_pool().transaction(immediate)
+
+
+def fetch_all(sql, params=()):
+    with get_pool().connection() as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def fetch_one(sql, params=()):
+    with get_pool().connection() as conn:
+        return conn.execute(sql, params).fetchone()
+
+
+def execute(sql, params=()):
+    """Run a single write in its own transaction and return lastrowid"""
+    with get_pool().transaction() as conn:
+        return conn.execute(sql, params).lastrowid
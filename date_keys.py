@@ -0,0 +1,81 @@
+"""
+DATE KEYS - ContractorMitra
+Integer YYYYMMDD day keys for indexed date-range filters
+"""
+
+import re
+from datetime import date, datetime
+
+# Accepted on input; everything is stored as ISO '%Y-%m-%d' text
+YEAR_FIRST = re.compile(r'(\d{4})[-/](\d{1,2})[-/](\d{1,2})(?:[ T][\d:.]*)?')    # 2025-01-31[ 10:30:00]
+DAY_FIRST = re.compile(r'(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})')                  # 31-01-2025, 31/01/2025
+MONTH_NAME_FORMATS = ('%d-%b-%Y', '%d %b %Y', '%d-%B-%Y', '%d %B %Y')            # 31-Jan-2025
+
+
+def key_sql(column):
+    """SQL expression giving the day key of an ISO date/datetime column, NULL otherwise"""
+    return f"CAST(strftime('%Y%m%d', {column}) AS INTEGER)"
+
+
+def _ymd(value, year, month, day):
+    try:
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        raise ValueError(f"Invalid date: {value!r}") from None
+
+
+def parse_date(value):
+    """date from a date, datetime or date text in one of the accepted forms; ValueError otherwise"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    # Regexes first: a failed strptime costs ~20 us, too slow for a backfill
+    m = YEAR_FIRST.fullmatch(text)
+    if m:
+        return _ymd(value, m.group(1), m.group(2), m.group(3))
+    m = DAY_FIRST.fullmatch(text)
+    if m:
+        return _ymd(value, m.group(3), m.group(2), m.group(1))
+    for fmt in MONTH_NAME_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"Unrecognised date: {value!r}")
+
+
+def iso_date(value):
+    return parse_date(value).isoformat()
+
+
+def date_key(value):
+    """YYYYMMDD integer for a date, datetime or date text"""
+    d = parse_date(value)
+    return d.year * 10000 + d.month * 100 + d.day
+
+
+def key_date(key):
+    """ISO text for a YYYYMMDD key (None stays None)"""
+    if key is None:
+        return None
+    return f"{key // 10000:04d}-{key // 100 % 100:02d}-{key % 100:02d}"
+
+
+def key_range(date_from, date_to):
+    """(first, last) keys for an inclusive date range"""
+    return date_key(date_from), date_key(date_to)
+
+
+def normalize_column(conn, table, column):
+    """Rewrite non-ISO values of `column` as ISO dates; returns (fixed, unparseable)"""
+    fixed, bad = [], 0
+    for row_id, value in conn.execute(f"SELECT id, {column} FROM {table} "
+                                      f"WHERE {column} IS NOT NULL AND {key_sql(column)} IS NULL").fetchall():
+        try:
+            fixed.append((iso_date(value), row_id))
+        except ValueError:
+            bad += 1
+    conn.executemany(f"UPDATE {table} SET {column} = ? WHERE id = ?", fixed)
+    return len(fixed), bad
@@ -0,0 +1,78 @@
+"""
+DIAGNOSTICS WINDOW - ContractorMitra
+Live hit ratios of the in-process caches
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+REFRESH_MS = 1000
+COLUMNS = ("Cache", "Hits", "Misses", "Hit ratio", "Entries", "Detail")
+
+
+def cache_rows():
+    """(cache, hits, misses, hit ratio, entries, detail) per cache"""
+    from ai_rules import generation_cache
+    from materials_cache import catalogue
+    from pdf_cache import cache
+    from report_cache import report_cache
+
+    rows = []
+    s = generation_cache().stats()
+    rows.append(("AI quote generation", s['hits'], s['misses'], s['hit_ratio'], f"{s['entries']} / {s['size']}",
+                 f"{s['invalidations']} invalidations (materials or rules changed)"))
+    s = catalogue().stats()
+    rows.append(("Materials catalogue", s['hits'], s['misses'], s['hit_ratio'], s['size'],
+                 f"{s['loads']} loads"))
+    s = report_cache().stats()
+    rows.append(("Report results", s['hits'], s['misses'], s['hit_ratio'], s['entries'],
+                 f"{s['bytes'] / 2**20:.1f} MB"))
+    s = cache().stats()
+    rows.append(("Quotation PDFs", s['hits'], s['misses'], s['hit_ratio'], s['files'],
+                 f"{s['bytes'] / 2**20:.1f} of {s['limit_bytes'] / 2**20:.0f} MB on disk"))
+    return rows
+
+
+class DiagnosticsWindow:
+    def __init__(self, parent):
+        self.window = tk.Toplevel(parent)
+        self.window.title("Diagnostics - ContractorMitra")
+        self.window.geometry("900x260")
+        self.window.configure(bg="#f5f5f7")
+
+        tk.Label(self.window, text="🩺 Cache Diagnostics", font=("SF Pro Display", 16, "bold"),
+                 fg="#1d1d1f", bg="#f5f5f7").pack(anchor=tk.W, padx=20, pady=(15, 10))
+
+        self.tree = ttk.Treeview(self.window, columns=COLUMNS, show="headings", height=5)
+        for col, width in zip(COLUMNS, (170, 80, 80, 80, 90, 360)):
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=width, anchor=tk.W if col in ("Cache", "Detail") else tk.E)
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=20)
+
+        buttons = tk.Frame(self.window, bg="#f5f5f7")
+        buttons.pack(fill=tk.X, padx=20, pady=10)
+        tk.Button(buttons, text="Clear AI quote cache", command=self.clear_generation,
+                  bg="#9b59b6", fg="white", relief=tk.FLAT, padx=10).pack(side=tk.LEFT)
+        tk.Button(buttons, text="Close", command=self.window.destroy,
+                  bg="#86868b", fg="white", relief=tk.FLAT, padx=10).pack(side=tk.RIGHT)
+
+        self.refresh()
+
+    def draw(self):
+        self.tree.delete(*self.tree.get_children())
+        for name, hits, misses, ratio, entries, detail in cache_rows():
+            self.tree.insert("", "end", values=(name, f"{hits:,}", f"{misses:,}", f"{ratio:.1%}",
+                                                entries, detail))
+
+    def refresh(self):
+        """Redraw now and every REFRESH_MS while the window is open"""
+        try:
+            self.draw()
+            self.window.after(REFRESH_MS, self.refresh)
+        except tk.TclError:
+            pass    # window closed
+
+    def clear_generation(self):
+        from ai_rules import generation_cache
+        generation_cache().clear()
+        self.draw()
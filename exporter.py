@@ -0,0 +1,198 @@
+"""
+EXPORTER - ContractorMitra
+Streams query results to XLSX, CSV or Parquet in fixed-size batches
+"""
+
+import csv
+import os
+from functools import partial
+from tkinter import filedialog, messagebox
+
+import database
+from background import BackgroundTask
+
+BATCH_ROWS = 2000
+XLSX_SHEET_ROWS = 1_048_575    # Excel's row limit, less the heading row
+FILETYPES = [("Excel", "*.xlsx"), ("CSV", "*.csv"), ("Parquet", "*.parquet"), ("PDF", "*.pdf")]
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def query_batches(conn, sql, params=(), convert=tuple, batch=BATCH_ROWS):
+    """Lists of up to `batch` converted rows straight from a cursor"""
+    cur = conn.execute(sql, params)
+    while True:
+        chunk = cur.fetchmany(batch)
+        if not chunk:
+            return
+        yield [convert(row) for row in chunk]
+
+
+# ---------- WRITERS ----------
+# Each takes (path, headings, batches, step) and calls step(len(batch)) after every batch
+def write_xlsx(path, headings, batches, step):
+    from openpyxl import Workbook
+    # write_only streams rows to disk instead of keeping a cell object per value
+    wb = Workbook(write_only=True)
+    ws, room = None, 0
+    for rows in batches:
+        for row in rows:
+            if not room:
+                # Ledgers longer than one sheet continue on the next
+                ws, room = wb.create_sheet(f"Sheet{len(wb.worksheets) + 1}"), XLSX_SHEET_ROWS
+                ws.append(list(headings))
+            ws.append(row)
+            room -= 1
+        step(len(rows))
+    if ws is None:
+        wb.create_sheet("Sheet1").append(list(headings))
+    wb.save(path)
+
+
+def write_csv(path, headings, batches, step):
+    # utf-8-sig so Excel opens rupee signs and Indian names correctly
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(headings)
+        for rows in batches:
+            writer.writerows(rows)
+            step(len(rows))
+
+
+def _parquet_type(pa, decl):
+    """Arrow type for a declared SQLite column type, by SQLite's affinity rules"""
+    decl = (decl or "").upper()
+    if "INT" in decl:
+        return pa.int64()
+    if any(t in decl for t in ("REAL", "FLOA", "DOUB", "NUM", "DEC")):
+        return pa.float64()
+    return pa.string()
+
+
+def _parquet_column(pa, field, values):
+    if field.type == pa.string():
+        values = [None if v is None else str(v) for v in values]
+    elif field.type == pa.float64():
+        values = [None if v is None else float(v) for v in values]
+    return pa.array(values, type=field.type)
+
+
+def write_parquet(path, headings, batches, step, types=None):
+    """types: declared SQLite type per heading (INTEGER, REAL, TEXT...); the
+    schema is fixed from them before the first row, undeclared columns are text"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    types = list(types or ())
+    types += [None] * (len(headings) - len(types))
+    # Not inferred from the data: a first batch of NULLs or whole numbers
+    # would give a schema that later batches cannot be written to
+    schema = pa.schema([(h, _parquet_type(pa, t)) for h, t in zip(headings, types)])
+    writer = pq.ParquetWriter(path, schema)
+    try:
+        for rows in batches:
+            # One row group per batch
+            arrays = [_parquet_column(pa, f, c) for f, c in zip(schema, zip(*rows))]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            step(len(rows))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_pdf(path, headings, batches, step, **options):
+    """Paged report PDF (report_pdf.write_pdf); options are its title, subtitle and totals"""
+    # reportlab is only needed once someone asks for a PDF
+    from report_pdf import write_pdf
+    write_pdf(path, headings, batches, step, **options)
+
+
+WRITERS = {'.xlsx': write_xlsx, '.csv': write_csv, '.parquet': write_parquet, '.pdf': write_pdf}
+
+
+def export(path, headings, batches, progress=None, cancelled=None, writer=None, types=None):
+    """Write `batches` to `path` with `writer`, by default the one its extension names; returns the row count.
+
+    progress(rows_so_far) is called after every batch; when cancelled() turns
+    true the partial file is removed and ExportCancelled is raised. types are
+    the declared column types a Parquet file is written with.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if writer is None and ext not in WRITERS:
+        raise ValueError(f"Unsupported export format: {ext or path}")
+    if writer is None and ext == '.parquet':
+        writer = partial(write_parquet, types=types)
+    writer = writer or WRITERS[ext]
+    written = 0
+
+    def step(count):
+        nonlocal written
+        written += count
+        if progress:
+            progress(written)
+        if cancelled and cancelled():
+            raise ExportCancelled()
+
+    try:
+        writer(path, headings, batches, step)
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return written
+
+
+def start_export(widget, path, headings, make_batches, on_progress=None, on_done=None, on_error=None,
+                 writer=None, types=None):
+    """Export on a worker thread over a private read connection.
+
+    make_batches(conn) returns the batches; on_done(rows) and on_progress(rows)
+    run on the Tk thread. A cancelled task finishes with ExportCancelled.
+    """
+    def work(task):
+        conn = database.open_reader()
+        try:
+            return export(path, headings, make_batches(conn), task.progress, task.cancelled.is_set, writer, types)
+        finally:
+            conn.close()
+
+    return BackgroundTask(widget, work, on_progress, on_done, on_error).start()
+
+
+def export_dialog(window, headings, make_batches, status_var, progressbar=None,
+                  filetypes=FILETYPES, writer=None, types=None):
+    """Ask for a file and export to it in the background, showing progress in status_var.
+
+    Returns the BackgroundTask (cancel() stops it), or None if no file was chosen.
+    """
+    path = filedialog.asksaveasfilename(parent=window, defaultextension=filetypes[0][1][1:],
+                                        filetypes=filetypes)
+    if not path:
+        return None
+
+    def finish(text):
+        status_var.set(text)
+        if progressbar is not None:
+            progressbar.stop()
+
+    def on_done(rows):
+        finish(f"Exported {rows:,} rows")
+        messagebox.showinfo("Success", f"Exported {rows:,} rows to {path}")
+
+    def on_error(e):
+        if isinstance(e, ExportCancelled):
+            finish("Export cancelled")
+            return
+        finish("")
+        messagebox.showerror("Error", f"Export failed: {e}")
+
+    status_var.set("Exporting...")
+    if progressbar is not None:
+        progressbar.start(10)
+    return start_export(window, path, headings, make_batches,
+                        lambda rows: status_var.set(f"Exporting... {rows:,} rows"), on_done, on_error, writer,
+                        types)
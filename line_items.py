@@ -0,0 +1,153 @@
+"""
+LINE ITEMS - ContractorMitra
+Editor-side quote line model with running totals, updated in O(1) per change
+"""
+
+from array import array
+
+from quotation_repository import QuotationItem
+
+
+class QuoteLines:
+    """Numeric line model: quantity, rate and GST in parallel arrays, indexed by slot.
+
+    Taxable amounts are summed per GST slab, so totals never walk the lines.
+    Slots of removed lines are reused; a view keys its rows by slot. Lines can
+    be merged by (name, rate) through merge(), found in O(1) via find().
+    """
+
+    def __init__(self):
+        self.names = []
+        self.units = []
+        self.descriptions = []
+        self.quantity = array('d')
+        self.rate = array('d')
+        self.gst = array('d')
+        self.live = bytearray()
+        self._free = []
+        self._slabs = {}          # gst % -> [taxable amount, line count]
+        self._keys = {}           # (name, rate) -> slots of such lines, oldest first
+
+    def __len__(self):
+        return len(self.live) - len(self._free)
+
+    def find(self, name, rate):
+        """Slot of a line with this material and rate, or None"""
+        slots = self._keys.get((name, rate))
+        return slots[0] if slots else None
+
+    def _key(self, slot, rate):
+        self._keys.setdefault((self.names[slot], rate), []).append(slot)
+
+    def _unkey(self, slot):
+        key = (self.names[slot], self.rate[slot])
+        slots = self._keys[key]
+        slots.remove(slot)
+        if not slots:
+            del self._keys[key]
+
+    def amount(self, slot):
+        return self.quantity[slot] * self.rate[slot]
+
+    def _count(self, slot, sign):
+        slab = self._slabs.setdefault(self.gst[slot], [0.0, 0])
+        slab[0] += sign * self.amount(slot)
+        slab[1] += sign
+        if slab[1] == 0:
+            # Last line at this rate gone: drop the slab and its float residue
+            del self._slabs[self.gst[slot]]
+
+    def add(self, name, unit, quantity, rate, gst, description=""):
+        """Slot of the new line"""
+        if self._free:
+            slot = self._free.pop()
+            self.names[slot], self.units[slot], self.descriptions[slot] = name, unit, description
+            self.quantity[slot], self.rate[slot], self.gst[slot] = quantity, rate, gst
+            self.live[slot] = 1
+        else:
+            slot = len(self.live)
+            self.names.append(name)
+            self.units.append(unit)
+            self.descriptions.append(description)
+            self.quantity.append(quantity)
+            self.rate.append(rate)
+            self.gst.append(gst)
+            self.live.append(1)
+        self._key(slot, rate)
+        self._count(slot, 1)
+        return slot
+
+    def merge(self, name, unit, quantity, rate, gst, description=""):
+        """(slot, created): the quantity added to the line with the same
+        material and rate, or a new line"""
+        slot = self.find(name, rate)
+        if slot is None:
+            return self.add(name, unit, quantity, rate, gst, description), True
+        self.update(slot, quantity=self.quantity[slot] + quantity)
+        return slot, False
+
+    def update(self, slot, quantity=None, rate=None, gst=None, description=None, merge=False):
+        """Edit one line; returns the slot now holding it. With merge, a new rate
+        that matches another line of the same material folds this line into it,
+        and the edited GST and description apply to the merged line."""
+        if rate is not None and rate != self.rate[slot]:
+            other = self.find(self.names[slot], rate)
+            if merge and other is not None:
+                added = self.quantity[slot] if quantity is None else quantity
+                self.remove(slot)
+                self.update(other, quantity=self.quantity[other] + added, gst=gst, description=description)
+                return other
+            self._unkey(slot)
+            self._key(slot, rate)
+        self._count(slot, -1)
+        if quantity is not None:
+            self.quantity[slot] = quantity
+        if rate is not None:
+            self.rate[slot] = rate
+        if gst is not None:
+            self.gst[slot] = gst
+        if description is not None:
+            self.descriptions[slot] = description
+        self._count(slot, 1)
+        return slot
+
+    def remove(self, slot):
+        self._count(slot, -1)
+        self._unkey(slot)
+        self.live[slot] = 0
+        self.names[slot] = self.units[slot] = self.descriptions[slot] = None
+        self._free.append(slot)
+
+    def clear(self):
+        self.__init__()
+
+    def slabs(self):
+        """{gst %: (taxable amount, gst amount)} for the rates in use"""
+        return {pct: (taxable, taxable * pct / 100) for pct, (taxable, _) in sorted(self._slabs.items())}
+
+    @property
+    def subtotal(self):
+        return sum(taxable for taxable, _ in self._slabs.values())
+
+    @property
+    def gst_amount(self):
+        return sum(taxable * pct / 100 for pct, (taxable, _) in self._slabs.items())
+
+    @property
+    def grand_total(self):
+        return self.subtotal + self.gst_amount
+
+    def row(self, slot):
+        """The line as the dict the AI quote PDF layout takes"""
+        return {'name': self.names[slot], 'description': self.descriptions[slot] or "",
+                'quantity': self.quantity[slot], 'unit': self.units[slot] or "", 'rate': self.rate[slot],
+                'amount': self.amount(slot), 'gst': self.gst[slot]}
+
+    def item(self, slot):
+        return QuotationItem(name=self.names[slot], quantity=self.quantity[slot], rate=self.rate[slot],
+                             unit=self.units[slot] or "", description=self.descriptions[slot] or "",
+                             gst_percent=self.gst[slot])
+
+    def items(self, slots):
+        """QuotationItems for `slots` (display order), for saving"""
+        return [self.item(slot) for slot in slots if self.live[slot]]
@@ -124,6 +124,8 @@ class MainWindow:
                 font=ModernStyle.FONT_SMALL,
                 fg=ModernStyle.TEXT_SECONDARY, bg=ModernStyle.BG_COLOR).pack()
 
+        ModernButton(footer, "🩺 Diagnostics", self.diagnostics, ModernStyle.TEXT_SECONDARY).pack(pady=(10, 0))
+
     def create_card(self, parent, card, row, col):
         card_frame = tk.Frame(parent, bg="white", relief=tk.FLAT)
         card_frame.grid(row=row, column=col, padx=10, pady=10, sticky='nsew')
@@ -184,6 +186,13 @@ class MainWindow:
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
+    def diagnostics(self):
+        try:
+            from diagnostics_window import DiagnosticsWindow
+            DiagnosticsWindow(self.root)
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+
     def run(self):
         self.root.mainloop()
 
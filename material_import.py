@@ -0,0 +1,167 @@
+"""
+MATERIAL IMPORT - ContractorMitra
+Streaming Excel/CSV price-list import with vectorized validation and bulk upsert
+Columns (by position): name, category, unit, rate, GST %
+"""
+
+import csv
+import os
+from dataclasses import dataclass
+
+import pandas as pd
+
+import database
+
+CHUNK_SIZE = 5000
+COLUMNS = ['name', 'category', 'default_unit', 'default_rate', 'default_gst']
+DEFAULT_RATE = 0.0
+DEFAULT_GST = 18.0
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    errors: int = 0
+    error_path: str = None
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    """Yield (first_row_number, DataFrame) without loading the whole file"""
+    if path.lower().endswith('.csv'):
+        reader = pd.read_csv(path, chunksize=chunk_size, header=0, dtype=str,
+                             keep_default_na=False, skip_blank_lines=True)
+        row_no = 2
+        for df in reader:
+            yield row_no, df
+            row_no += len(df)
+        return
+
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        next(rows, None)   # header row
+        row_no, batch = 2, []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                yield row_no, pd.DataFrame(batch)
+                row_no += len(batch)
+                batch = []
+        if batch:
+            yield row_no, pd.DataFrame(batch)
+    finally:
+        wb.close()
+
+
+def clean_chunk(df, first_row):
+    """Coerce and validate one chunk; returns (valid DataFrame, rejected DataFrame)"""
+    df = df.iloc[:, :len(COLUMNS)].copy()
+    df.columns = COLUMNS[:df.shape[1]]
+    for col in COLUMNS[df.shape[1]:]:
+        df[col] = None
+    df.index = range(first_row, first_row + len(df))
+
+    text = {}
+    for col in ('name', 'category', 'default_unit'):
+        text[col] = df[col].astype('string').str.strip().fillna('')
+    raw_rate = df['default_rate'].astype('string').str.strip().fillna('')
+    raw_gst = df['default_gst'].astype('string').str.strip().fillna('')
+    rate = pd.to_numeric(raw_rate.where(raw_rate != '', str(DEFAULT_RATE)), errors='coerce').astype('float64')
+    gst = pd.to_numeric(raw_gst.str.rstrip('%').where(raw_gst != '', str(DEFAULT_GST)),
+                        errors='coerce').astype('float64')
+
+    error = pd.Series('', index=df.index, dtype='string')
+    error = error.mask(gst.isna() | (gst < 0) | (gst > 100), 'Invalid GST %')
+    error = error.mask(rate.isna() | (rate < 0), 'Invalid rate')
+    error = error.mask(text['name'] == '', 'Missing material name')
+
+    cleaned = pd.DataFrame({
+        'name': text['name'], 'category': text['category'], 'default_unit': text['default_unit'],
+        'default_rate': rate, 'default_gst': gst,
+    })
+    bad = error != ''
+    rejected = df[bad].assign(error=error[bad])
+    # Later rows in the file win when a name repeats
+    valid = cleaned[~bad].drop_duplicates('name', keep='last')
+    return valid, rejected
+
+
+def upsert_chunk(conn, valid):
+    """Insert new names and update changed ones; returns (inserted, updated)"""
+    conn.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS material_import (
+            name TEXT PRIMARY KEY, category TEXT, default_unit TEXT,
+            default_rate REAL, default_gst REAL
+        )
+    ''')
+    conn.execute("DELETE FROM temp.material_import")
+    conn.executemany("INSERT OR REPLACE INTO temp.material_import VALUES (?,?,?,?,?)",
+                     valid.itertuples(index=False, name=None))
+    inserted = conn.execute('''
+        SELECT COUNT(*) FROM temp.material_import s
+        WHERE NOT EXISTS (SELECT 1 FROM materials m WHERE m.name = s.name)
+    ''').fetchone()[0]
+    # Counted up front: total_changes would also count the table_versions trigger writes
+    updated = conn.execute('''
+        SELECT COUNT(*) FROM temp.material_import s
+        JOIN materials m ON m.name = s.name
+        WHERE m.category IS NOT s.category
+           OR m.default_unit IS NOT s.default_unit
+           OR m.default_rate IS NOT s.default_rate
+           OR m.default_gst IS NOT s.default_gst
+    ''').fetchone()[0]
+    conn.execute('''
+        INSERT INTO materials (name, category, default_unit, default_rate, default_gst)
+        SELECT name, category, default_unit, default_rate, default_gst
+        FROM temp.material_import WHERE true
+        ON CONFLICT (name) DO UPDATE SET
+            category = excluded.category,
+            default_unit = excluded.default_unit,
+            default_rate = excluded.default_rate,
+            default_gst = excluded.default_gst
+        WHERE materials.category IS NOT excluded.category
+           OR materials.default_unit IS NOT excluded.default_unit
+           OR materials.default_rate IS NOT excluded.default_rate
+           OR materials.default_gst IS NOT excluded.default_gst
+    ''')
+    return inserted, updated
+
+
+def import_materials(path, progress=None, cancelled=None, chunk_size=CHUNK_SIZE, error_path=None):
+    """Import a price list chunk by chunk; each chunk commits on its own"""
+    result = ImportResult()
+    error_path = error_path or os.path.splitext(path)[0] + '_errors.csv'
+    error_file = None
+    writer = None
+    try:
+        for first_row, df in read_chunks(path, chunk_size):
+            if cancelled is not None and cancelled.is_set():
+                break
+            valid, rejected = clean_chunk(df, first_row)
+            if len(valid):
+                with database.transaction() as conn:
+                    inserted, updated = upsert_chunk(conn, valid)
+                result.inserted += inserted
+                result.updated += updated
+                result.unchanged += len(valid) - inserted - updated
+            if len(rejected):
+                if writer is None:
+                    error_file = open(error_path, 'w', newline='', encoding='utf-8')
+                    writer = csv.writer(error_file)
+                    writer.writerow(['row', 'error'] + list(rejected.columns[:-1]))
+                for row_no, row in zip(rejected.index, rejected.itertuples(index=False, name=None)):
+                    writer.writerow([row_no, row[-1]] + list(row[:-1]))
+                result.errors += len(rejected)
+            result.rows += len(df)
+            if progress:
+                progress(result)
+    finally:
+        if error_file:
+            error_file.close()
+    if result.errors:
+        result.error_path = error_path
+    return result
@@ -4,8 +4,11 @@ FULLY PRODUCTION READY + Modern Apple UI
 """
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
-import pandas as pd
+import database
+from materials_cache import catalogue
+from background import BackgroundTask
+from material_import import import_materials
+from exporter import export_dialog, query_batches
 from tkinter import filedialog
 from datetime import datetime
 
@@ -33,6 +36,9 @@ class MaterialWindow:
         self.window.geometry("1200x700")
         self.window.configure(bg=ModernStyle.BG_COLOR)
 
+        self.import_task = None
+        self.export_task = None
+
         self.center_window()
         self.setup_ui()
         self.load_materials()
@@ -124,21 +130,23 @@ class MaterialWindow:
             ("✏️ Edit", self.edit_material, ModernStyle.ACCENT_BLUE),
             ("🗑️ Delete", self.delete_material, ModernStyle.ACCENT_RED),
             ("📎 Import Excel", self.import_excel, ModernStyle.ACCENT_PURPLE),
-            ("📊 Export Excel", self.export_excel, ModernStyle.ACCENT_ORANGE),
+            ("📊 Export", self.export_excel, ModernStyle.ACCENT_ORANGE),
             ("❌ Close", self.window.destroy, ModernStyle.TEXT_SECONDARY)
         ]
         for txt,cmd,col in btns:
             self.create_modern_button(btn_row, txt, cmd, col).pack(side=tk.LEFT, padx=5)
 
+        # Import progress
+        self.import_status_var = tk.StringVar(value="")
+        self.import_progress = ttk.Progressbar(btn_row, mode="indeterminate", length=160)
+        tk.Label(btn_row, textvariable=self.import_status_var, font=ModernStyle.FONT_SMALL,
+                 fg=ModernStyle.TEXT_SECONDARY, bg=ModernStyle.BG_COLOR).pack(side=tk.RIGHT, padx=5)
+
     # ---------- DATABASE OPERATIONS ----------
     def load_materials(self):
         for i in self.tree.get_children():
             self.tree.delete(i)
-        conn = sqlite3.connect('contractormitra.db')
-        cur = conn.cursor()
-        cur.execute("SELECT id, name, category, default_unit, default_rate, default_gst FROM materials ORDER BY name")
-        data = cur.fetchall()
-        conn.close()
+        data = catalogue().all()
         search = self.search_var.get().lower()
         for row in data:
             if search and search not in str(row[1]).lower() and search not in str(row[2]).lower():
@@ -171,15 +179,11 @@ class MaterialWindow:
                 messagebox.showerror("Error", "Material Name required")
                 return
             try:
-                conn = sqlite3.connect('contractormitra.db')
-                cur = conn.cursor()
-                cur.execute('''
+                database.execute('''
                     INSERT INTO materials (name, category, default_unit, default_rate, default_gst)
                     VALUES (?,?,?,?,?)
                 ''', (name, fields['cat'].get(), fields['unit'].get(),
                       float(fields['rate'].get() or 0), float(fields['gst'].get() or 18)))
-                conn.commit()
-                conn.close()
                 win.destroy()
                 self.load_materials()
                 messagebox.showinfo("Success", "Material added")
@@ -214,15 +218,11 @@ class MaterialWindow:
 
         def update():
             try:
-                conn = sqlite3.connect('contractormitra.db')
-                cur = conn.cursor()
-                cur.execute('''
+                database.execute('''
                     UPDATE materials SET name=?, category=?, default_unit=?, default_rate=?, default_gst=?
                     WHERE id=?
                 ''', (fields['name'].get(), fields['cat'].get(), fields['unit'].get(),
                       float(fields['rate'].get() or 0), float(fields['gst'].get() or 18), mid))
-                conn.commit()
-                conn.close()
                 win.destroy()
                 self.load_materials()
                 messagebox.showinfo("Success", "Updated")
@@ -239,43 +239,56 @@ class MaterialWindow:
         if not messagebox.askyesno("Confirm", "Delete selected material?"):
             return
         mid = self.tree.item(sel[0])['values'][0]
-        conn = sqlite3.connect('contractormitra.db')
-        cur = conn.cursor()
-        cur.execute("DELETE FROM materials WHERE id=?", (mid,))
-        conn.commit()
-        conn.close()
+        database.execute("DELETE FROM materials WHERE id=?", (mid,))
         self.load_materials()
         messagebox.showinfo("Success", "Deleted")
 
     def import_excel(self):
-        file = filedialog.askopenfilename(filetypes=[("Excel","*.xlsx")])
+        if self.import_task and not self.import_task.finished:
+            messagebox.showwarning("Busy", "An import is already running")
+            return
+        file = filedialog.askopenfilename(filetypes=[("Price lists","*.xlsx *.csv"), ("Excel","*.xlsx"), ("CSV","*.csv")])
         if not file:
             return
-        try:
-            df = pd.read_excel(file)
-            conn = sqlite3.connect('contractormitra.db')
-            for _,row in df.iterrows():
-                conn.execute('''
-                    INSERT OR IGNORE INTO materials (name, category, default_unit, default_rate, default_gst)
-                    VALUES (?,?,?,?,?)
-                ''', (row[0], row[1] if len(row)>1 else "", row[2] if len(row)>2 else "",
-                      float(row[3]) if len(row)>3 else 0, float(row[4]) if len(row)>4 else 18))
-            conn.commit()
-            conn.close()
+
+        def work(task):
+            return import_materials(file, progress=lambda r: task.progress(r), cancelled=task.cancelled)
+
+        def on_progress(r):
+            self.import_status_var.set(f"Imported {r.rows:,} rows ({r.inserted:,} new, {r.updated:,} updated, {r.errors:,} errors)")
+
+        def finish():
+            self.import_progress.stop()
+            self.import_progress.pack_forget()
+
+        def on_done(r):
+            finish()
+            on_progress(r)
             self.load_materials()
-            messagebox.showinfo("Success", "Imported")
-        except Exception as e:
+            msg = f"Imported {r.rows:,} rows\nNew: {r.inserted:,}\nUpdated: {r.updated:,}\nUnchanged: {r.unchanged:,}"
+            if r.errors:
+                msg += f"\n\n{r.errors:,} rows rejected, see:\n{r.error_path}"
+            messagebox.showinfo("Success", msg)
+
+        def on_error(e):
+            finish()
+            self.import_status_var.set("")
             messagebox.showerror("Error", f"Import failed: {str(e)}")
 
+        self.import_status_var.set("Importing...")
+        self.import_progress.pack(side=tk.RIGHT, padx=5)
+        self.import_progress.start(10)
+        self.import_task = BackgroundTask(self.window, work, on_progress, on_done, on_error).start()
+
     def export_excel(self):
-        file = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel","*.xlsx")])
-        if not file:
+        if self.export_task and not self.export_task.finished:
+            messagebox.showwarning("Busy", "An export is already running")
             return
-        conn = sqlite3.connect('contractormitra.db')
-        df = pd.read_sql_query("SELECT name, category, default_unit, default_rate, default_gst FROM materials", conn)
-        conn.close()
-        df.to_excel(file, index=False)
-        messagebox.showinfo("Success", f"Exported to {file}")
+        self.export_task = export_dialog(
+            self.window, ("name", "category", "default_unit", "default_rate", "default_gst"),
+            lambda conn: query_batches(conn, "SELECT name, category, default_unit, default_rate, default_gst "
+                                             "FROM materials ORDER BY name"),
+            self.import_status_var, types=("TEXT", "TEXT", "TEXT", "REAL", "REAL")) or self.export_task
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,89 @@
+"""
+MATERIALS CACHE - ContractorMitra
+Process-wide materials catalogue, reloaded only when the materials table changes
+"""
+
+import threading
+from collections import namedtuple
+
+import database
+
+Material = namedtuple('Material', 'id name category unit rate gst')
+
+
+class MaterialsCatalogue:
+    """Materials indexed by name and category; every lookup is a dict access"""
+
+    def __init__(self):
+        self.by_name = {}
+        self.by_category = {}
+        self.names = []
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        version = database.table_version('materials')
+        if version == self._version:
+            return
+        with self._lock:
+            if version != self._version:
+                rows = database.fetch_all('''
+                    SELECT id, name, category, default_unit, default_rate, default_gst
+                    FROM materials ORDER BY name
+                ''')
+                by_name, by_category = {}, {}
+                for row in rows:
+                    m = Material(row[0], row[1], row[2] or "", row[3] or "", row[4] or 0.0,
+                                 18.0 if row[5] is None else row[5])
+                    by_name[m.name] = m
+                    by_category.setdefault(m.category, []).append(m)
+                self.by_name, self.by_category = by_name, by_category
+                self.names = [m.name for m in by_name.values()]
+                self._version = version
+                self.loads += 1
+
+    def _count(self, found, missing=0):
+        # Name lookups only: a hit is a pick answered from the catalogue,
+        # a miss a name it does not have. Reloads are counted in loads
+        with self._lock:
+            self.hits += found
+            self.misses += missing
+
+    def get(self, name):
+        """Material by exact name, or None"""
+        self._refresh()
+        m = self.by_name.get(name)
+        self._count(m is not None, m is None)
+        return m
+
+    def get_many(self, names):
+        """{name: Material} for the names that exist, with one freshness check"""
+        self._refresh()
+        names, by_name = set(names), self.by_name
+        found = {n: by_name[n] for n in names if n in by_name}
+        self._count(len(found), len(names) - len(found))
+        return found
+
+    def in_category(self, category):
+        self._refresh()
+        return list(self.by_category.get(category, ()))
+
+    def all(self):
+        """Every material, ordered by name"""
+        self._refresh()
+        return list(self.by_name.values())
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'loads': self.loads,
+                'hit_ratio': self.hits / total if total else 0.0, 'size': len(self.by_name)}
+
+
+_catalogue = MaterialsCatalogue()
+
+
+def catalogue():
+    return _catalogue
@@ -0,0 +1,523 @@
+"""
+MIGRATIONS - ContractorMitra
+Ordered, in-place schema upgrades recorded in schema_migrations
+Usage: python migrations.py [migrate|status] [--db PATH]
+"""
+
+import argparse
+import re
+import sqlite3
+import sys
+from datetime import datetime
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """Register fn(conn) as schema version `version`"""
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return register
+
+
+def column_names(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def add_column(conn, table, column, decl):
+    """ALTER TABLE ... ADD COLUMN unless the column already exists"""
+    if column not in column_names(conn, table):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+def track_changes(conn, table):
+    """Bump table_versions[table] from triggers on every insert, update and delete"""
+    conn.execute("INSERT OR IGNORE INTO table_versions (name, version) VALUES (?, 0)", (table,))
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_version
+            AFTER {event} ON {table}
+            BEGIN
+                UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+            END
+        ''')
+
+
+# ---------- MIGRATIONS ----------
+@migration(1, "Base tables")
+def create_base_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS customers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            phone TEXT,
+            email TEXT,
+            gstin TEXT,
+            address TEXT,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS materials (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            category TEXT,
+            default_unit TEXT,
+            default_rate REAL,
+            default_gst REAL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS quotations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            quote_no TEXT UNIQUE,
+            date TEXT,
+            customer_id INTEGER,
+            subtotal REAL,
+            gst_amount REAL,
+            grand_total REAL,
+            status TEXT,
+            FOREIGN KEY (customer_id) REFERENCES customers (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS quotation_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            quotation_id INTEGER,
+            item_name TEXT,
+            description TEXT,
+            quantity REAL,
+            unit TEXT,
+            rate REAL,
+            amount REAL,
+            FOREIGN KEY (quotation_id) REFERENCES quotations (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS payments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_id INTEGER,
+            quotation_id INTEGER,
+            invoice_no TEXT,
+            amount REAL DEFAULT 0,
+            paid_amount REAL DEFAULT 0,
+            pending_amount REAL DEFAULT 0,
+            due_date TEXT,
+            payment_date TEXT,
+            status TEXT DEFAULT 'pending',
+            reference_no TEXT,
+            remarks TEXT,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (customer_id) REFERENCES customers (id)
+        )
+    ''')
+
+
+@migration(2, "Charge and GST columns written by the quotation window")
+def add_quotation_columns(conn):
+    add_column(conn, 'quotations', 'transport', 'REAL DEFAULT 0')
+    add_column(conn, 'quotations', 'loading', 'REAL DEFAULT 0')
+    add_column(conn, 'quotations', 'other_charges', 'REAL DEFAULT 0')
+    add_column(conn, 'quotation_items', 'gst_percent', 'REAL DEFAULT 18')
+
+
+@migration(3, "Indexes for report, PDF and lookup queries")
+def create_lookup_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_quotations_date ON quotations (date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_quotations_customer ON quotations (customer_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_quotation_items_quotation ON quotation_items (quotation_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_phone ON customers (phone)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_name ON customers (name)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_materials_name ON materials (name)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_payments_due_date ON payments (due_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_payments_customer ON payments (customer_id)")
+
+
+@migration(4, "Per-prefix, per-period quote number sequences")
+def create_quote_sequences(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS quote_sequences (
+            prefix TEXT NOT NULL,
+            period TEXT NOT NULL,
+            last_value INTEGER NOT NULL,
+            PRIMARY KEY (prefix, period)
+        ) WITHOUT ROWID
+    ''')
+    # Continue after the highest number already issued in every period
+    last = {}
+    for (quote_no,) in conn.execute("SELECT quote_no FROM quotations WHERE quote_no IS NOT NULL"):
+        m = re.fullmatch(r'([A-Za-z]+)-(\d{6,8})-(\d+)', quote_no)
+        if m:
+            key = (m.group(1), m.group(2))
+            last[key] = max(last.get(key, 0), int(m.group(3)))
+    conn.executemany('''
+        INSERT INTO quote_sequences (prefix, period, last_value) VALUES (?,?,?)
+        ON CONFLICT (prefix, period) DO UPDATE SET last_value = MAX(last_value, excluded.last_value)
+    ''', [(prefix, period, value) for (prefix, period), value in last.items()])
+
+
+@migration(5, "Unique material names for import upserts")
+def unique_material_names(conn):
+    conn.execute("UPDATE materials SET name = TRIM(name) WHERE name != TRIM(name)")
+    # Keep the most recently added row of every duplicated name
+    conn.execute('''
+        DELETE FROM materials
+        WHERE id NOT IN (SELECT MAX(id) FROM materials GROUP BY name)
+    ''')
+    conn.execute("DROP INDEX IF EXISTS idx_materials_name")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_materials_name ON materials (name)")
+
+
+@migration(6, "Change counters for cached tables")
+def create_table_versions(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    track_changes(conn, 'materials')
+
+
+@migration(7, "Trigram full-text index over customer contact fields")
+def create_customers_fts(conn):
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS customers_fts USING fts5(
+            name, phone, email, gstin,
+            content='customers', content_rowid='id', tokenize='trigram'
+        )
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_customers_fts_insert AFTER INSERT ON customers
+        BEGIN
+            INSERT INTO customers_fts (rowid, name, phone, email, gstin)
+            VALUES (new.id, new.name, new.phone, new.email, new.gstin);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_customers_fts_delete AFTER DELETE ON customers
+        BEGIN
+            INSERT INTO customers_fts (customers_fts, rowid, name, phone, email, gstin)
+            VALUES ('delete', old.id, old.name, old.phone, old.email, old.gstin);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_customers_fts_update
+        AFTER UPDATE OF name, phone, email, gstin ON customers
+        BEGIN
+            INSERT INTO customers_fts (customers_fts, rowid, name, phone, email, gstin)
+            VALUES ('delete', old.id, old.name, old.phone, old.email, old.gstin);
+            INSERT INTO customers_fts (rowid, name, phone, email, gstin)
+            VALUES (new.id, new.name, new.phone, new.email, new.gstin);
+        END
+    ''')
+    conn.execute("INSERT INTO customers_fts (customers_fts) VALUES ('rebuild')")
+    # Case-insensitive prefix search for input too short for trigrams
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_name_nocase ON customers (name COLLATE NOCASE)")
+
+
+@migration(8, "Change counters for report tables")
+def track_report_tables(conn):
+    for table in ('quotations', 'quotation_items', 'payments', 'customers'):
+        track_changes(conn, table)
+
+
+# Rollup trigger bodies, date parsing and seed data are copied here, not imported,
+# so these migrations keep building the same schema whatever rollups.py,
+# date_keys.py and ai_rules.py become
+def _rollup_add_sql(row):
+    return f'''
+        INSERT INTO monthly_rollup (month, invoices, sales, gst)
+        SELECT strftime('%Y-%m', {row}.date), 1, COALESCE({row}.grand_total, 0), COALESCE({row}.gst_amount, 0)
+        WHERE strftime('%Y-%m', {row}.date) IS NOT NULL
+        ON CONFLICT (month) DO UPDATE SET
+            invoices = invoices + 1, sales = sales + excluded.sales, gst = gst + excluded.gst;
+        INSERT INTO customer_rollup (customer_id, invoices, lifetime_value)
+        SELECT {row}.customer_id, 1, COALESCE({row}.grand_total, 0)
+        WHERE {row}.customer_id IS NOT NULL
+        ON CONFLICT (customer_id) DO UPDATE SET
+            invoices = invoices + 1, lifetime_value = lifetime_value + excluded.lifetime_value;
+    '''
+
+
+def _rollup_remove_sql(row):
+    return f'''
+        UPDATE monthly_rollup SET invoices = invoices - 1,
+               sales = sales - COALESCE({row}.grand_total, 0), gst = gst - COALESCE({row}.gst_amount, 0)
+        WHERE month = strftime('%Y-%m', {row}.date);
+        DELETE FROM monthly_rollup WHERE month = strftime('%Y-%m', {row}.date) AND invoices <= 0;
+        UPDATE customer_rollup SET invoices = invoices - 1,
+               lifetime_value = lifetime_value - COALESCE({row}.grand_total, 0)
+        WHERE customer_id = {row}.customer_id;
+    '''
+
+
+@migration(9, "Monthly and per-customer sales rollups")
+def create_rollups(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS monthly_rollup (
+            month TEXT PRIMARY KEY,
+            invoices INTEGER NOT NULL DEFAULT 0,
+            sales REAL NOT NULL DEFAULT 0,
+            gst REAL NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS customer_rollup (
+            customer_id INTEGER PRIMARY KEY,
+            invoices INTEGER NOT NULL DEFAULT 0,
+            lifetime_value REAL NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customer_rollup_value ON customer_rollup (lifetime_value)")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_quotations_rollup_insert AFTER INSERT ON quotations
+        BEGIN {_rollup_add_sql('new')} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_quotations_rollup_delete AFTER DELETE ON quotations
+        BEGIN {_rollup_remove_sql('old')} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_quotations_rollup_update
+        AFTER UPDATE OF date, grand_total, gst_amount, customer_id ON quotations
+        BEGIN {_rollup_remove_sql('old')} {_rollup_add_sql('new')} END
+    """)
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_customers_rollup_insert AFTER INSERT ON customers
+        BEGIN
+            INSERT OR IGNORE INTO customer_rollup (customer_id) VALUES (new.id);
+        END
+    ''')
+    # Totals for the quotations already there
+    conn.execute("DELETE FROM monthly_rollup")
+    conn.execute('''
+        INSERT INTO monthly_rollup (month, invoices, sales, gst)
+        SELECT strftime('%Y-%m', date), COUNT(*), COALESCE(SUM(grand_total), 0), COALESCE(SUM(gst_amount), 0)
+        FROM quotations
+        WHERE strftime('%Y-%m', date) IS NOT NULL
+        GROUP BY 1
+    ''')
+    conn.execute("DELETE FROM customer_rollup")
+    conn.execute('''
+        INSERT INTO customer_rollup (customer_id, invoices, lifetime_value)
+        SELECT customer_id, COUNT(*), COALESCE(SUM(grand_total), 0)
+        FROM quotations
+        WHERE customer_id IS NOT NULL
+        GROUP BY customer_id
+    ''')
+    conn.execute("INSERT OR IGNORE INTO customer_rollup (customer_id) SELECT id FROM customers")
+
+
+_YEAR_FIRST = re.compile(r'(\d{4})[-/](\d{1,2})[-/](\d{1,2})(?:[ T][\d:.]*)?')
+_DAY_FIRST = re.compile(r'(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})')
+_MONTH_NAME_FORMATS = ('%d-%b-%Y', '%d %b %Y', '%d-%B-%Y', '%d %B %Y')
+
+
+def _day_key_sql(column):
+    return f"CAST(strftime('%Y%m%d', {column}) AS INTEGER)"
+
+
+def _iso_date(text):
+    """ISO text for a date in one of the accepted forms, None if it is not one"""
+    text = str(text).strip()
+    for pattern, order in ((_YEAR_FIRST, (1, 2, 3)), (_DAY_FIRST, (3, 2, 1))):
+        m = pattern.fullmatch(text)
+        if m:
+            try:
+                return datetime(*(int(m.group(g)) for g in order)).date().isoformat()
+            except ValueError:
+                return None
+    for fmt in _MONTH_NAME_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            pass
+    return None
+
+
+def _normalize_dates(conn, table, column):
+    """Rewrite the non-ISO dates of `column` as ISO; unparseable values stay"""
+    rows = conn.execute(f"SELECT id, {column} FROM {table} "
+                        f"WHERE {column} IS NOT NULL AND {_day_key_sql(column)} IS NULL").fetchall()
+    fixed = [(iso, row_id) for row_id, iso in ((row_id, _iso_date(value)) for row_id, value in rows) if iso]
+    conn.executemany(f"UPDATE {table} SET {column} = ? WHERE id = ?", fixed)
+
+
+@migration(10, "Integer day keys for quotation and due dates")
+def add_date_keys(conn):
+    # Older writers stored a mix of formats; rewrite them as ISO first so the
+    # keys (and the monthly rollup triggers) see every row
+    _normalize_dates(conn, 'quotations', 'date')
+    _normalize_dates(conn, 'payments', 'due_date')
+    # Generated columns: no writer can forget to fill them in
+    add_column(conn, 'quotations', 'date_key', f"INTEGER GENERATED ALWAYS AS ({_day_key_sql('date')}) VIRTUAL")
+    add_column(conn, 'payments', 'due_key', f"INTEGER GENERATED ALWAYS AS ({_day_key_sql('due_date')}) VIRTUAL")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_quotations_date_key ON quotations (date_key)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_payments_due_key ON payments (due_key)")
+    conn.execute("DROP INDEX IF EXISTS idx_quotations_date")
+    conn.execute("DROP INDEX IF EXISTS idx_payments_due_date")
+
+
+# The rules generate_ai_quote used to hard-code, as
+# (trade, name, triggers, qty_keywords, qty_divisor, fallback, needs_qty,
+#  [(material, description, unit, rate, divisor, fixed_qty, minimum, requires)])
+_AI_SEED_RULES = [
+    ('electrical', 'Wires', 'wire,cable', 'wire,cable', 1, '', 1, [
+        ("1.5 sq.mm Copper Wire", "PVC insulated", "meter", 48.0, 1, None, 0, ''),
+        ("2.5 sq.mm Copper Wire", "Heavy duty", "meter", 65.0, 2, None, 0, 'power,3 phase')]),
+    ('electrical', 'Lights', 'light,led', 'light,led', 1, '', 1, [
+        ("LED Panel Light 18W", "LED panel", "piece", 450.0, 1, None, 0, '')]),
+    ('electrical', 'Fans', 'fan', 'fan', 1, '', 1, [
+        ("Ceiling Fan", "1200mm with regulator", "piece", 1500.0, 1, None, 0, '')]),
+    ('electrical', 'Sockets', 'socket', 'socket', 1, '', 1, [
+        ("15A Socket", "power socket", "piece", 150.0, 1, None, 0, ''),
+        ("5A Socket", "switch socket", "piece", 120.0, 1, None, 0, '')]),
+    ('electrical', 'Switches', 'switch,modular', 'switch,modular', 1, 'socket+5', 0, [
+        ("Modular Switch 1-Gang", "modular switch", "piece", 180.0, 1, None, 0, '')]),
+    ('electrical', 'MCB / DB', 'mcb,distribution', '', 1, '', 0, [
+        ("6A MCB", "SP MCB", "piece", 200.0, 1, 4, 0, ''),
+        ("Distribution Box 8-way", "DB", "piece", 800.0, 1, 1, 0, ''),
+        ("Industrial MCB 63A", "3 phase MCB", "piece", 850.0, 1, 1, 0, '3 phase,industrial')]),
+    ('electrical', 'Conduit', 'conduit,pipe', 'conduit,pipe', 1, '', 1, [
+        ("20mm PVC Conduit", "conduit pipe", "meter", 30.0, 1, None, 0, '')]),
+    ('electrical', 'Labour', '', 'sqft,square', 150, '#lines+2', 0, [
+        ("Electrical Labour", "installation labour", "point", 300.0, 1, None, 5, '')]),
+]
+
+
+@migration(11, "Data-driven AI quote rules")
+def create_ai_rules(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ai_rules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            trade TEXT NOT NULL DEFAULT 'electrical',
+            name TEXT NOT NULL,
+            triggers TEXT NOT NULL DEFAULT '',
+            qty_keywords TEXT NOT NULL DEFAULT '',
+            qty_divisor INTEGER NOT NULL DEFAULT 1,
+            fallback TEXT NOT NULL DEFAULT '',
+            needs_qty INTEGER NOT NULL DEFAULT 1,
+            position INTEGER NOT NULL DEFAULT 0,
+            active INTEGER NOT NULL DEFAULT 1
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ai_rule_lines (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            rule_id INTEGER NOT NULL REFERENCES ai_rules (id) ON DELETE CASCADE,
+            material TEXT NOT NULL,
+            description TEXT DEFAULT '',
+            unit TEXT DEFAULT '',
+            rate REAL DEFAULT 0,
+            divisor INTEGER NOT NULL DEFAULT 1,
+            fixed_qty REAL,
+            minimum REAL NOT NULL DEFAULT 0,
+            requires TEXT NOT NULL DEFAULT '',
+            position INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ai_synonyms (
+            word TEXT PRIMARY KEY,
+            keyword TEXT NOT NULL
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_ai_rule_lines_rule ON ai_rule_lines (rule_id, position)")
+    for table in ('ai_rules', 'ai_rule_lines', 'ai_synonyms'):
+        track_changes(conn, table)
+    if conn.execute("SELECT 1 FROM ai_rules LIMIT 1").fetchone():
+        return
+    # ai_synonyms starts empty so the seeded rules quote exactly what the chain did
+    for position, (trade, name, triggers, qty_keywords, divisor, fallback, needs_qty, rule_lines) \
+            in enumerate(_AI_SEED_RULES, 1):
+        rule_id = conn.execute('''
+            INSERT INTO ai_rules (trade, name, triggers, qty_keywords, qty_divisor, fallback, needs_qty, position)
+            VALUES (?,?,?,?,?,?,?,?)
+        ''', (trade, name, triggers, qty_keywords, divisor, fallback, needs_qty, position * 10)).lastrowid
+        conn.executemany('''
+            INSERT INTO ai_rule_lines (rule_id, material, description, unit, rate, divisor,
+                                       fixed_qty, minimum, requires, position)
+            VALUES (?,?,?,?,?,?,?,?,?,?)
+        ''', [(rule_id,) + line + (n,) for n, line in enumerate(rule_lines)])
+
+
+@migration(12, "Project description on quotations")
+def add_quotation_description(conn):
+    # The text an AI quotation was generated from; the suggestion index learns from it
+    add_column(conn, 'quotations', 'description', "TEXT DEFAULT ''")
+
+
+# ---------- RUNNER ----------
+def current_version(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TEXT
+        )
+    ''')
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations").fetchone()[0]
+
+
+def migrate(conn):
+    """Apply pending migrations, one transaction each; conn must be in autocommit mode"""
+    applied = []
+    for version, description, fn in MIGRATIONS:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-read inside the write lock so two processes never apply the same step
+            if version <= current_version(conn):
+                conn.execute("COMMIT")
+                continue
+            fn(conn)
+            conn.execute("INSERT INTO schema_migrations (version, description, applied_at) VALUES (?,?,?)",
+                         (version, description, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        applied.append(version)
+    if applied:
+        conn.execute("ANALYZE")
+    return applied
+
+
+# ---------- QUERY PLANS ----------
+def table_scans(conn, sql, params=()):
+    """Tables EXPLAIN QUERY PLAN reads without any index"""
+    scans = []
+    for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params):
+        detail = row[-1]
+        # FTS5 reports "VIRTUAL TABLE INDEX 0:<constraints>"; nothing after the colon is a full scan
+        if " VIRTUAL TABLE INDEX " in detail and not detail.endswith(":"):
+            continue
+        if detail.startswith("SCAN ") and " USING " not in detail:
+            scans.append(detail.split()[1])
+    return scans
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ContractorMitra schema migrations")
+    parser.add_argument('command', nargs='?', default='migrate', choices=['migrate', 'status'])
+    parser.add_argument('--db', default='contractormitra.db')
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.db, isolation_level=None)
+    try:
+        if args.command == 'status':
+            version = current_version(conn)
+            latest = MIGRATIONS[-1][0]
+            print(f"Schema version {version} of {latest}")
+            return 0 if version == latest else 1
+        applied = migrate(conn)
+        print(f"Applied migrations: {applied}" if applied else "Schema is up to date")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+PDF CACHE - ContractorMitra
+Content-addressed store of rendered quotation PDFs with a size limit and LRU eviction
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+
+from pdf_templates import TEMPLATE_VERSION
+
+CACHE_DIR = 'pdf_cache'
+LIMIT_BYTES = 200 * 2**20
+
+
+def content_key(kind, quote_data):
+    """Hash of everything drawn on the page: header, items and the template version"""
+    payload = json.dumps([kind, TEMPLATE_VERSION, quote_data], sort_keys=True, default=str,
+                         separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class PDFCache:
+    """Files named <key>.pdf; recency is the file mtime, so it survives restarts"""
+
+    def __init__(self, root=CACHE_DIR, limit_bytes=LIMIT_BYTES):
+        self.root = root
+        self.limit_bytes = limit_bytes
+        self.hits = 0
+        self.misses = 0
+        self._index = None          # key -> size, least recently used first
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.root, key + '.pdf')
+
+    def _load(self):
+        if self._index is None:
+            files = []
+            for entry in self._entries():
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((st.st_mtime, entry.name[:-4], st.st_size))
+            self._index = OrderedDict((key, size) for _, key, size in sorted(files))
+        return self._index
+
+    def _entries(self):
+        if not os.path.isdir(self.root):
+            return []
+        # .tmp- files are renders still in progress, possibly in another process
+        return [entry for entry in os.scandir(self.root)
+                if entry.name.endswith('.pdf') and not entry.name.startswith('.tmp-')]
+
+    def _sync(self):
+        """The index brought in line with the directory, which batch and PDF job
+        workers write to as well. Only files new to this process are stat'ed;
+        they count as the most recently used."""
+        index = self._load()
+        on_disk = set()
+        for entry in self._entries():
+            key = entry.name[:-4]
+            if key not in index:
+                try:
+                    index[key] = entry.stat().st_size
+                except FileNotFoundError:
+                    continue
+            on_disk.add(key)
+        for key in [key for key in index if key not in on_disk]:
+            del index[key]
+        return index
+
+    def get(self, key):
+        """Path of the stored PDF for `key`, or None"""
+        path = self._path(key)
+        with self._lock:
+            index = self._load()
+            if not os.path.exists(path):
+                # Removed behind our back (purge from another process)
+                index.pop(key, None)
+                self.misses += 1
+                return None
+            if key not in index:
+                index[key] = os.path.getsize(path)
+            index.move_to_end(key)
+            self.hits += 1
+        os.utime(path)
+        return path
+
+    def put(self, key, render):
+        """render(path) draws the PDF; it is stored under `key` and its path returned"""
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(suffix='.pdf', dir=self.root, prefix='.tmp-')
+        os.close(fd)
+        try:
+            if render(tmp) is False:
+                raise RuntimeError("PDF render failed")
+            path = self._path(key)
+            size = os.path.getsize(tmp)
+            # Atomic: readers only ever see whole files
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+        with self._lock:
+            # Evict by what is on disk, not by what this process wrote
+            index = self._sync()
+            # Sized before the rename: another process may already have evicted it
+            index[key] = size
+            index.move_to_end(key)
+            self._evict(index)
+        return path
+
+    def fetch(self, key, render):
+        """(path, hit): the stored PDF, rendering and storing it on a miss"""
+        path = self.get(key)
+        if path is not None:
+            return path, True
+        return self.put(key, render), False
+
+    def _evict(self, index):
+        total = sum(index.values())
+        while total > self.limit_bytes and len(index) > 1:
+            key, size = index.popitem(last=False)
+            total -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def purge(self):
+        """Remove every stored PDF; returns (files, bytes) removed"""
+        with self._lock:
+            index = self._load()
+            files, size = len(index), sum(index.values())
+            if os.path.isdir(self.root):
+                shutil.rmtree(self.root)
+            self._index = OrderedDict()
+        return files, size
+
+    def stats(self):
+        with self._lock:
+            index = self._sync()
+            total = self.hits + self.misses
+            return {'files': len(index), 'bytes': sum(index.values()), 'limit_bytes': self.limit_bytes,
+                    'hits': self.hits, 'misses': self.misses,
+                    'hit_ratio': self.hits / total if total else 0.0}
+
+
+_cache = PDFCache()
+
+
+def cache():
+    return _cache
+
+
+def configure(root, limit_bytes=LIMIT_BYTES):
+    """Point the shared cache at another directory (benchmarks, tools)"""
+    global _cache
+    _cache = PDFCache(root, limit_bytes)
+    return _cache
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ContractorMitra PDF cache")
+    parser.add_argument('command', nargs='?', default='stats', choices=['stats', 'purge'])
+    parser.add_argument('--dir', default=CACHE_DIR)
+    args = parser.parse_args(argv)
+    store = PDFCache(args.dir)
+    if args.command == 'purge':
+        files, size = store.purge()
+        print(f"Removed {files} PDFs ({size / 2**20:.1f} MB) from {args.dir}")
+    else:
+        s = store.stats()
+        print(f"{s['files']} PDFs, {s['bytes'] / 2**20:.1f} of {s['limit_bytes'] / 2**20:.0f} MB in {args.dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
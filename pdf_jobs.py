@@ -0,0 +1,201 @@
+"""
+PDF JOBS - ContractorMitra
+Quotation PDFs rendered in worker processes; results come back to Tk through after()
+"""
+
+import multiprocessing
+import os
+import threading
+import tkinter as tk
+from collections import deque
+from concurrent.futures import BrokenExecutor, CancelledError, ProcessPoolExecutor
+
+POLL_MS = 50
+JOB_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))   # a core is left for the Tk thread
+IN_FLIGHT = 2              # jobs handed to the pool per worker; the rest wait unpickled
+WORKER_NICE = 10           # renders yield the CPU to Tk (POSIX only)
+
+
+# ---------- WORKER PROCESS ----------
+_generator = None
+
+
+def _start_worker(cache_dir):
+    global _generator
+    import pdf_cache
+    if hasattr(os, 'nice'):
+        os.nice(WORKER_NICE)
+    from pdf_generator import PDFGenerator
+    pdf_cache.configure(cache_dir)
+    _generator = PDFGenerator()
+
+
+def _render(kind, quote_data, output_path):
+    if kind == 'quotation':
+        _generator.generate_quotation_pdf_from_data(quote_data, output_path)
+    elif not _generator.generate_quotation_pdf_from_dict(quote_data, output_path):
+        raise RuntimeError("PDF generation failed")
+    return output_path
+
+
+# ---------- TK SIDE ----------
+class PDFJob:
+    """One queued render; callbacks run on the Tk thread.
+
+    on_progress(state) sees 'queued' then 'rendering'; on_done(path) or
+    on_error(exception) ends the job. Callbacks of a cancelled job never run.
+    The future is attached once the queue hands the job to the pool.
+    """
+
+    def __init__(self, widget, on_done=None, on_error=None, on_progress=None):
+        self.widget = widget
+        self.future = None
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.state = 'queued'
+        self.cancelled = False
+        if on_progress:
+            on_progress(self.state)
+        widget.after(POLL_MS, self._poll)
+
+    @property
+    def finished(self):
+        return self.state in ('done', 'failed') or self.cancelled
+
+    def cancel(self):
+        """Drop the job; a render already running finishes but is not reported"""
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+    def _poll(self):
+        if self.cancelled:
+            return
+        try:
+            if self.future is None:
+                pass        # still waiting in the queue for a pool slot
+            elif self.future.done():
+                try:
+                    path = self.future.result()
+                except CancelledError:
+                    return
+                except Exception as e:
+                    self.state = 'failed'
+                    if self.on_error:
+                        self.on_error(e)
+                    return
+                self.state = 'done'
+                if self.on_done:
+                    self.on_done(path)
+                return
+            elif self.state == 'queued' and self.future.running():
+                self.state = 'rendering'
+                if self.on_progress:
+                    self.on_progress(self.state)
+            self.widget.after(POLL_MS, self._poll)
+        except tk.TclError:
+            # Window closed while the render was in flight
+            self.cancel()
+
+
+class PDFJobQueue:
+    """Process pool shared by every window, started on the first job.
+
+    At most in_flight jobs are handed to the pool at a time; the others wait
+    here, so a burst of clicks is not pickled and queued all at once.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, in_flight=None):
+        self.workers = workers
+        self.in_flight = in_flight or IN_FLIGHT * workers
+        self._pool = None
+        self._lock = threading.Lock()
+        self._waiting = deque()        # (job, render args) not yet in the pool
+        self._running = 0
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                from pdf_cache import cache
+                # spawn: never fork a process that has Tk and SQLite handles open.
+                # Workers share this process's PDF cache directory
+                self._pool = ProcessPoolExecutor(self.workers, multiprocessing.get_context('spawn'),
+                                                 _start_worker, (cache().root,))
+            return self._pool
+
+    def submit(self, widget, kind, quote_data, output_path, on_done=None, on_error=None, on_progress=None):
+        job = PDFJob(widget, on_done, on_error, on_progress)
+        with self._lock:
+            self._waiting.append((job, (kind, quote_data, output_path)))
+        self._dispatch()
+        return job
+
+    def _dispatch(self):
+        """Hand waiting jobs to the pool while fewer than in_flight are there"""
+        while True:
+            with self._lock:
+                if self._running >= self.in_flight or not self._waiting:
+                    return
+                job, args = self._waiting.popleft()
+                if job.cancelled:
+                    continue
+                self._running += 1
+            try:
+                try:
+                    future = self._executor().submit(_render, *args)
+                except BrokenExecutor:
+                    # A worker died (killed, out of memory); start a fresh pool
+                    self._stop_pool()
+                    future = self._executor().submit(_render, *args)
+            except BaseException:
+                with self._lock:
+                    self._running -= 1
+                raise
+            job.future = future
+            # Runs on the pool's thread (or right here if already done)
+            future.add_done_callback(self._finished)
+
+    def _finished(self, future):
+        with self._lock:
+            self._running -= 1
+        self._dispatch()
+
+    @property
+    def pending(self):
+        """(jobs in the pool, jobs waiting to be handed over)"""
+        with self._lock:
+            return self._running, len(self._waiting)
+
+    def quotation(self, widget, quotation_id, output_path, on_done=None, on_error=None, on_progress=None):
+        """Render a saved quotation; its data is read here (one indexed query pair)"""
+        from pdf_generator import PDFGenerator
+        quote_data = PDFGenerator().get_quotation_data(quotation_id)
+        if not quote_data:
+            raise LookupError(f"Quotation {quotation_id} not found")
+        return self.submit(widget, 'quotation', quote_data, output_path, on_done, on_error, on_progress)
+
+    def ai_quote(self, widget, quote_data, output_path, on_done=None, on_error=None, on_progress=None):
+        """Render an unsaved AI quote dict (generate_quotation_pdf_from_dict layout)"""
+        return self.submit(widget, 'ai_quote', quote_data, output_path, on_done, on_error, on_progress)
+
+    def _stop_pool(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        """Stop the workers; jobs still waiting are dropped"""
+        with self._lock:
+            waiting, self._waiting = self._waiting, deque()
+        for job, _ in waiting:
+            job.cancel()
+        self._stop_pool()
+
+
+_jobs = PDFJobQueue()
+
+
+def jobs():
+    return _jobs
@@ -0,0 +1,175 @@
+"""
+PDF TEMPLATES - ContractorMitra
+Quotation PDF styles, table styles and static blocks, compiled once per process
+"""
+
+import copy
+from functools import lru_cache
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+# Bump whenever the layout below changes: stored PDFs rendered with an older
+# template are then treated as stale
+TEMPLATE_VERSION = 3
+
+PAGE_SIZE = A4
+MARGIN = 20 * mm
+
+COMPANY_NAME = "RAJESH ELECTRICALS & CIVIL WORKS"
+COMPANY_LINES = (
+    "Professional Electrical & Civil Contractor",
+    "GSTIN: 27ABCDE1234F1Z5 | Phone: 9876543210",
+    "Address: 123, Main Road, Pune, Maharashtra - 411001",
+)
+QUOTATION_TERMS = (
+    "1. Validity: This quotation is valid for 30 days from the date of issue.",
+    "2. Payment: 50% advance payment before starting work, balance on completion.",
+    "3. GST: Charged on the quoted prices at the rate applicable to each item.",
+    "4. Warranty: 1 year warranty on materials and workmanship.",
+    "5. Delivery: Delivery within 7-10 days after advance payment.",
+)
+AI_QUOTE_TERMS = (
+    "1. This quotation is valid for 30 days from the date of issue",
+    "2. 50% advance payment required before starting work",
+    "3. GST is applicable at the rate shown for each item",
+    "4. Delivery within 7-10 days after advance payment",
+)
+BANK_DETAILS = (
+    ("Bank Name:", "State Bank of India", "Account No:", "123456789012"),
+    ("Branch:", "Pune Main Branch", "IFSC Code:", "SBIN0001234"),
+    ("Account Name:", "Rajesh Electricals", "UPI ID:", "rajesh-electricals@okhdfcbank"),
+)
+
+
+# ---------- STYLES ----------
+@lru_cache(maxsize=None)
+def styles():
+    """Sample stylesheet plus the quotation styles; shared, so never add to it"""
+    sheet = getSampleStyleSheet()
+    custom = [
+        ('CompanyName', 'Heading1', dict(fontSize=24, textColor=colors.HexColor('#2c3e50'), spaceAfter=20)),
+        ('QuotationTitle', 'Heading2', dict(fontSize=18, textColor=colors.HexColor('#3498db'), spaceAfter=15)),
+        ('NormalCenter', 'Normal', dict(alignment=1, fontSize=10)),
+        # AI quotes lead with the customer rather than the company
+        ('CustomerTitle', 'Heading1', dict(fontSize=22, textColor=colors.HexColor('#2c3e50'),
+                                           alignment=1, spaceAfter=6)),
+        ('AddressStyle', 'Normal', dict(fontSize=10, alignment=1, textColor=colors.HexColor('#34495e'))),
+        ('QuoteTitle', 'Heading2', dict(fontSize=14, textColor=colors.HexColor('#e67e22'),
+                                        alignment=1, spaceAfter=5)),
+        ('DateStyle', 'Normal', dict(fontSize=10, alignment=1, textColor=colors.HexColor('#7f8c8d'))),
+        ('FooterStyle', 'Normal', dict(fontSize=8, textColor=colors.HexColor('#95a5a6'),
+                                       alignment=1, spaceAfter=2)),
+    ]
+    for name, parent, options in custom:
+        sheet.add(ParagraphStyle(name=name, parent=sheet[parent], **options))
+    return sheet
+
+
+DETAILS_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+])
+
+ITEMS_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('ALIGN', (1, 1), (1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 11),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 10),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
+])
+
+TOTALS_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (1, -1), 'CENTER'),
+    ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
+    ('ALIGN', (3, 0), (3, -1), 'RIGHT'),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (2, 0), (3, -1), 11),
+    ('FONTSIZE', (0, 0), (1, -1), 8),
+    ('FONTNAME', (2, 2), (3, 2), 'Helvetica-Bold'),
+    ('LINEABOVE', (2, 2), (3, 2), 1, colors.black),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+])
+
+# Items and totals in one table; the last three rows are the totals
+AI_ITEMS_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 11),
+    ('GRID', (0, 0), (-1, -3), 1, colors.black),
+    ('FONTNAME', (4, -3), (5, -1), 'Helvetica-Bold'),
+    ('BACKGROUND', (4, -3), (5, -1), colors.HexColor('#E6F3FF')),
+])
+
+BANK_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('PADDING', (0, 0), (-1, -1), 5),
+])
+
+
+# ---------- STATIC BLOCKS ----------
+@lru_cache(maxsize=None)
+def _block(name):
+    s = styles()
+    if name == 'company':
+        return ([Paragraph(COMPANY_NAME, s['CompanyName'])]
+                + [Paragraph(line, s['NormalCenter']) for line in COMPANY_LINES]
+                + [Spacer(1, 20), Paragraph("TAX INVOICE / QUOTATION", s['QuotationTitle']), Spacer(1, 10)])
+    if name == 'quotation_terms':
+        block = [Paragraph("Terms & Conditions:", s['Heading4'])]
+        for term in QUOTATION_TERMS:
+            block += [Paragraph(term, s['Normal']), Spacer(1, 3)]
+        return block + [Spacer(1, 20)]
+    if name == 'bank':
+        table = Table([list(row) for row in BANK_DETAILS], colWidths=[80, 150, 80, 150])
+        table.setStyle(BANK_STYLE)
+        return [table]
+    if name == 'signature':
+        return [Spacer(1, 30), Paragraph("For Rajesh Electricals & Civil Works", s['NormalCenter']),
+                Spacer(1, 10), Paragraph("Authorized Signatory", s['NormalCenter']),
+                Spacer(1, 10), Paragraph("_________________________", s['NormalCenter'])]
+    if name == 'ai_terms':
+        return ([Paragraph("Terms & Conditions:", s['Heading4'])]
+                + [Paragraph(term, s['Normal']) for term in AI_QUOTE_TERMS] + [Spacer(1, 20)])
+    if name == 'ai_footer':
+        return [Spacer(1, 10),
+                Paragraph("________________________________________", s['FooterStyle']),
+                Paragraph("Made with ❤️ by ContractorMitra", s['FooterStyle']),
+                Paragraph("Professional Electrical & Civil Contractor Software", s['FooterStyle'])]
+    raise KeyError(name)
+
+
+def block(name):
+    """Fresh copies of a static block's flowables; the parsed text is shared.
+
+    Layout stores per-document state on flowables, so documents never share
+    the objects themselves.
+    """
+    return [copy.copy(f) for f in _block(name)]
+
+
+def table(rows, col_widths, style):
+    t = Table(rows, colWidths=col_widths)
+    t.setStyle(style)
+    return t
+
+
+def document(output_path):
+    return SimpleDocTemplate(output_path, pagesize=PAGE_SIZE, rightMargin=MARGIN, leftMargin=MARGIN,
+                             topMargin=MARGIN, bottomMargin=MARGIN)
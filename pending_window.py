@@ -5,10 +5,45 @@ Version: 3.0.0
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-import sqlite3
+from tkinter import ttk, messagebox
 from datetime import datetime, timedelta
-import pandas as pd
+import database
+from date_keys import date_key, iso_date, key_date
+from exporter import export_dialog
+from virtual_grid import GridSource, VirtualGrid
+
+PAYMENT_COLUMNS = ("ID", "Customer", "Quotation", "Due Date", "Amount", "Paid", "Pending", "Status")
+PAYMENT_TYPES = ("INTEGER", "TEXT", "INTEGER", "TEXT", "REAL", "REAL", "REAL", "TEXT")
+
+
+def export_payment(r):
+    """Raw values for exports: amounts stay numbers"""
+    return (r[0], r[1], r[2], key_date(r[3]), r[4], r[5], r[6], r[7])
+
+
+def format_payment(r):
+    return (r[0], r[1], r[2] or "-", key_date(r[3]) or "-",
+            f"Rs. {r[4]:,.2f}", f"Rs. {r[5]:,.2f}",
+            f"Rs. {r[6]:,.2f}", r[7].title())
+
+
+def payments_source(search=""):
+    """Payments whose customer name contains `search`, in due-date order"""
+    search = search.strip()
+    sql = '''
+        SELECT p.id, p.id, c.name, p.quotation_id, p.due_key,
+               p.amount, p.paid_amount, p.pending_amount, p.status
+        FROM payments p
+        LEFT JOIN customers c ON p.customer_id = c.id
+    '''
+    params = ()
+    if search:
+        # The search text is literal: % and _ must not act as wildcards
+        like = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        sql += " WHERE c.name LIKE ? ESCAPE '\\'"
+        params = (f"%{like}%",)
+    return GridSource(PAYMENT_COLUMNS, sql, params, sort=3, format_row=format_payment,
+                      export_row=export_payment, types=PAYMENT_TYPES)
 
 class ModernStyle:
     BG_COLOR = "#f5f5f7"
@@ -33,6 +68,7 @@ class PendingWindow:
         self.window.title("Pending Payments - ContractorMitra")
         self.window.geometry("1200x700")
         self.window.configure(bg=ModernStyle.BG_COLOR)
+        self.export_task = None
 
         self.center_window()
         self.setup_ui()
@@ -129,11 +165,14 @@ class PendingWindow:
             ("✅ Mark Paid", self.mark_as_paid, ModernStyle.ACCENT_GREEN),
             ("👁️ Details", self.view_details, ModernStyle.ACCENT_BLUE),
             ("🗑️ Delete", self.delete_payment, ModernStyle.ACCENT_RED),
-            ("📊 Export Excel", self.export_excel, ModernStyle.ACCENT_PURPLE),
+            ("📊 Export", self.export_excel, ModernStyle.ACCENT_PURPLE),
             ("❌ Close", self.window.destroy, ModernStyle.TEXT_SECONDARY)
         ]
         for txt, cmd, col in actions:
             self.create_modern_button(row2, txt, cmd, col, 120).pack(side=tk.LEFT, padx=5)
+        self.export_var = tk.StringVar(value="")
+        tk.Label(row2, textvariable=self.export_var, font=ModernStyle.FONT_SMALL,
+                 fg=ModernStyle.TEXT_SECONDARY, bg=ModernStyle.BG_COLOR).pack(side=tk.RIGHT, padx=5)
 
     def setup_treeview(self, parent):
         style = ttk.Style()
@@ -144,7 +183,7 @@ class PendingWindow:
                         foreground=ModernStyle.TEXT_PRIMARY, font=("SF Pro Text", 11, "bold"))
         style.map("Treeview", background=[("selected", ModernStyle.ACCENT_BLUE)])
 
-        cols = ("ID", "Customer", "Quotation", "Due Date", "Amount", "Paid", "Pending", "Status")
+        cols = PAYMENT_COLUMNS
         self.tree = ttk.Treeview(parent, columns=cols, show="headings", height=14, style="Treeview")
         widths = [50,200,100,100,120,120,120,100]
         for col,w in zip(cols,widths):
@@ -152,47 +191,21 @@ class PendingWindow:
             self.tree.column(col, width=w)
 
         scroll = ttk.Scrollbar(parent, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scroll.set)
+        self.grid = VirtualGrid(self.tree, scroll)
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scroll.pack(side=tk.RIGHT, fill=tk.Y)
 
     # ---------- DATABASE OPERATIONS ----------
     def load_payments(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        conn = sqlite3.connect('contractormitra.db')
-        cur = conn.cursor()
-        cur.execute('''
-            SELECT p.id, c.name, p.quotation_id, p.due_date,
-                   p.amount, p.paid_amount, p.pending_amount, p.status
-            FROM payments p
-            LEFT JOIN customers c ON p.customer_id = c.id
-            ORDER BY p.due_date
-        ''')
-        rows = cur.fetchall()
-        conn.close()
-
-        total_pending = 0
-        total_overdue = 0
-        today = datetime.now().date()
-        search = self.search_var.get().lower()
-
-        for r in rows:
-            if search and search not in str(r[1]).lower():
-                continue
-            due = datetime.strptime(r[3], "%Y-%m-%d").date()
-            pending = r[6]
-            total_pending += pending
-            if due < today and r[7] in ("pending","partial"):
-                total_overdue += pending
-
-            self.tree.insert("", "end", values=(
-                r[0], r[1], r[2] or "-", r[3],
-                f"Rs. {r[4]:,.2f}", f"Rs. {r[5]:,.2f}",
-                f"Rs. {r[6]:,.2f}", r[7].title()
-            ))
-
+        source = payments_source(self.search_var.get())
+        if self.grid.source is not None:
+            source.sort, source.descending = self.grid.source.sort, self.grid.source.descending
+        self.grid.load(source)
+
+        total_pending, total_overdue = source.summary(
+            "COALESCE(SUM(c6), 0)",
+            "COALESCE(SUM(CASE WHEN c3 < ? AND c7 IN ('pending','partial') THEN c6 END), 0)",
+            params=(date_key(datetime.now()),))
         self.total_pending_var.set(f"Rs. {total_pending:,.2f}")
         self.total_overdue_var.set(f"Rs. {total_overdue:,.2f}")
 
@@ -205,11 +218,7 @@ class PendingWindow:
         tk.Label(win, text="➕ Add Payment", font=ModernStyle.FONT_TITLE, bg="white").pack(pady=10)
 
         # Customer dropdown
-        conn = sqlite3.connect('contractormitra.db')
-        cur = conn.cursor()
-        cur.execute("SELECT id, name FROM customers ORDER BY name")
-        cust_list = cur.fetchall()
-        conn.close()
+        cust_list = database.fetch_all("SELECT id, name FROM customers ORDER BY name")
         cust_names = [f"{c[1]} (ID:{c[0]})" for c in cust_list]
         cust_var = tk.StringVar()
         tk.Label(win, text="Customer *", bg="white").pack()
@@ -239,14 +248,10 @@ class PendingWindow:
                 paid = float(fields['paid'].get() or 0)
                 pending = amt - paid
                 status = "paid" if pending<=0 else "partial" if paid>0 else "pending"
-                conn = sqlite3.connect('contractormitra.db')
-                cur = conn.cursor()
-                cur.execute('''
+                database.execute('''
                     INSERT INTO payments (customer_id, quotation_id, amount, paid_amount, pending_amount, due_date, status)
                     VALUES (?,?,?,?,?,?,?)
-                ''', (cust_id, fields['qt'].get() or None, amt, paid, pending, fields['due'].get(), status))
-                conn.commit()
-                conn.close()
+                ''', (cust_id, fields['qt'].get() or None, amt, paid, pending, iso_date(fields['due'].get()), status))
                 win.destroy()
                 self.load_payments()
                 messagebox.showinfo("Success","Payment added")
@@ -265,14 +270,10 @@ class PendingWindow:
         pid = vals[0]
         if not messagebox.askyesno("Confirm","Mark this payment as paid?"):
             return
-        conn = sqlite3.connect('contractormitra.db')
-        cur = conn.cursor()
-        cur.execute('''
+        database.execute('''
             UPDATE payments SET status='paid', paid_amount=amount, pending_amount=0, payment_date=?
             WHERE id=?
         ''', (datetime.now().strftime("%Y-%m-%d"), pid))
-        conn.commit()
-        conn.close()
         self.load_payments()
         messagebox.showinfo("Success","Payment marked as paid")
 
@@ -284,16 +285,15 @@ class PendingWindow:
             return
         vals = self.tree.item(sel[0])['values']
         pid = vals[0]
-        conn = sqlite3.connect('contractormitra.db')
-        cur = conn.cursor()
-        cur.execute('''
-            SELECT p.*, c.name, c.phone, c.email
+        p = database.fetch_one('''
+            SELECT p.id, p.customer_id, p.quotation_id, p.invoice_no, p.amount, p.paid_amount,
+                   p.pending_amount, p.due_date, p.payment_date, p.status, p.reference_no,
+                   p.remarks, p.created_date,
+                   c.name, c.phone, c.email
             FROM payments p
             LEFT JOIN customers c ON p.customer_id = c.id
             WHERE p.id=?
         ''', (pid,))
-        p = cur.fetchone()
-        conn.close()
         if not p:
             return
 
@@ -335,30 +335,19 @@ class PendingWindow:
         if not messagebox.askyesno("Confirm","Permanently delete this payment?"):
             return
         pid = self.tree.item(sel[0])['values'][0]
-        conn = sqlite3.connect('contractormitra.db')
-        cur = conn.cursor()
-        cur.execute("DELETE FROM payments WHERE id=?", (pid,))
-        conn.commit()
-        conn.close()
+        database.execute("DELETE FROM payments WHERE id=?", (pid,))
         self.load_payments()
         messagebox.showinfo("Success","Payment deleted")
 
     # ---------- EXPORT EXCEL ----------
     def export_excel(self):
-        file = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel","*.xlsx")])
-        if not file:
-            return
-        data = []
-        for child in self.tree.get_children():
-            vals = self.tree.item(child)['values']
-            data.append(vals)
-        if not data:
-            messagebox.showwarning("No Data","Nothing to export")
+        if self.export_task is not None and not self.export_task.finished:
+            messagebox.showwarning("Busy", "An export is already running")
             return
-        cols = ("ID","Customer","Quotation","Due Date","Amount","Paid","Pending","Status")
-        df = pd.DataFrame(data, columns=cols)
-        df.to_excel(file, index=False)
-        messagebox.showinfo("Success",f"Exported to {file}")
+        source = self.grid.source
+        self.export_task = export_dialog(self.window, PAYMENT_COLUMNS,
+                                         lambda conn: source.batches(conn=conn),
+                                         self.export_var, types=source.types) or self.export_task
 
 if __name__ == "__main__":
     root = tk.Tk()
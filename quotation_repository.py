@@ -0,0 +1,125 @@
+"""
+QUOTATION REPOSITORY - ContractorMitra
+Typed quotation model and single-transaction persistence
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import database
+from date_keys import iso_date
+from quote_numbers import next_quote_number
+
+
+@dataclass
+class QuotationItem:
+    name: str
+    quantity: float
+    rate: float
+    unit: str = ""
+    description: str = ""
+    gst_percent: float = 18.0
+
+    @property
+    def amount(self):
+        return self.quantity * self.rate
+
+    @property
+    def gst_amount(self):
+        return self.amount * self.gst_percent / 100
+
+
+@dataclass
+class Quotation:
+    customer_id: int
+    items: list = field(default_factory=list)
+    date: object = None
+    status: str = 'Draft'
+    transport: float = 0.0
+    loading: float = 0.0
+    other_charges: float = 0.0
+    prefix: str = 'QT'
+    period: str = None          # quote number period, defaults to YYYYMMDD
+    description: str = ""       # project description an AI quote was generated from
+
+    @property
+    def charges(self):
+        return self.transport + self.loading + self.other_charges
+
+    def totals(self):
+        """(subtotal, gst_amount, grand_total) in a single pass over the items"""
+        items_total = gst = 0.0
+        for it in self.items:
+            amount = it.quantity * it.rate
+            items_total += amount
+            gst += amount * it.gst_percent / 100
+        subtotal = items_total + self.charges
+        return subtotal, gst, subtotal + gst
+
+    @property
+    def subtotal(self):
+        return self.totals()[0]
+
+    @property
+    def gst_amount(self):
+        return self.totals()[1]
+
+    @property
+    def grand_total(self):
+        return self.totals()[2]
+
+    def date_text(self):
+        """ISO date text, whatever form `date` was given in (the date_key column derives from it)"""
+        return iso_date(self.date or datetime.now())
+
+
+def insert_quotation(conn, quotation):
+    """Insert header and items on an open transaction; returns (id, quote_no)"""
+    quote_no = next_quote_number(conn, quotation.prefix, quotation.period)
+    subtotal, gst_amount, grand_total = quotation.totals()
+    cur = conn.execute('''
+        INSERT INTO quotations (quote_no, customer_id, date, subtotal, transport,
+                                loading, other_charges, gst_amount, grand_total, status, description)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (quote_no, quotation.customer_id, quotation.date_text(), subtotal,
+          quotation.transport, quotation.loading, quotation.other_charges,
+          gst_amount, grand_total, quotation.status, quotation.description))
+    quotation_id = cur.lastrowid
+    insert_items(conn, quotation_id, quotation.items)
+    return quotation_id, quote_no
+
+
+def insert_items(conn, quotation_id, items):
+    conn.executemany('''
+        INSERT INTO quotation_items (quotation_id, item_name, description, quantity,
+                                     unit, rate, gst_percent, amount)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [(quotation_id, it.name, it.description, it.quantity,
+           it.unit, it.rate, it.gst_percent, it.quantity * it.rate) for it in items])
+
+
+def update_quotation(conn, quotation_id, quotation):
+    """Rewrite a saved quotation's header and items on an open transaction; the number is kept"""
+    subtotal, gst_amount, grand_total = quotation.totals()
+    cur = conn.execute('''
+        UPDATE quotations SET customer_id = ?, date = ?, subtotal = ?, transport = ?, loading = ?,
+                              other_charges = ?, gst_amount = ?, grand_total = ?, status = ?, description = ?
+        WHERE id = ?
+    ''', (quotation.customer_id, quotation.date_text(), subtotal, quotation.transport, quotation.loading,
+          quotation.other_charges, gst_amount, grand_total, quotation.status, quotation.description,
+          quotation_id))
+    if cur.rowcount == 0:
+        raise LookupError(f"Quotation {quotation_id} not found")
+    conn.execute("DELETE FROM quotation_items WHERE quotation_id = ?", (quotation_id,))
+    insert_items(conn, quotation_id, quotation.items)
+
+
+def save_quotation(quotation, quotation_id=None):
+    """Save a quotation in one transaction and return (id, quote_no); with
+    quotation_id, the saved quotation is replaced in place"""
+    with database.transaction() as conn:
+        if quotation_id is None:
+            return insert_quotation(conn, quotation)
+        update_quotation(conn, quotation_id, quotation)
+        return quotation_id, conn.execute("SELECT quote_no FROM quotations WHERE id = ?",
+                                          (quotation_id,)).fetchone()[0]
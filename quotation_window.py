@@ -1,9 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
 from datetime import datetime
+import database
+from materials_cache import catalogue
+from quote_numbers import peek_quote_number
+from quotation_repository import Quotation, save_quotation
+from line_items import QuoteLines
 # Line 5 ke baad yeh add karo:
-from pdf_generator import PDFGenerator
+from pdf_jobs import jobs
 from tkinter import filedialog
 import os
 class QuotationWindow:
@@ -14,8 +18,9 @@ class QuotationWindow:
         self.window.geometry("1300x800")
         
         # Variables
-        self.quote_no = self.generate_quote_number()
-        self.items = []
+        self.quote_no = None
+        self.quote_no_var = tk.StringVar(value=f"Quotation No: {self.generate_quote_number()}")
+        self.items = QuoteLines()
         self.item_counter = 0
         
         # Initialize
@@ -23,16 +28,8 @@ class QuotationWindow:
         self.load_customers()
         
     def generate_quote_number(self):
-        """Generate automatic quotation number"""
-        conn = sqlite3.connect('contractormitra.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM quotations")
-        count = cursor.fetchone()[0]
-        conn.close()
-        
-        year = datetime.now().year
-        month = datetime.now().strftime("%m")
-        return f"QT-{year}{month}-{str(count+1).zfill(3)}"
+        """Preview of the next quotation number (reserved on save)"""
+        return peek_quote_number('QT', datetime.now().strftime("%Y%m"))
     
     def setup_ui(self):
         """Setup quotation window UI"""
@@ -47,7 +44,7 @@ class QuotationWindow:
         tk.Label(header_frame, text="CREATE NEW QUOTATION", 
                 font=("Arial", 18, "bold"), fg="#2c3e50").pack(side=tk.LEFT)
         
-        tk.Label(header_frame, text=f"Quotation No: {self.quote_no}", 
+        tk.Label(header_frame, textvariable=self.quote_no_var, 
                 font=("Arial", 12, "bold"), fg="#e74c3c").pack(side=tk.RIGHT)
         
         # Customer selection frame
@@ -79,6 +76,7 @@ class QuotationWindow:
         self.tree.column("#", width=50)
         self.tree.column("Item Description", width=300)
         self.tree.column("Amount (₹)", width=120)
+        self.tree.bind("<Double-1>", self.edit_item)
         
         # Add scrollbar
         scrollbar = ttk.Scrollbar(items_frame, orient="vertical", command=self.tree.yview)
@@ -159,46 +157,30 @@ class QuotationWindow:
     
     def load_customers(self):
         """Load customers into combobox"""
-        conn = sqlite3.connect('contractormitra.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, name, phone FROM customers ORDER BY name")
-        customers = cursor.fetchall()
-        conn.close()
+        customers = database.fetch_all("SELECT id, name, phone FROM customers ORDER BY name")
         
         customer_list = [f"{name} ({phone})" for _, name, phone in customers]
         self.customer_combo['values'] = customer_list
     
     def load_materials(self):
         """Load materials into combobox"""
-        conn = sqlite3.connect('contractormitra.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT name, default_unit, default_rate, default_gst FROM materials ORDER BY name")
-        materials = cursor.fetchall()
-        conn.close()
-        
-        material_list = [name for name, _, _, _ in materials]
-        self.item_combo['values'] = material_list
+        self.item_combo['values'] = catalogue().names
     
     def on_item_selected(self, event):
         """When material is selected from dropdown"""
         material_name = self.item_var.get()
         
-        conn = sqlite3.connect('contractormitra.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT default_unit, default_rate, default_gst FROM materials WHERE name = ?", (material_name,))
-        result = cursor.fetchone()
-        conn.close()
+        material = catalogue().get(material_name)
         
-        if result:
-            unit, rate, gst = result
+        if material:
             # Open dialog to enter quantity
-            self.add_item_with_details(material_name, unit, rate, gst)
+            self.add_item_with_details(material_name, material.unit, material.rate, material.gst)
     
-    def add_item_with_details(self, name, unit, rate, gst):
-        """Add item with details"""
+    def add_item_with_details(self, name, unit, rate, gst, quantity=1.0, slot=None):
+        """Add item with details; with a slot, edit that line instead"""
         # Create dialog for quantity
         dialog = tk.Toplevel(self.window)
-        dialog.title("Add Item")
+        dialog.title("Add Item" if slot is None else "Edit Item")
         dialog.geometry("300x200")
         dialog.transient(self.window)
         dialog.grab_set()
@@ -206,7 +188,7 @@ class QuotationWindow:
         tk.Label(dialog, text=f"Item: {name}", font=("Arial", 10, "bold")).pack(pady=10)
         
         tk.Label(dialog, text="Quantity:").pack()
-        qty_var = tk.DoubleVar(value=1.0)
+        qty_var = tk.DoubleVar(value=quantity)
         tk.Entry(dialog, textvariable=qty_var).pack(pady=5)
         
         tk.Label(dialog, text="Rate (₹):").pack()
@@ -221,34 +203,43 @@ class QuotationWindow:
             quantity = qty_var.get()
             item_rate = rate_var.get()
             item_gst = gst_var.get()
-            amount = quantity * item_rate
             
-            self.item_counter += 1
-            self.tree.insert("", "end", values=(
-                self.item_counter,
-                name,
-                unit,
-                f"{quantity:.2f}",
-                f"{item_rate:.2f}",
-                f"{item_gst:.0f}%",
-                f"{amount:.2f}"
-            ))
-            
-            self.items.append({
-                'name': name,
-                'unit': unit,
-                'quantity': quantity,
-                'rate': item_rate,
-                'gst': item_gst,
-                'amount': amount
-            })
+            if slot is None:
+                line = self.items.add(name, unit or "", quantity, item_rate, item_gst)
+                self.item_counter += 1
+                # Tree rows are keyed by the line's slot: iid = str(slot)
+                self.tree.insert("", "end", iid=str(line), values=(
+                    self.item_counter, name, unit) + self.number_values(line))
+            else:
+                # Only the numeric columns change; display text comes from the model
+                self.items.update(slot, quantity=quantity, rate=item_rate, gst=item_gst)
+                for col, text in zip(self.NUMBER_COLUMNS, self.number_values(slot)):
+                    self.tree.set(str(slot), col, text)
             
             dialog.destroy()
             self.calculate_total()
         
-        tk.Button(dialog, text="Add to Quotation", command=add_and_close,
+        tk.Button(dialog, text="Add to Quotation" if slot is None else "Update Item", command=add_and_close,
                  bg="#27ae60", fg="white").pack(pady=20)
     
+    NUMBER_COLUMNS = ("Quantity", "Rate (₹)", "GST %", "Amount (₹)")
+    
+    def number_values(self, slot):
+        """Display text of a line's numeric columns"""
+        items = self.items
+        return (f"{items.quantity[slot]:.2f}", f"{items.rate[slot]:.2f}",
+                f"{items.gst[slot]:g}%", f"{items.amount(slot):.2f}")
+    
+    def edit_item(self, event):
+        """Edit the double-clicked line"""
+        selected = self.tree.selection()
+        if not selected:
+            return
+        slot = int(selected[0])
+        items = self.items
+        self.add_item_with_details(items.names[slot], items.units[slot], items.rate[slot], items.gst[slot],
+                                   quantity=items.quantity[slot], slot=slot)
+    
     def add_item_manual(self):
         """Add item manually"""
         self.add_item_with_details("Custom Item", "piece", 0.0, 18.0)
@@ -257,22 +248,16 @@ class QuotationWindow:
         """Remove selected item"""
         selected_item = self.tree.selection()
         if selected_item:
-            self.tree.delete(selected_item)
+            for iid in selected_item:
+                self.items.remove(int(iid))
+            self.tree.delete(*selected_item)
             self.calculate_total()
     
     def calculate_total(self):
         """Calculate totals"""
-        subtotal = 0.0
-        gst_total = 0.0
-        
-        # Calculate from tree items
-        for child in self.tree.get_children():
-            values = self.tree.item(child)['values']
-            amount = float(values[6])  # Amount column
-            gst_percent = float(values[5].replace('%', ''))  # GST column
-            
-            subtotal += amount
-            gst_total += (amount * gst_percent / 100)
+        # Running per-slab sums kept by the line model
+        subtotal = self.items.subtotal
+        gst_total = self.items.gst_amount
         
         # Add additional charges
         transport = self.charge_vars['transport'].get()
@@ -287,63 +272,53 @@ class QuotationWindow:
         self.gst_var.set(f"₹ {gst_total:,.2f}")
         self.total_var.set(f"₹ {grand_total:,.2f}")
     
+    def selected_customer_id(self):
+        customer = self.customer_var.get()
+        if '(' in customer:
+            phone = customer.split('(')[1].replace(')', '')
+            result = database.fetch_one("SELECT id FROM customers WHERE phone = ?", (phone,))
+            if result:
+                return result[0]
+        return None
+
+    def build_quotation(self):
+        """Quotation of the lines on screen, in display order"""
+        saved = getattr(self, 'saved_quotation', None)
+        return Quotation(
+            customer_id=self.selected_customer_id(),
+            items=self.items.items(int(iid) for iid in self.tree.get_children()),
+            # An edited quotation keeps the date it was first saved on
+            date=saved.date if saved else datetime.now().date(),
+            transport=self.charge_vars['transport'].get(),
+            loading=self.charge_vars['loading'].get(),
+            other_charges=self.charge_vars['other'].get(),
+            period=datetime.now().strftime("%Y%m")
+        )
+
+    def has_unsaved_changes(self):
+        return self.build_quotation() != getattr(self, 'saved_quotation', None)
+
     def save_draft(self):
-        """Save quotation as draft"""
+        """Save quotation as draft; once saved, later saves update it in place"""
         customer = self.customer_var.get()
         if not customer:
             messagebox.showwarning("Warning", "Please select a customer")
             return
         
-        # Get customer ID from selection
-        customer_id = None
-        if '(' in customer:
-            phone = customer.split('(')[1].replace(')', '')
-            conn = sqlite3.connect('contractormitra.db')
-            cursor = conn.cursor()
-            cursor.execute("SELECT id FROM customers WHERE phone = ?", (phone,))
-            result = cursor.fetchone()
-            if result:
-                customer_id = result[0]
-            conn.close()
-        
-        # Calculate totals
         self.calculate_total()
-        subtotal = float(self.subtotal_var.get().replace('₹', '').replace(',', '').strip())
-        gst_amount = float(self.gst_var.get().replace('₹', '').replace(',', '').strip())
-        grand_total = float(self.total_var.get().replace('₹', '').replace(',', '').strip())
+        quotation = self.build_quotation()
+        quotation_id = getattr(self, 'current_quotation_id', None)
         
-        # Save to database
+        # Save to database: header and items in one transaction
         try:
-            conn = sqlite3.connect('contractormitra.db')
-            cursor = conn.cursor()
-            
-            # Insert quotation
-            cursor.execute('''
-                INSERT INTO quotations (quote_no, customer_id, date, subtotal, transport, 
-                                      loading, other_charges, gst_amount, grand_total, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (self.quote_no, customer_id, datetime.now().date(), subtotal,
-                  self.charge_vars['transport'].get(), self.charge_vars['loading'].get(),
-                  self.charge_vars['other'].get(), gst_amount, grand_total, 'Draft'))
-            
-            quotation_id = cursor.lastrowid
-            self.current_quotation_id = quotation_id  # ← YEH LINE ADD KARO
-            # Insert items
-            for child in self.tree.get_children():
-                values = self.tree.item(child)['values']
-                cursor.execute('''
-                    INSERT INTO quotation_items (quotation_id, item_name, unit, quantity, 
-                                               rate, gst_percent, amount)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (quotation_id, values[1], values[2], 
-                      float(values[3]), float(values[4]), 
-                      float(values[5].replace('%', '')), 
-                      float(values[6])))
-            
-            conn.commit()
-            conn.close()
+            self.current_quotation_id, self.quote_no = save_quotation(quotation, quotation_id)
+            self.saved_quotation = quotation
+            self.quote_no_var.set(f"Quotation No: {self.quote_no}")
             
-            messagebox.showinfo("Success", f"Quotation {self.quote_no} saved as draft!")
+            if quotation_id:
+                messagebox.showinfo("Success", f"Quotation {self.quote_no} updated!")
+            else:
+                messagebox.showinfo("Success", f"Quotation {self.quote_no} saved as draft!")
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save: {str(e)}")
@@ -373,6 +348,11 @@ class QuotationWindow:
                     return
             else:
                 return
+        elif self.has_unsaved_changes():
+            # The PDF is rendered from the stored quotation, so store the edits first
+            self.save_draft()
+            if self.has_unsaved_changes():
+                return
         
         try:
             # File save dialog
@@ -386,29 +366,29 @@ class QuotationWindow:
             if not filename:  # User cancelled
                 return
             
-            # Generate PDF
-            generator = PDFGenerator()
-            success = generator.generate_quotation_pdf(self.current_quotation_id, filename)
-            
-            if success:
-                messagebox.showinfo("Success", f"✅ PDF generated successfully!\n\nSaved to:\n{filename}")
-                
-                # Open PDF option
-                open_pdf = messagebox.askyesno("Open PDF", "Do you want to open the PDF?")
-                if open_pdf:
-                    try:
-                        if os.name == 'nt':  # Windows
-                            os.startfile(filename)
-                        elif os.name == 'posix':  # Linux/Mac
-                            os.system(f'xdg-open "{filename}"')
-                    except Exception as e:
-                        print(f"Could not open PDF: {e}")
-            else:
-                messagebox.showerror("Error", "Failed to generate PDF. Check quotation data.")
+            # Rendered in a worker process; the window stays usable meanwhile
+            jobs().quotation(self.window, self.current_quotation_id, filename,
+                             on_done=self.pdf_ready,
+                             on_error=lambda e: messagebox.showerror("Error", f"Failed to generate PDF: {str(e)}"))
                 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to generate PDF: {str(e)}")
     
+    def pdf_ready(self, filename):
+        """Called on the Tk thread once the PDF job has written `filename`"""
+        messagebox.showinfo("Success", f"✅ PDF generated successfully!\n\nSaved to:\n{filename}")
+        
+        # Open PDF option
+        open_pdf = messagebox.askyesno("Open PDF", "Do you want to open the PDF?")
+        if open_pdf:
+            try:
+                if os.name == 'nt':  # Windows
+                    os.startfile(filename)
+                elif os.name == 'posix':  # Linux/Mac
+                    os.system(f'xdg-open "{filename}"')
+            except Exception as e:
+                print(f"Could not open PDF: {e}")
+    
     def print_quotation(self):
         """Print quotation"""
         messagebox.showinfo("Info", "Print functionality will be implemented in next version")
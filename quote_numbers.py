@@ -0,0 +1,33 @@
+"""
+QUOTE NUMBERS - ContractorMitra
+O(1) quotation number allocation from the quote_sequences table
+"""
+
+from datetime import datetime
+
+import database
+
+
+def format_quote_number(prefix, period, value, width=3):
+    return f"{prefix}-{period}-{value:0{width}d}"
+
+
+def next_quote_number(conn, prefix='QT', period=None, width=3):
+    """Reserve the next number inside the caller's insert transaction"""
+    # The write lock is held until the quotation insert commits, so windows and
+    # processes never share a number and a rolled-back insert returns it.
+    period = period or datetime.now().strftime('%Y%m%d')
+    value = conn.execute('''
+        INSERT INTO quote_sequences (prefix, period, last_value) VALUES (?, ?, 1)
+        ON CONFLICT (prefix, period) DO UPDATE SET last_value = last_value + 1
+        RETURNING last_value
+    ''', (prefix, period)).fetchone()[0]
+    return format_quote_number(prefix, period, value, width)
+
+
+def peek_quote_number(prefix='QT', period=None, width=3):
+    """Number the next save will probably get (not reserved)"""
+    period = period or datetime.now().strftime('%Y%m%d')
+    row = database.fetch_one("SELECT last_value FROM quote_sequences WHERE prefix = ? AND period = ?",
+                             (prefix, period))
+    return format_quote_number(prefix, period, (row[0] if row else 0) + 1, width)
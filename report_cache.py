@@ -0,0 +1,76 @@
+"""
+REPORT CACHE - ContractorMitra
+LRU cache of report pages and summaries with a memory cap; entries are keyed by
+data version, so writes to the underlying tables make old entries unreachable
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+MAX_BYTES = 32 * 1024 * 1024
+REPORT_TABLES = ('quotations', 'quotation_items', 'payments', 'customers')
+
+
+def estimate_size(value):
+    """Rough in-memory size of a result (tuple of values or list of rows)"""
+    size = sys.getsizeof(value)
+    for item in value:
+        if isinstance(item, (tuple, list)):
+            size += estimate_size(item)
+        else:
+            size += sys.getsizeof(item)
+    return size
+
+
+class ResultCache:
+    """Thread-safe LRU over query results, evicting oldest entries past max_bytes"""
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()      # key -> (value, size)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries),
+                'bytes': self.bytes, 'hit_ratio': self.hits / total if total else 0.0}
+
+
+_cache = ResultCache()
+
+
+def report_cache():
+    return _cache
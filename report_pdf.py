@@ -0,0 +1,185 @@
+"""
+REPORT PDF - ContractorMitra
+Report PDFs drawn page by page on a canvas: repeating headers, page and running totals
+"""
+
+from datetime import datetime
+from functools import lru_cache
+from itertools import chain, islice
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+PAGE_SIZE = landscape(A4)
+MARGIN = 12 * mm
+FONT, BOLD = "Helvetica", "Helvetica-Bold"
+FONT_SIZE = 8
+HEADER_SIZE = 9
+ROW_HEIGHT = 13
+PAD = 4                    # points of padding either side of a cell
+SAMPLE_ROWS = 500          # rows measured to size the columns, once per report
+HEADER_BG = colors.HexColor("#3498db")
+STRIPE_BG = colors.HexColor("#f8f9fa")
+TOTAL_BG = colors.HexColor("#E6F3FF")
+
+
+def format_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    return str(value)
+
+
+def _amount(value):
+    """A total column's cell as a number: NULL and text cells add nothing"""
+    return value if isinstance(value, (int, float)) else 0
+
+
+def _numeric(values):
+    kinds = {type(v) for v in values if v is not None}
+    return bool(kinds) and kinds <= {int, float}
+
+
+@lru_cache(maxsize=65536)
+def _fit(text, width, font, size):
+    """(text clipped with '...' to fit `width` points, its width); dates, names and
+    statuses repeat a lot, and reportlab measures text in pure Python"""
+    full = stringWidth(text, font, size)
+    if full <= width:
+        return text, full
+    keep = max(0, int(len(text) * width / full) - 1)
+    while keep and stringWidth(text[:keep] + "...", font, size) > width:
+        keep -= 1
+    return text[:keep] + "...", stringWidth(text[:keep] + "...", font, size)
+
+
+class ReportPDF:
+    """Draws rows onto fixed-layout pages as they arrive; only one page of rows is held at a time"""
+
+    def __init__(self, path, headings, sample, title="ContractorMitra - Report", subtitle="",
+                 totals=None, pagesize=PAGE_SIZE):
+        self.headings = [str(h) for h in headings]
+        self.title = title
+        self.subtitle = subtitle
+        self.width, self.height = pagesize
+        columns = list(zip(*sample)) or [()] * len(self.headings)
+        self.numeric = [_numeric(c) for c in columns]
+        # Page and running totals default to the money (float) columns
+        if totals is None:
+            totals = [i for i, c in enumerate(columns)
+                      if self.numeric[i] and any(isinstance(v, float) for v in c)]
+        self.totals = list(totals)
+        self._layout(columns)
+        self.canvas = canvas.Canvas(path, pagesize=pagesize, pageCompression=1)
+        self.canvas.setTitle(title)
+        self.pages = 0
+        self.rows = 0
+        self.running = [0.0] * len(self.headings)
+
+    # ---------- LAYOUT (computed once) ----------
+    def _layout(self, columns):
+        natural = []
+        for i, heading in enumerate(self.headings):
+            widest = max((stringWidth(format_value(v), FONT, FONT_SIZE) for v in columns[i]), default=0)
+            natural.append(max(stringWidth(heading, BOLD, HEADER_SIZE), widest, 20) + 2 * PAD)
+        usable = self.width - 2 * MARGIN
+        scale = usable / sum(natural)
+        self.col_widths = [w * scale for w in natural]
+        self.col_x = [MARGIN + sum(self.col_widths[:i]) for i in range(len(natural))]
+        self.table_top = self.height - MARGIN - 34
+        # Header row at the top, page total and running total rows at the bottom
+        footer_rows = 2 if self.totals else 0
+        self.rows_per_page = int((self.table_top - MARGIN - 14) / ROW_HEIGHT) - 1 - footer_rows
+
+    # ---------- DRAWING ----------
+    def _rows(self, rows, y, font, size, color):
+        """Rows from baseline y down, a column at a time: left-aligned columns
+        are plain text lines, numeric ones are right-aligned cell by cell"""
+        text = self.canvas.beginText()
+        text.setFont(font, size, ROW_HEIGHT)
+        text.setFillColor(color)
+        for i, width in enumerate(self.col_widths):
+            inner = width - 2 * PAD
+            if self.numeric[i]:
+                right = self.col_x[i] + width - PAD
+                for n, row in enumerate(rows):
+                    s, w = _fit(format_value(row[i]), inner, font, size)
+                    text.setTextOrigin(right - w, y - n * ROW_HEIGHT)
+                    text.textOut(s)
+            else:
+                text.setTextOrigin(self.col_x[i] + PAD, y)
+                for row in rows:
+                    text.textLine(_fit(format_value(row[i]), inner, font, size)[0])
+        self.canvas.drawText(text)
+
+    def _band(self, y, fill):
+        self.canvas.setFillColor(fill)
+        self.canvas.rect(MARGIN, y - 3, self.width - 2 * MARGIN, ROW_HEIGHT, stroke=0, fill=1)
+
+    def _page_header(self, c):
+        c.setFillColor(colors.black)
+        c.setFont(BOLD, 14)
+        c.drawString(MARGIN, self.height - MARGIN - 12, self.title)
+        c.setFont(FONT, FONT_SIZE)
+        c.drawString(MARGIN, self.height - MARGIN - 26, self.subtitle)
+        c.drawRightString(self.width - MARGIN, self.height - MARGIN - 12, f"Page {self.pages}")
+        self._band(self.table_top, HEADER_BG)
+        self._rows([self.headings], self.table_top, BOLD, HEADER_SIZE, colors.white)
+
+    def _total_row(self, y, label, values):
+        self._band(y, TOTAL_BG)
+        row = [None] * len(self.headings)
+        row[0] = label
+        for i in self.totals:
+            row[i] = values[i]
+        self._rows([row], y, BOLD, FONT_SIZE, colors.black)
+
+    def page(self, rows):
+        """Draw one page of at most rows_per_page rows"""
+        c = self.canvas
+        self.pages += 1
+        self._page_header(c)
+        y = self.table_top - ROW_HEIGHT
+        for n in range(1, len(rows), 2):
+            self._band(y - n * ROW_HEIGHT, STRIPE_BG)
+        self._rows(rows, y, FONT, FONT_SIZE, colors.black)
+        page_totals = [0.0] * len(self.headings)
+        for i in self.totals:
+            page_totals[i] = sum(_amount(row[i]) for row in rows)
+        y -= len(rows) * ROW_HEIGHT
+        self.rows += len(rows)
+        if self.totals:
+            for i in self.totals:
+                self.running[i] += page_totals[i]
+            self._total_row(y, "Page total", page_totals)
+            self._total_row(y - ROW_HEIGHT, "Running total", self.running)
+        c.setFont(FONT, 7)
+        c.setFillColor(colors.grey)
+        span = f"Rows {self.rows - len(rows) + 1:,}-{self.rows:,}  |  " if rows else ""
+        c.drawString(MARGIN, MARGIN - 4, f"{span}Generated {datetime.now():%d-%b-%Y %H:%M} by ContractorMitra")
+        c.showPage()
+
+    def save(self):
+        if not self.pages:
+            self.page([])
+        self.canvas.save()
+
+
+def write_pdf(path, headings, batches, step, title="ContractorMitra - Report", subtitle="", totals=None):
+    """exporter-style writer: batches of rows in, one page per rows_per_page rows out"""
+    batches = iter(batches)
+    first = next(batches, [])
+    report = ReportPDF(path, headings, first[:SAMPLE_ROWS], title, subtitle, totals)
+    rows = chain.from_iterable(chain([first], batches))
+    while True:
+        chunk = list(islice(rows, report.rows_per_page))
+        if not chunk:
+            break
+        report.page(chunk)
+        step(len(chunk))
+    report.save()
+    return report.pages
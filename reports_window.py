@@ -6,14 +6,83 @@ Version: 3.0.0
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import sqlite3
 from datetime import datetime, timedelta
-import pandas as pd
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
+from functools import partial
+import database
+from background import BackgroundTask, QueryRunner
+from date_keys import key_date, key_range
+from exporter import export_dialog, write_pdf
+from report_cache import REPORT_TABLES
+from rollups import CUSTOMER_REPORT_SQL, monthly_report_sql
+from virtual_grid import GridSource, VirtualGrid
+
+REPORT_TITLES = {"sales": "Sales Report", "pending": "Pending Payments Report",
+                 "customers": "Customer Report", "materials": "Material Consumption Report",
+                 "monthly": "Monthly Summary Report"}
+
+
+def with_date(row):
+    """Row with its YYYYMMDD day key (column 1) shown as an ISO date"""
+    return (row[0], key_date(row[1])) + tuple(row[2:])
+
+
+def report_cached(rtype, params=()):
+    """Cache options for a report source keyed by type and date range"""
+    return {'cache_key': (rtype,) + tuple(params), 'tables': REPORT_TABLES}
+
+
+# ---------- REPORT SOURCES ----------
+def sales_source(date_range):
+    cols = ("Invoice #", "Date", "Customer", "Subtotal", "GST", "Total", "Status")
+    return GridSource(cols, '''
+        SELECT q.id, q.quote_no, q.date_key, c.name, q.subtotal, q.gst_amount, q.grand_total, q.status
+        FROM quotations q
+        LEFT JOIN customers c ON q.customer_id = c.id
+        WHERE q.date_key BETWEEN ? AND ?
+    ''', date_range, sort=1, descending=True, format_row=with_date, export_row=with_date, not_null=(1,),
+        types=("TEXT", "TEXT", "TEXT", "REAL", "REAL", "REAL", "TEXT"), **report_cached('sales', date_range))
+
+
+def pending_source(date_range):
+    cols = ("Invoice #", "Date", "Customer", "Amount", "Status")
+    return GridSource(cols, '''
+        SELECT q.id, q.quote_no, q.date_key, c.name, q.grand_total, q.status
+        FROM quotations q
+        LEFT JOIN customers c ON q.customer_id = c.id
+        WHERE q.status IN ('Draft','Sent') AND q.date_key BETWEEN ? AND ?
+    ''', date_range, sort=1, format_row=with_date, export_row=with_date, not_null=(1,),
+        types=("TEXT", "TEXT", "TEXT", "REAL", "TEXT"), **report_cached('pending', date_range))
+
+
+def customer_report_source():
+    cols = ("Customer", "Phone", "Email", "Invoices", "Total Spent")
+    # customer_rollup holds invoice count and lifetime value per customer
+    return GridSource(cols, CUSTOMER_REPORT_SQL, sort=4, descending=True,
+                      types=("TEXT", "TEXT", "TEXT", "INTEGER", "REAL"), **report_cached('customers'))
+
+
+def materials_source(date_range):
+    cols = ("Material", "Unit", "Quantity", "Total Value")
+    return GridSource(cols, '''
+        SELECT qi.item_name, qi.item_name, qi.unit,
+               SUM(qi.quantity),
+               SUM(qi.amount)
+        FROM quotation_items qi
+        JOIN quotations q ON qi.quotation_id = q.id
+        WHERE q.date_key BETWEEN ? AND ?
+        GROUP BY qi.item_name
+    ''', date_range, sort=3, descending=True, types=("TEXT", "TEXT", "REAL", "REAL"),
+        **report_cached('materials', date_range))
+
+
+def monthly_source(date_from, date_to):
+    cols = ("Month", "Invoices", "Sales", "GST", "Net")
+    # Whole months come from monthly_rollup; only partial edge months touch quotations
+    sql, params = monthly_report_sql(date_from, date_to)
+    return GridSource(cols, sql, params, sort=0, descending=True,
+                      format_row=lambda r: (r[0], r[1], f"Rs. {r[2]:,.2f}", f"Rs. {r[3]:,.2f}", f"Rs. {r[4]:,.2f}"),
+                      types=("TEXT", "INTEGER", "REAL", "REAL", "REAL"),
+                      **report_cached('monthly', key_range(date_from, date_to)))
 
 class ModernStyle:
     BG_COLOR = "#f5f5f7"
@@ -50,11 +119,14 @@ class ReportsWindow:
         self.date_from.set(first.strftime("%Y-%m-%d"))
         self.date_to.set(today.strftime("%Y-%m-%d"))
 
-        self.current_data = []
-        self.current_columns = []
+        self.current_source = None
+        self.export_task = None
+        # Report SQL runs on a worker over its own read connection
+        self.runner = QueryRunner(self.window, on_busy=self.set_busy)
 
         self.center_window()
         self.setup_ui()
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
         self.generate_report()
 
     def center_window(self):
@@ -166,9 +238,16 @@ class ReportsWindow:
         tk.Label(row4, textvariable=self.summary_var, font=ModernStyle.FONT_NORMAL,
                  fg=ModernStyle.ACCENT_BLUE, bg=ModernStyle.BG_COLOR).pack(side=tk.LEFT, padx=5)
 
-        self.create_modern_button(row4, "📊 Excel", self.export_excel, ModernStyle.ACCENT_GREEN, 100).pack(side=tk.RIGHT, padx=5)
+        self.create_modern_button(row4, "📊 Export", self.export_excel, ModernStyle.ACCENT_GREEN, 100).pack(side=tk.RIGHT, padx=5)
         self.create_modern_button(row4, "📄 PDF", self.export_pdf, ModernStyle.ACCENT_ORANGE, 100).pack(side=tk.RIGHT, padx=5)
-        self.create_modern_button(row4, "❌ Close", self.window.destroy, ModernStyle.TEXT_SECONDARY, 100).pack(side=tk.RIGHT, padx=5)
+        self.create_modern_button(row4, "📑 Quote PDFs", self.batch_pdfs, ModernStyle.ACCENT_PURPLE, 120).pack(side=tk.RIGHT, padx=5)
+        self.create_modern_button(row4, "❌ Close", self.close, ModernStyle.TEXT_SECONDARY, 100).pack(side=tk.RIGHT, padx=5)
+        self.create_modern_button(row4, "⏹ Cancel", self.cancel_report, ModernStyle.ACCENT_RED, 100).pack(side=tk.RIGHT, padx=5)
+        self.progress = ttk.Progressbar(row4, mode="indeterminate", length=120)
+        self.progress.pack(side=tk.RIGHT, padx=10)
+        self.export_var = tk.StringVar(value="")
+        tk.Label(row4, textvariable=self.export_var, font=ModernStyle.FONT_SMALL,
+                 fg=ModernStyle.TEXT_SECONDARY, bg=ModernStyle.BG_COLOR).pack(side=tk.RIGHT, padx=5)
 
     def setup_treeview(self, parent):
         style = ttk.Style()
@@ -181,7 +260,7 @@ class ReportsWindow:
 
         self.tree = ttk.Treeview(parent, show="headings", height=14, style="Treeview")
         scroll = ttk.Scrollbar(parent, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scroll.set)
+        self.grid = VirtualGrid(self.tree, scroll, runner=self.runner, on_error=self.report_failed)
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scroll.pack(side=tk.RIGHT, fill=tk.Y)
 
@@ -204,187 +283,163 @@ class ReportsWindow:
         self.generate_report()
 
     # ---------- REPORT GENERATORS (ALL REAL DATA) ----------
+    # Each generator returns (GridSource, summary aggregates, summary text); the grid
+    # pages through the source and the summary is one aggregate query, both on the runner
     def generate_report(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        self.current_data = []
-        self.current_columns = []
+        self.runner.cancel()
         rtype = self.report_type.get()
-        if rtype == "sales":
-            self.generate_sales()
-        elif rtype == "pending":
-            self.generate_pending()
-        elif rtype == "customers":
-            self.generate_customers()
-        elif rtype == "materials":
-            self.generate_materials()
-        elif rtype == "monthly":
-            self.generate_monthly()
+        try:
+            if rtype == "sales":
+                source, aggregates, describe = self.generate_sales()
+            elif rtype == "pending":
+                source, aggregates, describe = self.generate_pending()
+            elif rtype == "customers":
+                source, aggregates, describe = self.generate_customers()
+            elif rtype == "materials":
+                source, aggregates, describe = self.generate_materials()
+            elif rtype == "monthly":
+                source, aggregates, describe = self.generate_monthly()
+        except ValueError as e:
+            messagebox.showerror("Invalid Date", str(e))
+            return
+        self.current_source = source
+        self.grid.load(source)
+        values = source.peek_summary(*aggregates)
+        if values is not None:
+            self.summary_var.set(describe(values))
+            return
+        self.summary_var.set("Running report...")
+        self.runner.submit(lambda conn: source.summary(*aggregates, conn=conn),
+                           lambda values: self.summary_var.set(describe(values)),
+                           self.report_failed)
+
+    def cancel_report(self):
+        if self.runner.busy:
+            self.runner.cancel()
+            self.summary_var.set("Report cancelled")
+        if self.export_task is not None and not self.export_task.finished:
+            self.export_task.cancel()
+
+    def report_failed(self, error):
+        self.summary_var.set("")
+        messagebox.showerror("Error", f"Report failed: {error}")
+
+    def set_busy(self, busy):
+        if busy:
+            self.progress.start(10)
+        else:
+            self.progress.stop()
+
+    def close(self):
+        self.runner.close()
+        if self.export_task is not None:
+            self.export_task.cancel()
+        self.window.destroy()
+
+    def _range(self):
+        """Inclusive (from, to) YYYYMMDD keys; ValueError for an unreadable date"""
+        return key_range(self.date_from.get(), self.date_to.get())
 
     # ---------- 1. SALES REPORT ----------
     def generate_sales(self):
-        cols = ("Invoice #", "Date", "Customer", "Subtotal", "GST", "Total", "Status")
-        self._set_cols(cols)
-        conn = sqlite3.connect('contractormitra.db')
-        cur = conn.cursor()
-        cur.execute('''
-            SELECT q.quote_no, q.date, c.name, q.subtotal, q.gst_amount, q.grand_total, q.status
-            FROM quotations q
-            LEFT JOIN customers c ON q.customer_id = c.id
-            WHERE q.date BETWEEN ? AND ?
-            ORDER BY q.date DESC
-        ''', (self.date_from.get(), self.date_to.get()))
-        rows = cur.fetchall()
-        conn.close()
-        total_sales = 0
-        for r in rows:
-            total_sales += r[5] or 0
-            self.tree.insert("", "end", values=r)
-            self.current_data.append(r)
-        self.summary_var.set(f"Total Sales: Rs. {total_sales:,.2f}  |  Invoices: {len(rows)}")
+        return (sales_source(self._range()), ("COALESCE(SUM(c5), 0)", "COUNT(*)"),
+                lambda v: f"Total Sales: Rs. {v[0]:,.2f}  |  Invoices: {v[1]}")
 
     # ---------- 2. PENDING PAYMENTS REPORT ----------
     def generate_pending(self):
-        cols = ("Invoice #", "Date", "Customer", "Amount", "Status")
-        self._set_cols(cols)
-        conn = sqlite3.connect('contractormitra.db')
-        cur = conn.cursor()
-        cur.execute('''
-            SELECT q.quote_no, q.date, c.name, q.grand_total, q.status
-            FROM quotations q
-            LEFT JOIN customers c ON q.customer_id = c.id
-            WHERE q.status IN ('Draft','Sent') AND q.date BETWEEN ? AND ?
-            ORDER BY q.date
-        ''', (self.date_from.get(), self.date_to.get()))
-        rows = cur.fetchall()
-        conn.close()
-        total = 0
-        for r in rows:
-            total += r[3] or 0
-            self.tree.insert("", "end", values=r)
-            self.current_data.append(r)
-        self.summary_var.set(f"Total Pending: Rs. {total:,.2f}")
+        return pending_source(self._range()), ("COALESCE(SUM(c3), 0)",), lambda v: f"Total Pending: Rs. {v[0]:,.2f}"
 
     # ---------- 3. CUSTOMER REPORT ----------
     def generate_customers(self):
-        cols = ("Customer", "Phone", "Email", "Invoices", "Total Spent")
-        self._set_cols(cols)
-        conn = sqlite3.connect('contractormitra.db')
-        cur = conn.cursor()
-        cur.execute('''
-            SELECT c.name, c.phone, c.email,
-                   COUNT(q.id),
-                   COALESCE(SUM(q.grand_total),0)
-            FROM customers c
-            LEFT JOIN quotations q ON c.id = q.customer_id
-            GROUP BY c.id
-            ORDER BY 5 DESC
-        ''')
-        rows = cur.fetchall()
-        conn.close()
-        total_spent = 0
-        for r in rows:
-            total_spent += r[4]
-            self.tree.insert("", "end", values=r)
-            self.current_data.append(r)
-        self.summary_var.set(f"Total Revenue: Rs. {total_spent:,.2f} | Customers: {len(rows)}")
+        return (customer_report_source(), ("COALESCE(SUM(c4), 0)", "COUNT(*)"),
+                lambda v: f"Total Revenue: Rs. {v[0]:,.2f} | Customers: {v[1]}")
 
     # ---------- 4. MATERIAL CONSUMPTION REPORT ----------
     def generate_materials(self):
-        cols = ("Material", "Unit", "Quantity", "Total Value")
-        self._set_cols(cols)
-        conn = sqlite3.connect('contractormitra.db')
-        cur = conn.cursor()
-        cur.execute('''
-            SELECT qi.item_name, qi.unit,
-                   SUM(qi.quantity),
-                   SUM(qi.amount)
-            FROM quotation_items qi
-            JOIN quotations q ON qi.quotation_id = q.id
-            WHERE q.date BETWEEN ? AND ?
-            GROUP BY qi.item_name
-            ORDER BY 4 DESC
-        ''', (self.date_from.get(), self.date_to.get()))
-        rows = cur.fetchall()
-        conn.close()
-        total_val = 0
-        for r in rows:
-            total_val += r[3]
-            self.tree.insert("", "end", values=r)
-            self.current_data.append(r)
-        self.summary_var.set(f"Total Material Value: Rs. {total_val:,.2f}")
+        return (materials_source(self._range()), ("COALESCE(SUM(c3), 0)",),
+                lambda v: f"Total Material Value: Rs. {v[0]:,.2f}")
 
     # ---------- 5. MONTHLY SUMMARY REPORT ----------
     def generate_monthly(self):
-        cols = ("Month", "Invoices", "Sales", "GST", "Net")
-        self._set_cols(cols)
-        conn = sqlite3.connect('contractormitra.db')
-        cur = conn.cursor()
-        cur.execute('''
-            SELECT strftime('%Y-%m', date),
-                   COUNT(*),
-                   COALESCE(SUM(grand_total),0),
-                   COALESCE(SUM(gst_amount),0)
-            FROM quotations
-            WHERE date BETWEEN ? AND ?
-            GROUP BY 1
-            ORDER BY 1 DESC
-        ''', (self.date_from.get(), self.date_to.get()))
-        rows = cur.fetchall()
-        conn.close()
-        total_sales = 0
-        for r in rows:
-            net = r[2] - r[3]
-            total_sales += r[2]
-            display = (r[0], r[1], f"Rs. {r[2]:,.2f}", f"Rs. {r[3]:,.2f}", f"Rs. {net:,.2f}")
-            self.tree.insert("", "end", values=display)
-            self.current_data.append(r)
-        self.summary_var.set(f"Total Sales: Rs. {total_sales:,.2f}")
-
-    def _set_cols(self, cols):
-        self.current_columns = cols
-        self.tree['columns'] = cols
-        self.tree['show'] = 'headings'
-        for c in cols:
-            self.tree.heading(c, text=c)
-            self.tree.column(c, width=120)
+        return (monthly_source(self.date_from.get(), self.date_to.get()), ("COALESCE(SUM(c2), 0)",),
+                lambda v: f"Total Sales: Rs. {v[0]:,.2f}")
 
     # ---------- EXPORT ----------
     def export_excel(self):
-        if not self.current_data:
+        if not self.current_source:
             messagebox.showwarning("No Data", "Generate a report first.")
             return
-        file = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel","*.xlsx")])
-        if not file:
+        if self.export_task is not None and not self.export_task.finished:
+            messagebox.showwarning("Busy", "An export is already running")
             return
-        df = pd.DataFrame(self.current_data, columns=self.current_columns)
-        df.to_excel(file, index=False)
-        messagebox.showinfo("Success", f"Exported to {file}")
+        # Streams the whole report (not just the rows on screen) as XLSX, CSV or Parquet
+        source = self.current_source
+        self.export_task = export_dialog(self.window, source.headings,
+                                         lambda conn: source.batches(conn=conn),
+                                         self.export_var, self.progress, types=source.types) or self.export_task
 
     def export_pdf(self):
-        if not self.current_data:
+        if not self.current_source:
             messagebox.showwarning("No Data", "Generate a report first.")
             return
-        file = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF","*.pdf")])
-        if not file:
+        if self.export_task is not None and not self.export_task.finished:
+            messagebox.showwarning("Busy", "An export is already running")
+            return
+        # Drawn a page at a time with repeating headers and page/running totals
+        source, rtype = self.current_source, self.report_type.get()
+        subtitle = "" if rtype == "customers" else f"{self.date_from.get()} to {self.date_to.get()}"
+        writer = partial(write_pdf, title=f"ContractorMitra - {REPORT_TITLES[rtype]}", subtitle=subtitle)
+        self.export_task = export_dialog(self.window, source.headings,
+                                         lambda conn: source.batches(conn=conn),
+                                         self.export_var, self.progress,
+                                         filetypes=[("PDF", "*.pdf")], writer=writer) or self.export_task
+
+    def batch_pdfs(self):
+        """Re-issue the PDF of every quotation in the date range (pending: Draft/Sent only)"""
+        if self.export_task is not None and not self.export_task.finished:
+            messagebox.showwarning("Busy", "An export is already running")
+            return
+        try:
+            date_range = self._range()
+        except ValueError as e:
+            messagebox.showerror("Invalid Date", str(e))
+            return
+        out_dir = filedialog.askdirectory(parent=self.window, title="Folder for quotation PDFs")
+        if not out_dir:
             return
-        doc = SimpleDocTemplate(file, pagesize=landscape(A4))
-        story = []
-        styles = getSampleStyleSheet()
-        story.append(Paragraph("ContractorMitra - Report", styles['Title']))
-        story.append(Spacer(1, 0.2*inch))
-        data = [self.current_columns] + [list(map(str,r)) for r in self.current_data]
-        t = Table(data)
-        t.setStyle(TableStyle([
-            ('BACKGROUND',(0,0),(-1,0),colors.HexColor(ModernStyle.ACCENT_BLUE)),
-            ('TEXTCOLOR',(0,0),(-1,0),colors.white),
-            ('ALIGN',(0,0),(-1,-1),'CENTER'),
-            ('FONTNAME',(0,0),(-1,0),'Helvetica-Bold'),
-            ('GRID',(0,0),(-1,-1),1,colors.black)
-        ]))
-        story.append(t)
-        doc.build(story)
-        messagebox.showinfo("Success", f"Exported to {file}")
+        statuses = ('Draft', 'Sent') if self.report_type.get() == "pending" else None
+
+        def work(task):
+            from batch_pdf import quotation_ids, render_batch
+            conn = database.open_reader()
+            try:
+                ids = quotation_ids(conn, key_date(date_range[0]), key_date(date_range[1]), statuses)
+                return render_batch(ids, out_dir, conn=conn, progress=task.progress,
+                                    cancelled=task.cancelled.is_set)
+            finally:
+                conn.close()
+
+        def on_done(result):
+            self.progress.stop()
+            if result.cancelled:
+                self.export_var.set(f"PDFs cancelled after {len(result.rendered):,}")
+                return
+            self.export_var.set(f"{len(result.rendered):,} PDFs, {result.docs_per_second:.1f}/s")
+            text = f"Rendered {len(result.rendered):,} quotation PDFs into {out_dir} in {result.seconds:.1f} s"
+            if result.failed:
+                text += f"\n{len(result.failed)} failed, first: {result.failed[0][1]}"
+            messagebox.showinfo("Quotation PDFs", text)
+
+        def on_error(e):
+            self.progress.stop()
+            self.export_var.set("")
+            messagebox.showerror("Error", f"Batch PDF failed: {e}")
+
+        self.export_var.set("Reading quotations...")
+        self.progress.start(10)
+        self.export_task = BackgroundTask(
+            self.window, work, lambda done, total: self.export_var.set(f"PDFs {done:,}/{total:,}"),
+            on_done, on_error).start()
 
 if __name__ == "__main__":
     root = tk.Tk()
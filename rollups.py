@@ -0,0 +1,140 @@
+"""
+ROLLUPS - ContractorMitra
+Trigger-maintained monthly and per-customer sales totals: report SQL, rebuild and consistency check
+Usage: python rollups.py [check|rebuild] [--db PATH]
+"""
+
+import argparse
+import sqlite3
+import sys
+from datetime import timedelta
+
+from date_keys import key_range, parse_date
+
+TOLERANCE = 0.005          # rupees; running sums drift by float rounding only
+
+MONTHLY_EXPECTED = '''
+    SELECT strftime('%Y-%m', date), COUNT(*),
+           COALESCE(SUM(grand_total), 0), COALESCE(SUM(gst_amount), 0)
+    FROM quotations
+    WHERE strftime('%Y-%m', date) IS NOT NULL
+    GROUP BY 1
+'''
+
+CUSTOMER_EXPECTED = '''
+    SELECT customer_id, COUNT(*), COALESCE(SUM(grand_total), 0)
+    FROM quotations
+    WHERE customer_id IS NOT NULL
+    GROUP BY customer_id
+'''
+
+
+# ---------- REBUILD / CHECK ----------
+def rebuild(conn):
+    """Recompute both rollups from the raw tables (run inside a transaction)"""
+    conn.execute("DELETE FROM monthly_rollup")
+    conn.execute("INSERT INTO monthly_rollup (month, invoices, sales, gst) " + MONTHLY_EXPECTED)
+    conn.execute("DELETE FROM customer_rollup")
+    conn.execute("INSERT INTO customer_rollup (customer_id, invoices, lifetime_value) " + CUSTOMER_EXPECTED)
+    # Every customer has a row, so the customer report can be read from the rollup alone
+    conn.execute("INSERT OR IGNORE INTO customer_rollup (customer_id) SELECT id FROM customers")
+
+
+def _differences(table, expected, actual):
+    problems = []
+    for key in sorted(set(expected) | set(actual), key=str):
+        want, got = expected.get(key), actual.get(key)
+        if want is None or got is None or want[0] != got[0] or \
+                any(abs(a - b) > TOLERANCE for a, b in zip(want[1:], got[1:])):
+            problems.append((table, key, want, got))
+    return problems
+
+
+def check(conn):
+    """(table, key, expected, actual) for every rollup row that disagrees with the raw tables"""
+    expected = {r[0]: r[1:] for r in conn.execute(MONTHLY_EXPECTED)}
+    actual = {r[0]: r[1:] for r in conn.execute("SELECT month, invoices, sales, gst FROM monthly_rollup")}
+    problems = _differences('monthly_rollup', expected, actual)
+
+    expected = {r[0]: r[1:] for r in conn.execute(CUSTOMER_EXPECTED)}
+    for (customer_id,) in conn.execute("SELECT id FROM customers"):
+        expected.setdefault(customer_id, (0, 0.0))
+    actual = {r[0]: r[1:] for r in conn.execute("SELECT customer_id, invoices, lifetime_value FROM customer_rollup")}
+    # Zero rows for deleted customers are harmless
+    actual = {k: v for k, v in actual.items() if k in expected or v[0] != 0}
+    return problems + _differences('customer_rollup', expected, actual)
+
+
+# ---------- REPORT SQL ----------
+def split_months(start, end):
+    """(first, last) whole months inside the date range, or None, plus the leftover day ranges"""
+    first = start if start.day == 1 else (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    month_after_end = (end.replace(day=28) + timedelta(days=4)).replace(day=1)
+    last_end = end if end + timedelta(days=1) == month_after_end else end.replace(day=1) - timedelta(days=1)
+    if first > last_end:
+        return None, [(start, end)]
+    edges = []
+    if start < first:
+        edges.append((start, first - timedelta(days=1)))
+    if end > last_end:
+        edges.append((last_end + timedelta(days=1), end))
+    return (first.strftime('%Y-%m'), last_end.strftime('%Y-%m')), edges
+
+
+def monthly_report_sql(date_from, date_to):
+    """(sql, params) for key, month, invoices, sales, GST, net between two dates:
+    whole months come from monthly_rollup, partial months at the edges from quotations.
+    Raises ValueError for an unreadable date."""
+    raw = '''
+        SELECT strftime('%Y-%m', date), strftime('%Y-%m', date), COUNT(*),
+               COALESCE(SUM(grand_total),0), COALESCE(SUM(gst_amount),0),
+               COALESCE(SUM(grand_total),0) - COALESCE(SUM(gst_amount),0)
+        FROM quotations
+        WHERE {where}
+        GROUP BY 1
+    '''
+    months, edges = split_months(parse_date(date_from), parse_date(date_to))
+    parts, params = [], []
+    if months:
+        parts.append("SELECT month, month, invoices, sales, gst, sales - gst "
+                     "FROM monthly_rollup WHERE month BETWEEN ? AND ?")
+        params += months
+    if edges:
+        parts.append(raw.format(where=" OR ".join(["date_key BETWEEN ? AND ?"] * len(edges))))
+        for edge in edges:
+            params += key_range(*edge)
+    return " UNION ALL ".join(parts), tuple(params)
+
+
+CUSTOMER_REPORT_SQL = '''
+    SELECT r.customer_id, c.name, c.phone, c.email, r.invoices, r.lifetime_value
+    FROM customer_rollup r
+    JOIN customers c ON c.id = r.customer_id
+'''
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ContractorMitra report rollups")
+    parser.add_argument('command', nargs='?', default='check', choices=['check', 'rebuild'])
+    parser.add_argument('--db', default='contractormitra.db')
+    args = parser.parse_args(argv)
+
+    import migrations
+    conn = sqlite3.connect(args.db, isolation_level=None)
+    try:
+        migrations.migrate(conn)
+        if args.command == 'rebuild':
+            conn.execute("BEGIN IMMEDIATE")
+            rebuild(conn)
+            conn.execute("COMMIT")
+        problems = check(conn)
+        for table, key, want, got in problems[:50]:
+            print(f"MISMATCH {table} {key}: expected {want}, found {got}")
+        print(f"{len(problems)} rollup rows out of step" if problems else "Rollups match the raw tables")
+        return 1 if problems else 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
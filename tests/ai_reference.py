@@ -0,0 +1,71 @@
+"""
+AI REFERENCE - ContractorMitra
+The if-chain the AI rule engine replaced, and the project descriptions it is checked on.
+benchmark.py times the same pair
+"""
+
+import re
+
+
+def legacy_ai_lines(d):
+    """generate_ai_quote's hard-coded if-chain, as [name, quantity, rate] items"""
+    items = []
+
+    def extract_qty(text, keys):
+        return sum(int(x) for k in keys for x in re.findall(r'(\d+)\s*' + re.escape(k), text))
+
+    def add(name, qty, rate):
+        if qty <= 0:
+            return
+        for item in items:
+            if item[0] == name and item[2] == rate:
+                item[1] += qty
+                return
+        items.append([name, qty, rate])
+
+    if 'wire' in d or 'cable' in d:
+        qty = extract_qty(d, ['wire', 'cable'])
+        if qty > 0:
+            add("1.5 sq.mm Copper Wire", qty, 48.0)
+            if 'power' in d or '3 phase' in d:
+                add("2.5 sq.mm Copper Wire", qty // 2, 65.0)
+    if 'light' in d or 'led' in d:
+        add("LED Panel Light 18W", extract_qty(d, ['light', 'led']), 450.0)
+    if 'fan' in d:
+        add("Ceiling Fan", extract_qty(d, ['fan']), 1500.0)
+    if 'socket' in d:
+        qty = extract_qty(d, ['socket'])
+        add("15A Socket", qty, 150.0)
+        add("5A Socket", qty, 120.0)
+    if 'switch' in d or 'modular' in d:
+        qty = extract_qty(d, ['switch', 'modular'])
+        if qty == 0:
+            qty = extract_qty(d, ['socket']) + 5
+        add("Modular Switch 1-Gang", qty, 180.0)
+    if 'mcb' in d or 'distribution' in d:
+        add("6A MCB", 4, 200.0)
+        add("Distribution Box 8-way", 1, 800.0)
+        if '3 phase' in d or 'industrial' in d:
+            add("Industrial MCB 63A", 1, 850.0)
+    if 'conduit' in d or 'pipe' in d:
+        add("20mm PVC Conduit", extract_qty(d, ['conduit', 'pipe']), 30.0)
+    area = extract_qty(d, ['sqft', 'square'])
+    add("Electrical Labour", max(5, area // 150) if area > 0 else max(5, len(items) + 2), 300.0)
+    return items
+
+
+def project_description(rnd, rooms):
+    """Multi-room BOQ text the way site engineers type it"""
+    kinds = ["bedroom", "hall", "kitchen", "bathroom", "office", "store", "lobby", "balcony"]
+    parts = []
+    for n in range(rooms):
+        words = [f"{rnd.choice(kinds)} {n + 1}:"]
+        words += rnd.sample([f"{rnd.randint(1, 12)} led lights", f"{rnd.randint(1, 4)} fans",
+                             f"{rnd.randint(2, 10)} sockets", f"{rnd.randint(10, 90)} meter wire",
+                             f"{rnd.randint(5, 40)} conduit pipe", "modular switch board",
+                             f"{rnd.randint(1, 3)} cable trays", "false ceiling", "putty and paint",
+                             "3 phase supply", "new mcb", f"{rnd.randint(1, 4)} taps", "cp fittings"],
+                            rnd.randint(3, 7))
+        parts.append(", ".join(words))
+    parts.append(f"total area {rnd.randint(500, 20000)} sqft")
+    return ". ".join(parts)
@@ -0,0 +1,31 @@
+"""
+CONFTEST - ContractorMitra
+Shared fixtures: every test runs against its own freshly migrated database
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Path of a migrated database that the shared pool points at"""
+    path = str(tmp_path / 'test.db')
+    database.configure(path)
+    yield path
+    database.close()
+
+
+@pytest.fixture
+def pdf_store(tmp_path):
+    """Shared PDF cache pointed at an empty directory"""
+    import pdf_cache
+    store = pdf_cache.configure(str(tmp_path / 'pdf_cache'))
+    yield store
+    pdf_cache.configure(pdf_cache.CACHE_DIR)
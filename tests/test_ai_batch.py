@@ -0,0 +1,79 @@
+"""
+TEST AI BATCH - ContractorMitra
+Headless AI quotations: input files, customer lookup and the batch stages
+"""
+
+import pytest
+
+import ai_batch
+import database
+from ai_batch import BatchRow, read_rows, resolve_customers, run_batch
+
+
+@pytest.fixture
+def customers(db):
+    with database.transaction() as conn:
+        conn.executemany("INSERT INTO customers (name, phone) VALUES (?, ?)",
+                         [("Ravi Kumar", "9876543210"), ("Anita Sharma", "9123456780")])
+    return db
+
+
+def test_read_rows_from_csv_and_jsonl(tmp_path):
+    path = tmp_path / 'flats.csv'
+    path.write_text("Description,Customer\n10 led lights,Ravi Kumar\n,,\n4 fans\n", encoding='utf-8')
+    assert read_rows(str(path)) == [BatchRow(2, "Ravi Kumar", "10 led lights"), BatchRow(4, "", "4 fans")]
+    path = tmp_path / 'flats.jsonl'
+    path.write_text('{"customer": 1, "description": " 4 fans "}\n\n{"description": "x"}\n', encoding='utf-8')
+    assert read_rows(str(path)) == [BatchRow(1, "1", "4 fans"), BatchRow(3, "", "x")]
+    path = tmp_path / 'bad.csv'
+    path.write_text("name,text\n", encoding='utf-8')
+    with pytest.raises(ValueError):
+        read_rows(str(path))
+
+
+def test_customers_by_id_phone_or_name(customers):
+    with database.transaction() as conn:
+        assert resolve_customers(conn, ["1", "9123456780", "Ravi Kumar", "Nobody", ""]) == {
+            "1": 1, "9123456780": 2, "Ravi Kumar": 1}
+        assert resolve_customers(conn, ["Nobody"], create=True) == {"Nobody": 3}
+
+
+def test_batch_saves_what_it_can_and_reports_the_rest(customers):
+    rows = [BatchRow(2, "Ravi Kumar", "10 led lights and 4 fans"), BatchRow(3, "Nobody", "4 fans"),
+            BatchRow(4, "2", ""), BatchRow(5, "2", "paint the hall"), BatchRow(6, "9123456780", "20 sockets")]
+    # The seeded labour rule fires on anything; without it, unmatched text generates nothing
+    database.execute("UPDATE ai_rules SET active = 0 WHERE name = 'Labour'")
+    result = run_batch(rows, workers=0)
+    assert [line for line, _, _ in result.saved] == [2, 6]
+    assert result.failed == [(3, "unknown customer 'Nobody'"), (4, "empty description"), (5, "no items matched")]
+    assert set(result.timings) == {'customers', 'generate', 'save'}
+    assert database.fetch_one("SELECT COUNT(*) FROM quotations")[0] == 2
+    assert database.fetch_one("SELECT SUM(invoices) FROM customer_rollup")[0] == 2
+
+
+def test_worker_pool_generates_the_same_lines(customers):
+    descriptions = [f"{n} led lights, {n % 5 + 1} fans, {10 * n} meter wire" for n in range(1, 31)]
+    in_process = ai_batch.generate_all(descriptions, workers=0)
+    assert ai_batch.generate_all(descriptions, workers=1, pool_min=0) == in_process
+
+
+class FakePool:
+    """ProcessPoolExecutor stand-in that maps in this process"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def map(self, fn, chunks):
+        return map(fn, chunks)
+
+
+def test_two_hundred_flats_reach_the_pool(customers, monkeypatch):
+    pools = []
+    monkeypatch.setattr(ai_batch, 'ProcessPoolExecutor', lambda *args: pools.append(args) or FakePool())
+    descriptions = ["4 fans"] * 200
+    assert len(ai_batch.generate_all(descriptions, workers=2, db_path='unused.db')) == 200
+    assert len(pools) == 1
+    assert len(ai_batch.generate_all(descriptions, workers=2, pool_min=500)) == 200 and len(pools) == 1
@@ -0,0 +1,119 @@
+"""
+TEST AI RULES - ContractorMitra
+The seeded rules against generate_ai_quote's old if-chain, added synonyms, pricing and the generation cache
+"""
+
+import random
+
+import pytest
+
+import database
+from ai_rules import DEFAULT_GST, GenerationCache, RuleEngine, engine, generate_lines, load_rules, normalize, price
+from ai_reference import legacy_ai_lines, project_description
+
+
+SYNONYMS = [('sq ft', 'sqft'), ('sq.ft', 'sqft'), ('wiring', 'wire'), ('bulb', 'light'), ('plug point', 'socket')]
+
+
+def merged(lines):
+    """Engine lines as the old chain's [name, quantity, rate] items"""
+    items = []
+    for line in lines:
+        for item in items:
+            if item[0] == line.name and item[2] == line.rate:
+                item[1] += line.quantity
+                break
+        else:
+            items.append([line.name, line.quantity, line.rate])
+    return items
+
+
+@pytest.fixture
+def seeded(db):
+    with database.connection() as conn:
+        return load_rules(conn)
+
+
+def test_seeded_rules_match_the_old_chain(seeded):
+    assert seeded[1] == []
+    plain = RuleEngine(*seeded)
+    rnd = random.Random(11)
+    for _ in range(500):
+        d = project_description(rnd, rnd.randint(0, 3)).lower()
+        if rnd.random() < 0.3:
+            d = d.replace("sqft", "square feet")
+        assert merged(plain.evaluate(d)) == legacy_ai_lines(d), d
+
+
+@pytest.mark.parametrize('description, old, new', [
+    ("10 led lights, 1200 sq ft",
+     [["LED Panel Light 18W", 10, 450.0], ["Electrical Labour", 5, 300.0]],
+     [["LED Panel Light 18W", 10, 450.0], ["Electrical Labour", 8, 300.0]]),
+    ("100 wiring, power points",
+     [["Electrical Labour", 5, 300.0]],
+     [["1.5 sq.mm Copper Wire", 100, 48.0], ["2.5 sq.mm Copper Wire", 50, 65.0], ["Electrical Labour", 5, 300.0]]),
+    ("4 bulbs",
+     [["Electrical Labour", 5, 300.0]],
+     [["LED Panel Light 18W", 4, 450.0], ["Electrical Labour", 5, 300.0]]),
+    ("6 plug points, modular switch board",
+     [["Modular Switch 1-Gang", 5, 180.0], ["Electrical Labour", 5, 300.0]],
+     [["15A Socket", 6, 150.0], ["5A Socket", 6, 120.0], ["Modular Switch 1-Gang", 11, 180.0],
+      ["Electrical Labour", 5, 300.0]]),
+])
+def test_added_synonyms_change_these_quotes(seeded, description, old, new):
+    assert legacy_ai_lines(description) == old
+    assert merged(RuleEngine(*seeded).evaluate(description)) == old
+    assert merged(RuleEngine(seeded[0], SYNONYMS).evaluate(description)) == new
+
+
+def add_materials(*rows):
+    with database.transaction() as conn:
+        conn.executemany("INSERT INTO materials (name, category, default_unit, default_rate, default_gst) "
+                         "VALUES (?, 'Electrical', ?, ?, ?)", rows)
+
+
+def test_lines_are_priced_from_the_catalogue(db):
+    add_materials(("Ceiling Fan", "nos", 1650.0, 28.0), ("Electrical Labour", "point", 0.0, 0.0))
+    lines = {line.name: line for line in generate_lines("12 lights and 4 fans")}
+    assert (lines["Ceiling Fan"].rate, lines["Ceiling Fan"].unit, lines["Ceiling Fan"].gst) == (1650.0, "nos", 28.0)
+    # No catalogue rate: the rule's rate stays, the catalogue's GST applies
+    assert (lines["Electrical Labour"].rate, lines["Electrical Labour"].gst) == (300.0, 0.0)
+    # Not in the catalogue: rule values and the default GST
+    assert (lines["LED Panel Light 18W"].rate, lines["LED Panel Light 18W"].gst) == (450.0, DEFAULT_GST)
+
+
+def test_rate_change_applies_to_the_next_generation(db):
+    add_materials(("Ceiling Fan", "piece", 1650.0, 18.0))
+    fan = lambda: next(line for line in generate_lines("12 lights and 4 fans") if line.name == "Ceiling Fan")
+    assert fan().rate == 1650.0
+    database.execute("UPDATE materials SET default_rate = 1900 WHERE name = 'Ceiling Fan'")
+    assert fan().rate == 1900.0
+
+
+def test_generation_cache_reuses_retyped_descriptions(db):
+    cache = GenerationCache(size=2)
+    first = cache.get("10 LED lights,  4 fans")
+    assert first == price(engine().evaluate(normalize("10 led lights, 4 fans")))
+    assert cache.get("10 led lights, 4 fans") == first
+    assert (cache.hits, cache.misses) == (1, 1)
+    # Least recently used goes first
+    cache.get("2 fans")
+    cache.get("10 led lights, 4 fans")
+    cache.get("6 sockets")
+    assert cache.get("10 led lights, 4 fans") == first and cache.misses == 3
+    cache.get("2 fans")
+    assert cache.misses == 4
+
+
+def test_extra_spaces_do_not_hide_a_rule(seeded):
+    assert generate_lines("3  PHASE  board") == price(RuleEngine(*seeded).evaluate("3 phase board"))
+
+
+def test_materials_and_rule_edits_invalidate(db):
+    cache = GenerationCache()
+    cache.get("4 fans")
+    database.execute("INSERT INTO materials (name, default_rate, default_gst) VALUES ('Ceiling Fan', 1999, 18)")
+    assert next(line for line in cache.get("4 fans") if line.name == "Ceiling Fan").rate == 1999.0
+    database.execute("UPDATE ai_rules SET active = 0")
+    assert cache.get("4 fans") == []
+    assert cache.invalidations == 2
@@ -0,0 +1,64 @@
+"""
+TEST AI SUGGEST - ContractorMitra
+Suggestions from past quotations: nearest quotes, item pairs and index refresh
+"""
+
+import pytest
+
+import ai_suggest
+import database
+from ai_rules import QuoteLine
+from ai_suggest import SuggestionCache, SuggestionIndex
+from quotation_repository import Quotation, QuotationItem, insert_quotation
+
+
+def save(conn, description, *items):
+    return insert_quotation(conn, Quotation(customer_id=1, description=description,
+                                            items=[QuotationItem(*item) for item in items]))[0]
+
+
+@pytest.fixture
+def history(db):
+    """Fans always quoted with one hook box each; a few solar water heater jobs"""
+    with database.transaction() as conn:
+        for n in range(1, 41):
+            save(conn, f"flat {n}: {n % 6 + 1} fans and led lights", ("Ceiling Fan", n % 6 + 1, 1500.0),
+                 ("Fan Hook Box", n % 6 + 1, 40.0), ("LED Panel Light 18W", 4, 450.0))
+        for n in range(5):
+            save(conn, "solar water heater on terrace", ("Solar Water Heater", 1, 25000.0))
+    return db
+
+
+def build():
+    with database.connection() as conn:
+        return SuggestionIndex.build(conn)
+
+
+def fan_line(quantity):
+    return QuoteLine("Ceiling Fan", "", quantity, "piece", 1500.0, 18.0)
+
+
+def test_nearest_quotations_share_words(history):
+    index = build()
+    assert index.count == 45
+    solar = {qid for (qid,) in database.fetch_all("SELECT id FROM quotations WHERE description LIKE 'solar%'")}
+    assert {n.quotation_id for n in index.nearest("solar heater", 5)} == solar
+
+
+def test_paired_items_are_sized_from_the_usual_ratio(history):
+    _, suggestions = build().suggest("5 fans", [fan_line(5)])
+    hook = next(s for s in suggestions if s.line.name == "Fan Hook Box")
+    assert hook.line.quantity == 5 and hook.reason == "goes with Ceiling Fan"
+    assert "Ceiling Fan" not in {s.line.name for s in suggestions}
+
+
+def test_new_quotations_go_to_the_delta_and_deletes_rebuild(history, monkeypatch):
+    monkeypatch.setattr(ai_suggest, '_suggestions', SuggestionCache())
+    first = ai_suggest.index()
+    with database.transaction() as conn:
+        qid = save(conn, "geyser in bathroom", ("Geyser 25L", 1, 9000.0))
+    index = ai_suggest.index()
+    assert index.builds == first.builds and index.count == 46
+    assert index.nearest("geyser", 1)[0].quotation_id == qid
+    database.execute("DELETE FROM quotations WHERE id = ?", (qid,))
+    assert ai_suggest.index().builds == first.builds + 1
@@ -0,0 +1,42 @@
+"""
+TEST BATCH PDF - ContractorMitra
+Batch re-issues render on a process pool and reuse unchanged PDFs from the cache
+"""
+
+import os
+
+import database
+from batch_pdf import pdf_name, render_batch
+from quotation_repository import Quotation, QuotationItem, save_quotation
+
+
+def saved_quotations(count):
+    return [save_quotation(Quotation(customer_id=1, items=[QuotationItem(f"Material {i}", 1 + i, 100.0)],
+                                     date='2025-10-18', period='20251018'))
+            for i in range(count)]
+
+
+def test_batch_renders_every_quotation(db, pdf_store, tmp_path):
+    saved = saved_quotations(3)
+    result = render_batch([qid for qid, _ in saved], str(tmp_path / 'out'), workers=1)
+    assert not result.failed
+    assert sorted(result.rendered) == sorted((qid, str(tmp_path / 'out' / pdf_name(quote_no)))
+                                             for qid, quote_no in saved)
+    assert all(os.path.getsize(path) > 0 for _, path in result.rendered)
+    assert result.cached == 0
+
+
+def test_reissue_uses_the_pdf_cache(db, pdf_store, tmp_path):
+    ids = [qid for qid, _ in saved_quotations(3)]
+    render_batch(ids, str(tmp_path / 'first'), workers=1)
+    assert render_batch(ids, str(tmp_path / 'again'), workers=1).cached == 3
+    # An edited quotation no longer matches its cached PDF
+    database.execute("UPDATE quotation_items SET quantity = 99 WHERE quotation_id = ?", (ids[0],))
+    assert render_batch(ids, str(tmp_path / 'edited'), workers=1).cached == 2
+    assert pdf_store.stats()['files'] == 4
+
+
+def test_missing_ids_are_skipped(db, pdf_store, tmp_path):
+    ids = [qid for qid, _ in saved_quotations(1)]
+    result = render_batch(ids + [999], str(tmp_path / 'out'), workers=1)
+    assert [qid for qid, _ in result.rendered] == ids
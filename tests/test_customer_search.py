@@ -0,0 +1,50 @@
+"""
+TEST CUSTOMER SEARCH - ContractorMitra
+Trigram substring search and the short-input prefix fallback
+"""
+
+import database
+from customer_search import search_customers
+
+
+def add_customers(*rows):
+    with database.transaction() as conn:
+        conn.executemany("INSERT INTO customers (name, phone, email, gstin) VALUES (?,?,?,?)", rows)
+
+
+def names(rows):
+    return [row[1] for row in rows]
+
+
+def test_substring_in_any_contact_field(db):
+    add_customers(("Ravi Kumar", "9876543210", "ravi@example.com", "27AAAPL1234C1Z5"),
+                  ("Anita Sharma", "9123456780", "anita@mail.in", ""),
+                  ("Kumaran Traders", "8000000001", "", "33BBBCS9876D1Z2"))
+    assert names(search_customers("kumar")) == ["Kumaran Traders", "Ravi Kumar"]
+    assert names(search_customers("54321")) == ["Ravi Kumar"]
+    assert names(search_customers("mail.in")) == ["Anita Sharma"]
+    assert names(search_customers("9876D")) == ["Kumaran Traders"]
+    # Every word must match
+    assert names(search_customers("ravi kumar")) == ["Ravi Kumar"]
+    assert search_customers("zzz") == []
+
+
+def test_short_input_matches_name_or_phone_prefix(db):
+    add_customers(("Ravi", "9876543210", "", ""), ("ramesh", "8123", "", ""), ("Arav", "9000", "", ""),
+                  ("50%_Off", "", "", ""))
+    assert names(search_customers("ra")) == ["ramesh", "Ravi"]
+    assert names(search_customers("9")) == ["Arav", "Ravi"]
+    assert names(search_customers("5")) == []
+    assert names(search_customers("50")) == []
+    assert names(search_customers("%_")) == []
+
+
+def test_index_follows_edits_and_limit(db):
+    add_customers(*[(f"Customer {i:03d}", "", "", "") for i in range(30)])
+    # The first page of matches, sorted by name
+    page = names(search_customers("customer", limit=5))
+    assert len(page) == 5 and page == sorted(page)
+    database.execute("UPDATE customers SET name = 'Vendor 7' WHERE name = 'Customer 007'")
+    assert names(search_customers("vendor")) == ["Vendor 7"]
+    assert "Customer 007" not in names(search_customers("customer"))
+    assert names(search_customers(""))[:2] == ["Customer 000", "Customer 001"]
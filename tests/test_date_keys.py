@@ -0,0 +1,54 @@
+"""
+TEST DATE KEYS - ContractorMitra
+Date parsing, the YYYYMMDD keys and the backfill of old date formats
+"""
+
+from datetime import date, datetime
+
+import pytest
+
+import database
+import migrations
+from date_keys import date_key, iso_date, key_date, key_range, normalize_column, parse_date
+
+
+@pytest.mark.parametrize('text', ["2025-01-31", "2025/1/31", "2025-01-31 10:30:00", "2025-01-31T10:30:00.5",
+                                  "31-01-2025", "31/1/2025", "31.01.2025", "31-Jan-2025", "31 January 2025"])
+def test_accepted_formats(text):
+    assert parse_date(text) == date(2025, 1, 31)
+
+
+@pytest.mark.parametrize('text', ["", "2025-02-30", "31-13-2025", "Jan 31", "yesterday"])
+def test_unreadable_dates_raise(text):
+    with pytest.raises(ValueError):
+        parse_date(text)
+
+
+@pytest.mark.parametrize('text', ["2025/1/31", "31.01.2025", "31 January 2025", "2025-02-30", "Jan 31"])
+def test_migration_parser_matches(text):
+    # Migration 10 carries its own copy of the parser
+    try:
+        expected = iso_date(text)
+    except ValueError:
+        expected = None
+    assert migrations._iso_date(text) == expected
+
+
+def test_keys():
+    assert date_key(datetime(2025, 3, 9, 18, 0)) == 20250309
+    assert key_date(20250309) == "2025-03-09" and key_date(None) is None
+    assert key_range("1-Mar-2025", "2025-03-31") == (20250301, 20250331)
+    assert iso_date("09/03/2025") == "2025-03-09"
+
+
+def test_backfill_makes_every_row_reachable_by_key(db):
+    dates = ["2025-01-05", "2025-01-06 10:30:00", "07-01-2025", "08-Jan-2025", "not a date", "2025-02-01"]
+    with database.transaction() as conn:
+        conn.executemany("INSERT INTO quotations (quote_no, date, customer_id, status) VALUES (?, ?, 1, 'Draft')",
+                         [(f"QT-{n}", d) for n, d in enumerate(dates)])
+    january = "SELECT COUNT(*) FROM quotations WHERE date_key BETWEEN ? AND ?"
+    assert database.fetch_one(january, (20250101, 20250131))[0] == 2
+    with database.transaction() as conn:
+        assert normalize_column(conn, 'quotations', 'date') == (2, 1)
+    assert database.fetch_one(january, (20250101, 20250131))[0] == 4
+    assert database.fetch_one("SELECT date FROM quotations WHERE quote_no = 'QT-3'")[0] == "2025-01-08"
@@ -0,0 +1,92 @@
+"""
+TEST EXPORTER - ContractorMitra
+Streamed exports hold every row, split long sheets and clean up when cancelled
+"""
+
+import csv
+
+import pytest
+
+import database
+import exporter
+
+HEADINGS = ("Invoice #", "Customer", "Total")
+
+
+def batches(count, size=7):
+    rows = [(f"QT-{n:04d}", f"Customer {n}", 100.0 + n) for n in range(count)]
+    return (rows[i:i + size] for i in range(0, count, size))
+
+
+def test_csv_holds_every_row(tmp_path):
+    path = str(tmp_path / 'out.csv')
+    seen = []
+    assert exporter.export(path, HEADINGS, batches(50), progress=seen.append) == 50
+    assert seen[-1] == 50 and len(seen) == 8
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == list(HEADINGS) and len(rows) == 51
+    assert rows[50] == ["QT-0049", "Customer 49", "149.0"]
+
+
+def test_xlsx_continues_on_a_new_sheet(tmp_path, monkeypatch):
+    from openpyxl import load_workbook
+    monkeypatch.setattr(exporter, 'XLSX_SHEET_ROWS', 20)
+    path = str(tmp_path / 'out.xlsx')
+    assert exporter.export(path, HEADINGS, batches(50)) == 50
+    wb = load_workbook(path, read_only=True)
+    sheets = [list(ws.iter_rows(values_only=True)) for ws in wb.worksheets]
+    wb.close()
+    assert [len(rows) for rows in sheets] == [21, 21, 11]
+    assert all(rows[0] == HEADINGS for rows in sheets)
+    assert sheets[2][-1] == ("QT-0049", "Customer 49", 149.0)
+
+
+def test_parquet_keeps_numbers_numeric(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'out.parquet')
+    assert exporter.export(path, HEADINGS, batches(50), types=("TEXT", "TEXT", "REAL")) == 50
+    table = pq.read_table(path)
+    assert table.num_rows == 50
+    assert str(table.schema.field("Total").type) == 'double'
+
+
+def test_parquet_schema_does_not_come_from_the_first_batch(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'out.parquet')
+    chunks = [[("QT-1", None, None, None)] * 3, [("QT-2", "Ravi", 7, 150.0), ("QT-3", 42, 8, 99)]]
+    headings, types = ("Invoice #", "Customer", "Invoices", "Total"), ("TEXT", "TEXT", "INTEGER", "REAL")
+    assert exporter.export(path, headings, iter(chunks), types=types) == 5
+    table = pq.read_table(path)
+    assert [str(f.type) for f in table.schema] == ['string', 'string', 'int64', 'double']
+    assert table.column("Customer").to_pylist()[3:] == ["Ravi", "42"]
+    assert table.column("Invoices").to_pylist() == [None, None, None, 7, 8]
+    assert table.column("Total").to_pylist()[3:] == [150.0, 99.0]
+
+
+def test_empty_export_writes_headings(tmp_path):
+    path = str(tmp_path / 'out.csv')
+    assert exporter.export(path, HEADINGS, iter(())) == 0
+    with open(path, encoding='utf-8-sig') as f:
+        assert f.read().splitlines() == [",".join(HEADINGS)]
+
+
+def test_cancel_removes_the_partial_file(tmp_path):
+    path = tmp_path / 'out.csv'
+    with pytest.raises(exporter.ExportCancelled):
+        exporter.export(str(path), HEADINGS, batches(50), cancelled=lambda: True)
+    assert not path.exists()
+
+
+def test_unknown_extension(tmp_path):
+    with pytest.raises(ValueError):
+        exporter.export(str(tmp_path / 'out.doc'), HEADINGS, batches(1))
+
+
+def test_query_batches(db):
+    with database.transaction() as conn:
+        conn.executemany("INSERT INTO customers (name) VALUES (?)", [(f"Customer {n}",) for n in range(5)])
+    with database.connection() as conn:
+        chunks = list(exporter.query_batches(conn, "SELECT name FROM customers ORDER BY id", batch=2,
+                                             convert=lambda row: row[0].upper()))
+    assert chunks == [["CUSTOMER 0", "CUSTOMER 1"], ["CUSTOMER 2", "CUSTOMER 3"], ["CUSTOMER 4"]]
@@ -0,0 +1,109 @@
+"""
+TEST LINE ITEMS - ContractorMitra
+Quote line edits, merges and removals keep the per-slab running totals exact
+"""
+
+import math
+import random
+
+import pytest
+
+from line_items import QuoteLines
+
+
+def exact_totals(lines, slots):
+    return (math.fsum(lines.amount(s) for s in slots),
+            math.fsum(lines.amount(s) * lines.gst[s] / 100 for s in slots))
+
+
+def test_add_and_slabs():
+    lines = QuoteLines()
+    wire = lines.add("Wire", "meter", 10, 50.0, 18.0)
+    lines.add("Switch", "piece", 4, 25.0, 12.0)
+    lines.add("Fan", "piece", 1, 1500.0, 18.0)
+    assert len(lines) == 3
+    assert lines.slabs() == {12.0: (100.0, 12.0), 18.0: (2000.0, 360.0)}
+    assert (lines.subtotal, lines.gst_amount, lines.grand_total) == (2100.0, 372.0, 2472.0)
+    assert lines.row(wire) == {'name': "Wire", 'description': "", 'quantity': 10.0, 'unit': "meter",
+                               'rate': 50.0, 'amount': 500.0, 'gst': 18.0}
+
+
+def test_edit_moves_the_line_between_slabs():
+    lines = QuoteLines()
+    slot = lines.add("Wire", "meter", 10, 50.0, 18.0)
+    lines.add("Switch", "piece", 4, 25.0, 12.0)
+    assert lines.update(slot, quantity=2, gst=12.0) == slot
+    assert lines.slabs() == {12.0: (200.0, 24.0)}
+
+
+def test_remove_reuses_the_slot_and_drops_empty_slabs():
+    lines = QuoteLines()
+    first = lines.add("Wire", "meter", 10, 50.0, 5.0)
+    lines.add("Switch", "piece", 4, 25.0, 18.0)
+    lines.remove(first)
+    assert 5.0 not in lines.slabs() and len(lines) == 1
+    assert lines.add("MCB", "piece", 1, 300.0, 18.0) == first
+    assert lines.items([first])[0].name == "MCB"
+    lines.clear()
+    assert (len(lines), lines.subtotal, lines.gst_amount) == (0, 0, 0)
+
+
+def test_merge_adds_to_the_same_material_and_rate():
+    lines = QuoteLines()
+    slot, created = lines.merge("Wire", "meter", 10, 50.0, 18.0, "PVC")
+    assert created
+    assert lines.merge("Wire", "meter", 5, 50.0, 18.0) == (slot, False)
+    other, created = lines.merge("Wire", "meter", 5, 60.0, 18.0)
+    assert created and other != slot
+    assert lines.quantity[slot] == 15 and lines.descriptions[slot] == "PVC"
+    assert lines.subtotal == 15 * 50.0 + 5 * 60.0
+
+
+def test_rate_edit_merges_into_the_matching_line():
+    lines = QuoteLines()
+    low, _ = lines.merge("Wire", "meter", 10, 50.0, 18.0)
+    high, _ = lines.merge("Wire", "meter", 4, 60.0, 18.0)
+    assert lines.update(high, quantity=6, rate=50.0, merge=True) == low
+    assert len(lines) == 1 and lines.quantity[low] == 16
+    assert lines.find("Wire", 60.0) is None
+    # Without merge the line keeps its own slot and takes the new key once it is free
+    lines.update(low, rate=70.0)
+    assert lines.find("Wire", 70.0) == low and lines.find("Wire", 50.0) is None
+
+
+def test_merge_finds_a_duplicate_left_after_a_removal():
+    lines = QuoteLines()
+    first = lines.add("Wire", "meter", 10, 50.0, 18.0)
+    second = lines.add("Wire", "meter", 4, 50.0, 18.0)
+    lines.remove(first)
+    assert lines.find("Wire", 50.0) == second
+    assert lines.merge("Wire", "meter", 6, 50.0, 18.0) == (second, False)
+    assert len(lines) == 1 and lines.quantity[second] == 10
+
+
+def test_merging_rate_edit_keeps_the_edited_gst_and_description():
+    lines = QuoteLines()
+    low, _ = lines.merge("Wire", "meter", 10, 50.0, 18.0, "PVC")
+    high, _ = lines.merge("Wire", "meter", 4, 60.0, 18.0)
+    assert lines.update(high, quantity=6, rate=50.0, gst=12.0, description="FR PVC", merge=True) == low
+    assert (lines.quantity[low], lines.gst[low], lines.descriptions[low]) == (16, 12.0, "FR PVC")
+    assert lines.slabs() == {12.0: (800.0, 96.0)}
+
+
+def test_running_totals_match_a_full_resum_after_churn():
+    rnd = random.Random(14)
+    lines, live = QuoteLines(), []
+    for i in range(500):
+        live.append(lines.add(f"Material {i}", "piece", rnd.randint(1, 40) / 4, rnd.uniform(10, 5000),
+                              rnd.choice((0.0, 5.0, 12.0, 18.0, 28.0))))
+    for _ in range(2000):
+        slot = rnd.choice(live)
+        if rnd.random() < 0.2:
+            lines.remove(slot)
+            live.remove(slot)
+            live.append(lines.add("Custom Item", "piece", 1.0, 100.0, 18.0))
+        else:
+            lines.update(slot, quantity=rnd.randint(1, 40) / 4, gst=rnd.choice((5.0, 18.0)))
+    subtotal, gst = exact_totals(lines, live)
+    assert lines.subtotal == pytest.approx(subtotal, abs=1e-6)
+    assert lines.gst_amount == pytest.approx(gst, abs=1e-6)
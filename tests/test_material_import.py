@@ -0,0 +1,44 @@
+"""
+TEST MATERIAL IMPORT - ContractorMitra
+Price-list import counts and upsert semantics
+"""
+
+import database
+from material_import import import_materials
+from materials_cache import catalogue
+
+
+def write_csv(path, *rows):
+    path.write_text("name,category,unit,rate,gst\n" + "".join(",".join(map(str, r)) + "\n" for r in rows))
+    return str(path)
+
+
+def counts(result):
+    return result.rows, result.inserted, result.updated, result.unchanged, result.errors
+
+
+def test_first_import_inserts(db, tmp_path):
+    path = write_csv(tmp_path / 'prices.csv', ("Wire", "Cable", "meter", 50, 18),
+                     ("Switch", "Switch", "piece", 25, 18))
+    assert counts(import_materials(path)) == (2, 2, 0, 0, 0)
+
+
+def test_reimport_counts_updates_and_unchanged_rows(db, tmp_path):
+    import_materials(write_csv(tmp_path / 'a.csv', ("Wire", "Cable", "meter", 50, 18),
+                               ("Switch", "Switch", "piece", 25, 18), ("MCB", "Protection", "piece", 300, 18)))
+    result = import_materials(write_csv(tmp_path / 'b.csv', ("Wire", "Cable", "meter", 55, 18),
+                                        ("Switch", "Switch", "piece", 25, 18), ("MCB", "Protection", "piece", 300, 12),
+                                        ("Fan", "Fans", "piece", 1800, 18)))
+    assert counts(result) == (4, 1, 2, 1, 0)
+    assert database.fetch_one("SELECT default_rate FROM materials WHERE name = 'Wire'")[0] == 55
+    assert catalogue().get("MCB").gst == 12
+
+
+def test_bad_rows_go_to_the_error_file(db, tmp_path):
+    path = write_csv(tmp_path / 'prices.csv', ("Wire", "Cable", "meter", "abc", 18), ("", "x", "piece", 1, 18),
+                     ("Switch", "Switch", "piece", 25, 180))
+    result = import_materials(path)
+    assert counts(result) == (3, 0, 0, 0, 3)
+    with open(result.error_path) as f:
+        errors = [line.split(",")[1] for line in f.read().splitlines()[1:]]
+    assert errors == ["Invalid rate", "Missing material name", "Invalid GST %"]
@@ -0,0 +1,59 @@
+"""
+TEST MATERIALS CACHE - ContractorMitra
+The catalogue reloads exactly when the materials table changes
+"""
+
+import database
+from materials_cache import MaterialsCatalogue
+
+
+def add_materials(*rows):
+    with database.transaction() as conn:
+        conn.executemany("INSERT INTO materials (name, category, default_unit, default_rate, default_gst) "
+                         "VALUES (?,?,?,?,?)", rows)
+
+
+def test_lookups_load_once(db):
+    add_materials(("Wire", "Cable", "meter", 50.0, 18.0), ("Switch", "Switch", "piece", 25.0, None))
+    cache = MaterialsCatalogue()
+    assert cache.get("Wire").rate == 50.0
+    assert cache.get("Switch").gst == 18.0
+    assert cache.get("Nothing") is None
+    assert [m.name for m in cache.all()] == ["Switch", "Wire"]
+    assert [m.name for m in cache.in_category("Cable")] == ["Wire"]
+    assert set(cache.get_many(["Wire", "Nothing"])) == {"Wire"}
+    assert cache.stats()['loads'] == 1
+
+
+def test_hits_count_names_found(db):
+    add_materials(("Wire", "Cable", "meter", 50.0, 18.0))
+    cache = MaterialsCatalogue()
+    cache.get("Wire")
+    cache.get("Nothing")
+    cache.get_many(["Wire", "Switch", "Fan"])
+    cache.all()
+    database.execute("UPDATE materials SET default_rate = 60 WHERE name = 'Wire'")
+    cache.get("Wire")
+    assert (cache.hits, cache.misses, cache.loads) == (3, 3, 2)
+
+
+def test_update_and_insert_are_seen(db):
+    add_materials(("Wire", "Cable", "meter", 50.0, 18.0))
+    cache = MaterialsCatalogue()
+    cache.get("Wire")
+    database.execute("UPDATE materials SET default_rate = 1.5 WHERE name = ?", ("Wire",))
+    assert cache.get("Wire").rate == 1.5
+    database.execute("INSERT INTO materials (name) VALUES (?)", ("Fan",))
+    assert cache.get("Fan") is not None
+    database.execute("DELETE FROM materials WHERE name = ?", ("Wire",))
+    assert cache.get("Wire") is None
+    assert cache.stats()['loads'] == 4
+
+
+def test_autocommit_write_is_seen_at_once(db):
+    add_materials(("Wire", "Cable", "meter", 50.0, 18.0))
+    cache = MaterialsCatalogue()
+    cache.get("Wire")
+    with database.connection() as conn:
+        conn.execute("UPDATE materials SET default_rate = 55 WHERE name = 'Wire'")
+    assert cache.get("Wire").rate == 55.0
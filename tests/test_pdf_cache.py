@@ -0,0 +1,99 @@
+"""
+TEST PDF CACHE - ContractorMitra
+Content-hash PDF store: hits, misses and a size limit shared by every process
+"""
+
+import multiprocessing
+import os
+
+from pdf_cache import PDFCache, content_key
+
+SIZE = 1000
+
+
+def fake_render(tag):
+    def render(path):
+        with open(path, 'wb') as f:
+            f.write(tag.encode().ljust(SIZE, b'.'))
+    return render
+
+
+def disk_bytes(root):
+    return sum(entry.stat().st_size for entry in os.scandir(root) if entry.name.endswith('.pdf'))
+
+
+def fill(root, limit, worker, count):
+    store = PDFCache(root, limit)
+    for i in range(count):
+        store.put(f"w{worker}-{i}", fake_render(f"{worker}/{i}"))
+
+
+def test_fetch_renders_once(pdf_store):
+    calls = []
+
+    def render(path):
+        calls.append(path)
+        fake_render("a")(path)
+
+    path, hit = pdf_store.fetch("a", render)
+    assert not hit
+    assert pdf_store.fetch("a", render) == (path, True)
+    assert len(calls) == 1
+    assert (pdf_store.hits, pdf_store.misses) == (1, 1)
+
+
+def test_content_key_follows_the_data():
+    quote = {'quote_no': "QT-1", 'items': [{'item_name': "Wire", 'quantity': 1.0}]}
+    edited = {'quote_no': "QT-1", 'items': [{'item_name': "Wire", 'quantity': 2.0}]}
+    assert content_key('quotation', quote) == content_key('quotation', dict(quote))
+    assert content_key('quotation', quote) != content_key('quotation', edited)
+    assert content_key('quotation', quote) != content_key('ai_quote', quote)
+
+
+def test_failed_render_stores_nothing(pdf_store):
+    try:
+        pdf_store.put("bad", lambda path: False)
+    except RuntimeError:
+        pass
+    assert pdf_store.get("bad") is None
+    assert os.listdir(pdf_store.root) == []
+
+
+def test_limit_holds_with_stale_indexes(tmp_path):
+    root = str(tmp_path / 'cache')
+    # Two stores on one directory, as the Tk process and a worker have: each
+    # loads its index before the other writes
+    a, b = PDFCache(root, 5 * SIZE), PDFCache(root, 5 * SIZE)
+    a.put("a0", fake_render("a0"))
+    b.put("b0", fake_render("b0"))
+    for i in range(1, 6):
+        a.put(f"a{i}", fake_render(f"a{i}"))
+        b.put(f"b{i}", fake_render(f"b{i}"))
+    assert disk_bytes(root) <= 5 * SIZE
+    assert a.stats()['bytes'] == b.stats()['bytes'] == disk_bytes(root)
+    # Least recently used go first: the newest file survives
+    assert b.get("b5") is not None
+
+
+def test_renders_in_progress_are_never_evicted(tmp_path):
+    root = tmp_path / 'cache'
+    root.mkdir()
+    pending = root / '.tmp-other-process.pdf'
+    pending.write_bytes(b'x' * SIZE)
+    store = PDFCache(str(root), 2 * SIZE)
+    for i in range(4):
+        store.put(f"k{i}", fake_render(f"k{i}"))
+    assert pending.exists()
+    assert store.stats()['files'] == 2
+
+
+def test_limit_holds_across_processes(tmp_path):
+    root = str(tmp_path / 'cache')
+    spawn = multiprocessing.get_context('spawn')
+    procs = [spawn.Process(target=fill, args=(root, 8 * SIZE, w, 25)) for w in range(3)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join(60)
+    assert [proc.exitcode for proc in procs] == [0, 0, 0]
+    assert disk_bytes(root) <= 8 * SIZE
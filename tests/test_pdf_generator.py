@@ -0,0 +1,37 @@
+"""
+TEST PDF GENERATOR - ContractorMitra
+Quotation PDFs state the GST actually charged
+"""
+
+import base64
+import re
+import zlib
+
+from pdf_generator import PDFGenerator
+
+
+def pdf_text(path):
+    """Text drawn on the pages, from reportlab's ASCII85 + Flate content streams"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    text = b""
+    for stream in re.findall(rb"stream\r?\n(.*?~>)\s*endstream", data, re.S):
+        try:
+            stream = zlib.decompress(base64.a85decode(stream.strip(), adobe=True))
+        except (ValueError, zlib.error):
+            continue
+        text += b"".join(re.findall(rb"\((.*?)\)\s*Tj", stream, re.S))
+    return text.decode('latin-1')
+
+
+def test_mixed_slab_quotation_has_no_flat_rate(tmp_path):
+    quote_data = {'quote_no': "QT-20251018-0001", 'date': "2025-10-18", 'customer_name': "Customer 1",
+                  'customer_phone': "", 'customer_address': "", 'customer_gstin': "", 'subtotal': 1100.0,
+                  'gst_amount': 62.0, 'grand_total': 1162.0,
+                  'items': [{'item_name': "Wire", 'quantity': 10.0, 'unit': "meter", 'rate': 50.0, 'amount': 500.0},
+                            {'item_name': "Fan", 'quantity': 1.0, 'unit': "piece", 'rate': 600.0, 'amount': 600.0}]}
+    path = str(tmp_path / 'quote.pdf')
+    PDFGenerator().render_quotation_pdf(quote_data, path)
+    text = pdf_text(path)
+    assert "GST:" in text and "Rs. 62.00" in text
+    assert "18%" not in text
@@ -0,0 +1,72 @@
+"""
+TEST PDF JOBS - ContractorMitra
+Job queue hands a bounded number of renders to the worker pool
+"""
+
+import heapq
+import time
+
+import pytest
+
+from pdf_jobs import PDFJobQueue
+
+
+class FakeTk:
+    """Just enough of a widget's after() to drive PDFJob polling"""
+
+    def __init__(self):
+        self.timers = []
+
+    def after(self, ms, fn):
+        heapq.heappush(self.timers, (time.monotonic() + ms / 1000, id(fn), fn))
+
+    def run(self, until, timeout=60):
+        deadline = time.monotonic() + timeout
+        while not until():
+            assert time.monotonic() < deadline, "jobs did not finish"
+            while self.timers and self.timers[0][0] <= time.monotonic():
+                heapq.heappop(self.timers)[2]()
+            time.sleep(0.01)
+
+
+def ai_quote(n):
+    return {'quote_no': f"AI-20251018-{n:04d}", 'date': "18-Oct-2025", 'customer_name': f"Customer {n}",
+            'customer_phone': "", 'customer_address': "", 'customer_gstin': "", 'subtotal': 100.0,
+            'gst_amount': 18.0, 'grand_total': 118.0,
+            'items': [{'name': "Wire", 'quantity': 2.0, 'unit': "meter", 'rate': 50.0, 'amount': 100.0}]}
+
+
+@pytest.fixture
+def queue(pdf_store):
+    queue = PDFJobQueue(workers=1, in_flight=2)
+    yield queue
+    queue.shutdown()
+
+
+def test_only_in_flight_jobs_reach_the_pool(queue, tmp_path):
+    tk, done = FakeTk(), []
+    jobs = [queue.submit(tk, 'ai_quote', ai_quote(n), str(tmp_path / f"{n}.pdf"), done.append) for n in range(6)]
+    running, waiting = queue.pending
+    assert running <= 2 and running + waiting == 6
+    assert sum(job.future is None for job in jobs) >= 4
+    tk.run(lambda: len(done) == 6)
+    assert sorted(done) == sorted(str(tmp_path / f"{n}.pdf") for n in range(6))
+    assert queue.pending == (0, 0)
+
+
+def test_cancelled_waiting_job_never_renders(queue, tmp_path):
+    tk, done = FakeTk(), []
+    jobs = [queue.submit(tk, 'ai_quote', ai_quote(n), str(tmp_path / f"{n}.pdf"), done.append) for n in range(4)]
+    jobs[3].cancel()
+    tk.run(lambda: len(done) == 3)
+    assert jobs[3].future is None
+    assert not (tmp_path / "3.pdf").exists()
+
+
+def test_failed_render_reports_the_error(queue, tmp_path):
+    tk, errors, progress = FakeTk(), [], []
+    job = queue.submit(tk, 'ai_quote', {'items': []}, str(tmp_path / "bad.pdf"),
+                       on_error=errors.append, on_progress=progress.append)
+    tk.run(lambda: job.finished)
+    assert job.state == 'failed' and len(errors) == 1
+    assert progress[0] == 'queued'
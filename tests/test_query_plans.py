@@ -0,0 +1,66 @@
+"""
+TEST QUERY PLANS - ContractorMitra
+The hot queries, taken from the modules that run them, must be served by indexes
+"""
+
+import pytest
+
+import database
+from customer_search import search_query
+from customer_window import customers_source
+from migrations import table_scans
+from pdf_generator import QUOTE_SELECT
+from pending_window import payments_source
+from reports_window import (customer_report_source, materials_source, monthly_source,
+                            pending_source, sales_source)
+from rollups import monthly_report_sql
+
+JANUARY = (20250101, 20250131)
+# GridSource wraps every query in "WITH g(...) AS (...)"; a grouped result is
+# materialized and read back as g, which is not a table scan
+ALLOWED = {'g'}
+
+
+def grid_sources():
+    return {
+        'sales report': sales_source(JANUARY),
+        'pending report': pending_source(JANUARY),
+        'customer report': customer_report_source(),
+        'materials report': materials_source(JANUARY),
+        'monthly report (whole months)': monthly_source('2025-01-01', '2025-06-30'),
+        'monthly report (partial months)': monthly_source('2025-01-15', '2025-06-10'),
+        'payments': payments_source(),
+        'payments search': payments_source('ram'),
+        'customers': customers_source(),
+    }
+
+
+def hot_queries():
+    """(name, sql, params) for the queries the windows, reports and PDFs run per screen"""
+    queries = [
+        ('pdf quotation', QUOTE_SELECT + " WHERE q.id = ?", (1,)),
+        ('batch pdf quotations', QUOTE_SELECT + " WHERE q.id IN (?,?,?)", (1, 2, 3)),
+    ]
+    for dates in (('2025-01-01', '2025-03-31'), ('2025-01-15', '2025-01-20'), ('2025-01-15', '2025-03-10')):
+        sql, params = monthly_report_sql(*dates)
+        queries.append((f'monthly report {dates}', sql, params))
+    for term in ('', 'ram', '98', 'r%', 'ram kumar'):
+        sql, params, _ = search_query(term)
+        queries.append((f'customer search {term!r}', sql, params))
+    for name, source in grid_sources().items():
+        for descending in (False, True):
+            source.descending = descending
+            for position in (None, (1, 1)):
+                for forward in (True, False):
+                    for n, (sql, params) in enumerate(source.page_queries(position, forward)):
+                        label = f"{name} page {position} {'fwd' if forward else 'back'} desc={descending} #{n}"
+                        queries.append((label, sql, params + (200,)))
+        queries.append((f'{name} summary', source.summary_sql("COUNT(*)"), source.params))
+    return queries
+
+
+@pytest.mark.parametrize('sql, params', [pytest.param(sql, params, id=name) for name, sql, params in hot_queries()])
+def test_hot_query_uses_indexes(db, sql, params):
+    with database.connection() as conn:
+        scans = [t for t in table_scans(conn, sql, params) if t not in ALLOWED]
+    assert not scans, f"full table scan on {', '.join(scans)}"
@@ -0,0 +1,45 @@
+"""
+TEST QUOTATION REPOSITORY - ContractorMitra
+Quotations are saved, and re-saved in place, in one transaction
+"""
+
+import pytest
+
+import database
+from quotation_repository import Quotation, QuotationItem, save_quotation
+
+
+def quotation(*items, **fields):
+    return Quotation(customer_id=1, items=list(items), date='2025-10-18', period='20251018', **fields)
+
+
+def stored_items(quotation_id):
+    return database.fetch_all("SELECT item_name, quantity, rate, gst_percent, amount FROM quotation_items "
+                              "WHERE quotation_id = ? ORDER BY id", (quotation_id,))
+
+
+def test_save_writes_header_and_items(db):
+    qid, quote_no = save_quotation(quotation(QuotationItem("Wire", 10, 50.0),
+                                             QuotationItem("Switch", 4, 25.0, gst_percent=12), transport=100))
+    assert quote_no == 'QT-20251018-001'
+    assert database.fetch_one("SELECT subtotal, gst_amount, grand_total FROM quotations WHERE id = ?",
+                              (qid,)) == (700.0, 102.0, 802.0)
+    assert stored_items(qid) == [("Wire", 10, 50.0, 18.0, 500.0), ("Switch", 4, 25.0, 12.0, 100.0)]
+
+
+def test_resave_updates_in_place(db):
+    qid, quote_no = save_quotation(quotation(QuotationItem("Wire", 10, 50.0), QuotationItem("Switch", 4, 25.0)))
+    edited = quotation(QuotationItem("Wire", 12, 50.0), QuotationItem("MCB", 1, 300.0))
+    assert save_quotation(edited, qid) == (qid, quote_no)
+    assert database.fetch_one("SELECT COUNT(*) FROM quotations")[0] == 1
+    assert stored_items(qid) == [("Wire", 12, 50.0, 18.0, 600.0), ("MCB", 1, 300.0, 18.0, 300.0)]
+    assert database.fetch_one("SELECT grand_total FROM quotations WHERE id = ?", (qid,))[0] == pytest.approx(1062.0)
+    # The rollups follow the update triggers
+    assert database.fetch_one("SELECT sales FROM monthly_rollup WHERE month = '2025-10'")[0] == pytest.approx(1062.0)
+
+
+def test_failed_resave_keeps_the_old_items(db):
+    qid, _ = save_quotation(quotation(QuotationItem("Wire", 10, 50.0)))
+    with pytest.raises(LookupError):
+        save_quotation(quotation(QuotationItem("Wire", 1, 50.0)), qid + 1)
+    assert stored_items(qid) == [("Wire", 10, 50.0, 18.0, 500.0)]
@@ -0,0 +1,59 @@
+"""
+TEST QUOTE NUMBERS - ContractorMitra
+Quote numbers stay unique when several processes save at once
+"""
+
+import multiprocessing
+
+import database
+from quote_numbers import next_quote_number, peek_quote_number
+
+WORKERS = 4
+PER_WORKER = 50
+
+
+def allocate_quotes(path, worker, count):
+    database.configure(path)
+    try:
+        for _ in range(count):
+            with database.transaction() as conn:
+                quote_no = next_quote_number(conn, 'QT', '20251018')
+                conn.execute("INSERT INTO quotations (quote_no, date, customer_id, status) VALUES (?,?,?,?)",
+                             (quote_no, '2025-10-18', 1 + worker, 'Draft'))
+    finally:
+        database.close()
+
+
+def test_numbers_follow_the_sequence(db):
+    with database.transaction() as conn:
+        numbers = [next_quote_number(conn, 'QT', '20251018') for _ in range(3)]
+    assert numbers == ['QT-20251018-001', 'QT-20251018-002', 'QT-20251018-003']
+    assert peek_quote_number('QT', '20251018') == 'QT-20251018-004'
+
+
+def test_rolled_back_save_returns_its_number(db):
+    try:
+        with database.transaction() as conn:
+            next_quote_number(conn, 'QT', '20251018')
+            raise RuntimeError("save failed")
+    except RuntimeError:
+        pass
+    with database.transaction() as conn:
+        assert next_quote_number(conn, 'QT', '20251018') == 'QT-20251018-001'
+
+
+def test_concurrent_processes_never_share_a_number(db):
+    database.close()
+    spawn = multiprocessing.get_context('spawn')
+    procs = [spawn.Process(target=allocate_quotes, args=(db, w, PER_WORKER)) for w in range(WORKERS)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join(120)
+    assert [proc.exitcode for proc in procs] == [0] * WORKERS
+
+    database.configure(db)
+    numbers = [quote_no for (quote_no,) in database.fetch_all("SELECT quote_no FROM quotations")]
+    assert len(numbers) == WORKERS * PER_WORKER
+    assert len(set(numbers)) == len(numbers)
+    assert max(numbers) == f"QT-20251018-{WORKERS * PER_WORKER:03d}"
@@ -0,0 +1,67 @@
+"""
+TEST REPORT CACHE - ContractorMitra
+Cached report pages and summaries stop being served once their tables change
+"""
+
+import pytest
+
+import database
+from report_cache import REPORT_TABLES, ResultCache, estimate_size, report_cache
+from virtual_grid import GridSource
+
+
+@pytest.fixture
+def cache():
+    # Hit counts start from an empty cache
+    report_cache().clear()
+    yield report_cache()
+    report_cache().clear()
+
+
+def add_quotation(quote_no, date, total):
+    database.execute("INSERT INTO quotations (quote_no, date, customer_id, grand_total, gst_amount, status) "
+                     "VALUES (?, ?, 1, ?, ?, 'Draft')", (quote_no, date, total, total * 0.18))
+
+
+def monthly(date_from, date_to):
+    return GridSource(("Month", "Invoices", "Sales"), '''
+        SELECT strftime('%Y-%m', date), strftime('%Y-%m', date), COUNT(*), SUM(grand_total)
+        FROM quotations WHERE date_key BETWEEN ? AND ? GROUP BY 1
+    ''', (date_from, date_to), cache_key=('monthly', date_from, date_to), tables=REPORT_TABLES)
+
+
+def test_lru_evicts_oldest_past_the_byte_cap():
+    lru = ResultCache(max_bytes=3 * estimate_size((1, 2)))
+    for n in range(3):
+        lru.put(n, (n, n))
+    lru.get(0)
+    lru.put(3, (3, 3))
+    assert lru.get(1) is None and lru.get(0) == (0, 0) and lru.get(3) == (3, 3)
+    assert lru.bytes <= lru.max_bytes
+    # Larger than the whole cache: not stored
+    lru.put('big', tuple(range(1000)))
+    assert lru.get('big') is None
+
+
+def test_repeat_reads_come_from_the_cache(db, cache):
+    add_quotation('QT-1', '2025-01-05', 1000)
+    source = monthly(20250101, 20251231)
+    assert source.page() == [('2025-01', '2025-01', 1, 1000.0)]
+    assert source.summary("SUM(c1)") == (1,)
+    hits = cache.stats()['hits']
+    assert monthly(20250101, 20251231).peek_page() == [('2025-01', '2025-01', 1, 1000.0)]
+    assert monthly(20250101, 20251231).summary("SUM(c1)") == (1,)
+    assert cache.stats()['hits'] == hits + 2
+    # Another range is another entry
+    assert monthly(20250201, 20251231).peek_page() is None
+
+
+def test_insert_makes_old_entries_unreachable(db, cache):
+    add_quotation('QT-1', '2025-01-05', 1000)
+    source = monthly(20250101, 20251231)
+    source.page()
+    assert source.summary("SUM(c1)", "SUM(c2)") == (1, 1000.0)
+    add_quotation('QT-2', '2025-03-03', 500)
+    assert source.peek_page() is None
+    assert source.summary("SUM(c1)", "SUM(c2)") == (2, 1500.0)
+    assert [row[0] for row in source.page()] == ['2025-01', '2025-03']
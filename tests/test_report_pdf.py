@@ -0,0 +1,58 @@
+"""
+TEST REPORT PDF - ContractorMitra
+Paged report PDFs: page count, money-column totals and empty reports
+"""
+
+import re
+
+import pytest
+
+from report_pdf import ReportPDF, format_value, write_pdf
+
+HEADINGS = ("Invoice #", "Date", "Customer", "Total", "Status")
+
+
+def pdf_pages(path):
+    with open(path, 'rb') as f:
+        return len(re.findall(rb"/Type\s*/Page\b(?!s)", f.read()))
+
+
+def rows(count):
+    return [(f"QT-{n:05d}", "2025-01-05", f"Customer {n}", 100.0 + n, "Draft") for n in range(count)]
+
+
+def test_rows_fill_whole_pages(tmp_path):
+    path = str(tmp_path / 'report.pdf')
+    per_page = ReportPDF(str(tmp_path / 'probe.pdf'), HEADINGS, rows(5)).rows_per_page
+    data = rows(2 * per_page + 1)
+    steps = []
+    pages = write_pdf(path, HEADINGS, [data[i:i + 100] for i in range(0, len(data), 100)], steps.append)
+    assert pages == 3 == pdf_pages(path)
+    assert steps == [per_page, per_page, 1]
+
+
+def test_running_total_covers_the_money_columns(tmp_path):
+    report = ReportPDF(str(tmp_path / 'report.pdf'), HEADINGS, rows(5))
+    assert report.totals == [3]
+    report.page(rows(5))
+    report.page(rows(3))
+    report.save()
+    assert report.running[3] == pytest.approx(sum(100.0 + n for n in range(5)) + sum(100.0 + n for n in range(3)))
+
+
+def test_null_and_text_amounts_add_nothing(tmp_path):
+    report = ReportPDF(str(tmp_path / 'report.pdf'), HEADINGS, rows(5))
+    report.page([("QT-1", "2025-01-05", "A", None, "Draft"), ("QT-2", "2025-01-05", "B", "n/a", "Draft"),
+                 ("QT-3", "2025-01-05", "C", 250.5, "Draft")])
+    report.save()
+    assert report.running[3] == 250.5
+
+
+def test_empty_report_has_one_page(tmp_path):
+    path = str(tmp_path / 'empty.pdf')
+    assert write_pdf(path, HEADINGS, [], lambda count: None) == 1
+    assert pdf_pages(path) == 1
+
+
+def test_format_value():
+    assert [format_value(v) for v in (None, 1234.5, 7, "x")] == ["", "1,234.50", "7", "x"]
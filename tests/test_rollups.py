@@ -0,0 +1,78 @@
+"""
+TEST ROLLUPS - ContractorMitra
+Trigger-maintained rollups agree with GROUP BY over the raw tables
+"""
+
+import random
+from datetime import date
+
+import pytest
+
+import database
+import rollups
+from date_keys import key_range
+
+RAW_MONTHLY = '''
+    SELECT strftime('%Y-%m', date), COUNT(*), COALESCE(SUM(grand_total), 0), COALESCE(SUM(gst_amount), 0)
+    FROM quotations WHERE date_key BETWEEN ? AND ? GROUP BY 1 ORDER BY 1
+'''
+RAW_CUSTOMERS = '''
+    SELECT c.id, COUNT(q.id), COALESCE(SUM(q.grand_total), 0)
+    FROM customers c LEFT JOIN quotations q ON c.id = q.customer_id GROUP BY c.id ORDER BY c.id
+'''
+
+
+@pytest.fixture
+def sales(db):
+    """40 customers and 600 quotations spread over 2025, then updated and deleted"""
+    rnd = random.Random(9)
+    with database.transaction() as conn:
+        conn.executemany("INSERT INTO customers (name) VALUES (?)", [(f"Customer {i}",) for i in range(40)])
+        conn.executemany('''
+            INSERT INTO quotations (quote_no, date, customer_id, grand_total, gst_amount, status)
+            VALUES (?, ?, ?, ?, ?, 'Draft')
+        ''', [(f"QT-{n}", date(2025, 1 + n % 12, 1 + rnd.randrange(28)).isoformat(), 1 + rnd.randrange(40),
+               total, round(total * 0.18, 2)) for n, total in ((n, rnd.randint(100, 90000)) for n in range(600))])
+        conn.execute("UPDATE quotations SET grand_total = grand_total * 2, date = '2025-02-14' WHERE id % 17 = 0")
+        conn.execute("UPDATE quotations SET customer_id = customer_id % 40 + 1 WHERE id % 13 = 0")
+        conn.execute("DELETE FROM quotations WHERE id % 11 = 0")
+    return db
+
+
+def rounded(rows):
+    return [tuple(round(v, 2) if isinstance(v, float) else v for v in row) for row in rows]
+
+
+def test_triggers_keep_rollups_in_step(sales):
+    with database.connection() as conn:
+        assert rollups.check(conn) == []
+
+
+def test_rebuild_repairs_a_drifted_rollup(sales):
+    database.execute("UPDATE monthly_rollup SET sales = sales + 1 WHERE month = '2025-03'")
+    with database.connection() as conn:
+        assert [problem[:2] for problem in rollups.check(conn)] == [('monthly_rollup', '2025-03')]
+    with database.transaction() as conn:
+        rollups.rebuild(conn)
+        assert rollups.check(conn) == []
+
+
+@pytest.mark.parametrize('period', [('2025-01-01', '2025-12-31'), ('2025-01-15', '2025-03-10'),
+                                    ('2025-02-03', '2025-02-20'), ('2025-06-01', '2025-06-30')])
+def test_monthly_report_matches_group_by(sales, period):
+    sql, params = rollups.monthly_report_sql(*period)
+    fast = [row[1:5] for row in database.fetch_all(f"SELECT * FROM ({sql}) ORDER BY 1", params)]
+    assert rounded(fast) == rounded(database.fetch_all(RAW_MONTHLY, key_range(*period)))
+
+
+def test_customer_report_matches_group_by(sales):
+    fast = database.fetch_all(f"SELECT r.customer_id, r.invoices, r.lifetime_value "
+                              f"FROM ({rollups.CUSTOMER_REPORT_SQL}) r ORDER BY 1")
+    assert rounded(fast) == rounded(database.fetch_all(RAW_CUSTOMERS))
+
+
+def test_split_months():
+    assert rollups.split_months(date(2025, 1, 1), date(2025, 12, 31)) == (('2025-01', '2025-12'), [])
+    assert rollups.split_months(date(2025, 1, 15), date(2025, 3, 10)) == (
+        ('2025-02', '2025-02'), [(date(2025, 1, 15), date(2025, 1, 31)), (date(2025, 3, 1), date(2025, 3, 10))])
+    assert rollups.split_months(date(2025, 2, 3), date(2025, 2, 20)) == (None, [(date(2025, 2, 3), date(2025, 2, 20))])
@@ -0,0 +1,68 @@
+"""
+TEST VIRTUAL GRID - ContractorMitra
+Keyset pages reproduce the full ORDER BY; grid searches are literal
+"""
+
+import pytest
+
+import database
+from pending_window import payments_source
+from virtual_grid import GridSource
+
+COLUMNS = ("ID", "Name", "Phone", "Email")
+SORT_COLUMNS = ['id', 'name', 'phone', 'email']
+
+
+@pytest.fixture
+def customers(db):
+    with database.transaction() as conn:
+        conn.executemany("INSERT INTO customers (name, phone, email) VALUES (?,?,?)",
+                         [(f"Customer {i % 40}", f"98{i:08d}", None if i % 7 == 0 else f"c{i % 23}@example.com")
+                          for i in range(300)])
+
+
+def walk(source, page_size):
+    """All rows of `source` paging forward, then the same rows paging backward"""
+    forward, position = [], None
+    while True:
+        rows = source.page(position, True, page_size)
+        forward += rows
+        if len(rows) < page_size:
+            break
+        position = source.position(rows[-1])
+    backward, position = [], source.position(forward[-1])
+    while True:
+        rows = source.page(position, False, page_size)
+        backward[:0] = rows
+        if len(rows) < page_size:
+            break
+        position = source.position(rows[0])
+    return forward, backward + [forward[-1]]
+
+
+@pytest.mark.parametrize('sort', [0, 1, 3])
+@pytest.mark.parametrize('descending', [False, True])
+def test_keyset_pages_match_order_by(customers, sort, descending):
+    source = GridSource(COLUMNS, "SELECT id, id, name, phone, email FROM customers", sort=sort, descending=descending)
+    order = "DESC" if descending else "ASC"
+    expected = database.fetch_all(f"SELECT id, id, name, phone, email FROM customers "
+                                  f"ORDER BY {SORT_COLUMNS[sort]} {order}, id {order}")
+    forward, backward = walk(source, 17)
+    assert forward == expected
+    assert backward == expected
+
+
+def test_summary_covers_every_row(customers):
+    source = GridSource(COLUMNS, "SELECT id, id, name, phone, email FROM customers", sort=3)
+    assert source.summary("COUNT(*)", "COUNT(c3)") == (300, 300 - 43)
+
+
+@pytest.mark.parametrize('search, expected', [("50%", ["50% Traders"]), ("_", ["A_B Electricals"]),
+                                              ("Traders", ["50% Traders", "500 Traders"]), ("", None)])
+def test_payment_search_is_literal(db, search, expected):
+    with database.transaction() as conn:
+        for name in ("50% Traders", "500 Traders", "A_B Electricals", "AXB Electricals"):
+            cid = conn.execute("INSERT INTO customers (name) VALUES (?)", (name,)).lastrowid
+            conn.execute("INSERT INTO payments (customer_id, amount, due_date) VALUES (?, 100, '2025-10-18')", (cid,))
+    names = sorted(row[2] for row in payments_source(search).page())
+    assert names == sorted(expected or ["50% Traders", "500 Traders", "A_B Electricals", "AXB Electricals"])
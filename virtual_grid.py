@@ -0,0 +1,308 @@
+"""
+VIRTUAL GRID - ContractorMitra
+Keyset-paginated Treeview: rows are pulled from SQLite as the user scrolls
+"""
+
+from collections import deque
+
+import database
+from exporter import BATCH_ROWS, query_batches
+from report_cache import report_cache
+
+PAGE_SIZE = 200
+WINDOW_PAGES = 3       # rows kept in the Treeview = PAGE_SIZE * WINDOW_PAGES
+EDGE = 0.15            # fetch the next page when this close to either end
+SORT_MARKS = (" ▲", " ▼")
+
+
+def _fetch_all(conn, sql, params):
+    if conn is None:
+        return database.fetch_all(sql, params)
+    return conn.execute(sql, params).fetchall()
+
+
+class GridSource:
+    """A SELECT whose first column is a unique key and the rest are the grid columns"""
+
+    def __init__(self, headings, sql, params=(), sort=0, descending=False,
+                 format_row=None, widths=None, cache_key=None, tables=(), export_row=None,
+                 not_null=(), types=None):
+        self.headings = tuple(headings)
+        # Declared SQLite type per heading, for typed (Parquet) exports
+        self.types = tuple(types) if types else None
+        self.sql = sql
+        self.params = tuple(params)
+        self.sort = sort
+        self.descending = descending
+        self.format_row = format_row or tuple
+        # Exports keep raw values (numbers stay numbers) apart from this conversion
+        self.export_row = export_row or tuple
+        self.widths = widths
+        # Pages and summaries are cached when cache_key is set, until `tables` change
+        self.cache_key = cache_key
+        self.tables = tuple(tables)
+        # Columns the SQL never returns NULL in (e.g. range-filtered): no NULL segment to page
+        self.not_null = frozenset(not_null)
+        names = ", ".join(["k"] + [f"c{i}" for i in range(len(self.headings))])
+        # The CTE is flattened by SQLite, so indexes on the base tables still apply
+        self._with = f"WITH g({names}) AS ({sql})"
+
+    def position(self, row):
+        """Keyset position of a raw row: (sort value, key)"""
+        return row[1 + self.sort], row[0]
+
+    def _segments(self, position, ascending):
+        # NULL sort values come first ascending and last descending, and
+        # never satisfy a row-value comparison, so they get their own range
+        col = f"c{self.sort}"
+        op = ">" if ascending else "<"
+        if self.sort in self.not_null:
+            if position is None:
+                return [("1", ())]
+            return [(f"({col}, k) {op} (?, ?)", position)]
+        nulls = (f"{col} IS NULL", ())
+        values = (f"{col} IS NOT NULL", ())
+        if position is None:
+            return [nulls, values] if ascending else [values, nulls]
+        value, key = position
+        if value is None:
+            rest = (f"{col} IS NULL AND k {op} ?", (key,))
+            return [rest, values] if ascending else [rest]
+        rest = (f"({col}, k) {op} (?, ?)", (value, key))
+        return [rest] if ascending else [rest, nulls]
+
+    def _key(self, *parts):
+        if self.cache_key is None:
+            return None
+        return (self.cache_key, self.sort, self.descending) + parts + (database.table_version(*self.tables),)
+
+    def peek_page(self, position=None, forward=True, limit=PAGE_SIZE):
+        """Cached page, or None without touching the database tables"""
+        key = self._key('page', position, forward, limit)
+        return None if key is None else report_cache().get(key)
+
+    def peek_summary(self, *aggregates, params=()):
+        key = self._key('summary', aggregates, tuple(params))
+        return None if key is None else report_cache().get(key)
+
+    def page(self, position=None, forward=True, limit=PAGE_SIZE, conn=None):
+        """Up to `limit` raw rows after (or before) `position`, in display order"""
+        key = self._key('page', position, forward, limit)
+        rows = None if key is None else report_cache().get(key)
+        if rows is None:
+            rows = self._page(position, forward, limit, conn)
+            if key is not None:
+                report_cache().put(key, rows)
+        return rows
+
+    def page_queries(self, position=None, forward=True):
+        """(sql, params) per keyset segment of a page; the row limit is appended to params"""
+        ascending = forward != self.descending
+        order = "ASC" if ascending else "DESC"
+        return [(f"{self._with} SELECT * FROM g WHERE {where} ORDER BY c{self.sort} {order}, k {order} LIMIT ?",
+                 self.params + params) for where, params in self._segments(position, ascending)]
+
+    def summary_sql(self, *aggregates):
+        return f"{self._with} SELECT {', '.join(aggregates)} FROM g"
+
+    def _page(self, position, forward, limit, conn):
+        rows = []
+        for sql, params in self.page_queries(position, forward):
+            if len(rows) >= limit:
+                break
+            rows += _fetch_all(conn, sql, params + (limit - len(rows),))
+        if not forward:
+            rows.reverse()
+        return rows
+
+    def summary(self, *aggregates, params=(), conn=None):
+        """One row of aggregates (written against c0, c1, ...) over the whole result"""
+        key = self._key('summary', aggregates, tuple(params))
+        values = None if key is None else report_cache().get(key)
+        if values is None:
+            values = _fetch_all(conn, self.summary_sql(*aggregates), self.params + tuple(params))[0]
+            if key is not None:
+                report_cache().put(key, values)
+        return values
+
+    def batches(self, batch=BATCH_ROWS, conn=None):
+        """Lists of up to `batch` rows (without the key, through export_row) in display order"""
+        order = "DESC" if self.descending else "ASC"
+        sql = f"{self._with} SELECT * FROM g ORDER BY c{self.sort} {order}, k {order}"
+        convert = lambda row: self.export_row(row[1:])
+        if conn is not None:
+            yield from query_batches(conn, sql, self.params, convert, batch)
+            return
+        with database.connection() as conn:
+            yield from query_batches(conn, sql, self.params, convert, batch)
+
+    def rows(self, batch=BATCH_ROWS):
+        """Every row (without the key, through export_row) in display order, fetched in batches"""
+        for chunk in self.batches(batch):
+            yield from chunk
+
+
+class VirtualGrid:
+    """Drives an existing ttk.Treeview from a GridSource, keeping a sliding window of rows.
+
+    Pages are fetched inline, or through `runner` (a background.QueryRunner)
+    so slow queries never block the Tk thread.
+    """
+
+    def __init__(self, tree, scrollbar, page_size=PAGE_SIZE, window_pages=WINDOW_PAGES,
+                 runner=None, on_error=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.page_size = page_size
+        self.window = page_size * window_pages
+        self.runner = runner
+        self.on_error = on_error
+        self.source = None
+        self.rows = deque()            # (iid, keyset position) in display order
+        self.more_before = False
+        self.more_after = False
+        self._job = None               # after_idle id or running task
+        self._generation = 0           # bumped on every reload; stale pages are dropped
+        tree.configure(yscrollcommand=self._on_yscroll)
+
+    # ---------- LOADING ----------
+    def load(self, source):
+        """Show `source` from its first row"""
+        self.source = source
+        self._set_headings(source)
+        self.reload()
+
+    def reload(self):
+        """Re-run the current source from the top (after edits or a sort change)"""
+        self._reset()
+        source, size = self.source, self.page_size
+        self._fetch(lambda conn: source.page(None, True, size, conn), self._show_first,
+                    lambda: source.peek_page(None, True, size))
+
+    def set_rows(self, rows, format_row=tuple):
+        """Show a fixed list of rows with no paging (e.g. a search page)"""
+        self.source = None
+        self._reset()
+        for row in rows:
+            self.tree.insert("", "end", values=format_row(row))
+
+    def sort_by(self, column):
+        """Heading click: sort by `column` in SQL, toggling direction on repeat clicks"""
+        if self.source is None:
+            return
+        if self.source.sort == column:
+            self.source.descending = not self.source.descending
+        else:
+            self.source.sort, self.source.descending = column, False
+        self._set_headings(self.source)
+        self.reload()
+
+    def _reset(self):
+        self._cancel()
+        self._generation += 1
+        self.more_before = self.more_after = False
+        self.rows.clear()
+        self.tree.delete(*self.tree.get_children())
+
+    def _set_headings(self, source):
+        if tuple(self.tree['columns']) != source.headings:
+            self.tree['columns'] = source.headings
+            for i, heading in enumerate(source.headings):
+                width = source.widths[i] if source.widths else 120
+                self.tree.column(heading, width=width)
+        for i, heading in enumerate(source.headings):
+            mark = SORT_MARKS[source.descending] if i == source.sort else ""
+            self.tree.heading(heading, text=heading + mark, command=lambda i=i: self.sort_by(i))
+
+    def _insert(self, rows, index):
+        fmt = self.source.format_row
+        entries = []
+        for offset, row in enumerate(rows):
+            at = index if index == "end" else index + offset
+            iid = self.tree.insert("", at, values=fmt(row[1:]))
+            entries.append((iid, self.source.position(row)))
+        if index == "end":
+            self.rows.extend(entries)
+        else:
+            self.rows.extendleft(reversed(entries))
+
+    # ---------- FETCHING ----------
+    def _fetch(self, query, on_rows, peek=None):
+        generation = self._generation
+
+        def done(rows):
+            self._job = None
+            if generation == self._generation:
+                on_rows(rows)
+
+        def failed(error):
+            self._job = None
+            if self.on_error:
+                self.on_error(error)
+
+        if self.runner is None:
+            self._job = None
+            done(query(None))
+            return
+        cached = peek() if peek else None
+        if cached is not None:
+            done(cached)
+        else:
+            self._job = self.runner.submit(query, done, failed)
+
+    def _pending(self):
+        # Tasks cancelled through the runner never call back, so they don't count
+        if isinstance(self._job, str):
+            return True
+        return self._job is not None and not self._job.cancelled.is_set()
+
+    def _cancel(self):
+        if isinstance(self._job, str):
+            self.tree.after_cancel(self._job)
+        elif self._job is not None:
+            self._job.cancel()
+        self._job = None
+
+    def _show_first(self, rows):
+        self.more_after = len(rows) == self.page_size
+        self._insert(rows, "end")
+        self.tree.yview_moveto(0)
+
+    # ---------- SCROLLING ----------
+    def _on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self._pending() or self.source is None or not self.rows:
+            return
+        if float(last) >= 1 - EDGE and self.more_after:
+            self._job = self.tree.after_idle(self._load_after)
+        elif float(first) <= EDGE and self.more_before:
+            self._job = self.tree.after_idle(self._load_before)
+
+    def _load_after(self):
+        source, position, size = self.source, self.rows[-1][1], self.page_size
+        self._fetch(lambda conn: source.page(position, True, size, conn), self._show_after,
+                    lambda: source.peek_page(position, True, size))
+
+    def _load_before(self):
+        source, position, size = self.source, self.rows[0][1], self.page_size
+        self._fetch(lambda conn: source.page(position, False, size, conn), self._show_before,
+                    lambda: source.peek_page(position, False, size))
+
+    def _show_after(self, rows):
+        self.more_after = len(rows) == self.page_size
+        self._insert(rows, "end")
+        excess = len(self.rows) - self.window
+        if excess > 0:
+            self.tree.delete(*[self.rows.popleft()[0] for _ in range(excess)])
+            # Rows above the view vanished: scroll back so the same rows stay visible
+            self.tree.yview_scroll(-excess, "units")
+            self.more_before = True
+
+    def _show_before(self, rows):
+        self.more_before = len(rows) == self.page_size
+        self._insert(rows, 0)
+        self.tree.yview_scroll(len(rows), "units")
+        excess = len(self.rows) - self.window
+        if excess > 0:
+            self.tree.delete(*[self.rows.pop()[0] for _ in range(excess)])
+            self.more_after = True